@@ -0,0 +1,50 @@
+"""
+bench_agent_setup.py
+--------------------------------------------------
+Per-request agent setup overhead: compiling a fresh create_agent graph
+(+ chat model client) on every call vs fetching it from the registry.
+
+No model calls are made, but importing modules.agent opens the job index,
+so run it where the index already exists. GOOGLE_API_KEY must be set
+(any value works, the client is only constructed).
+
+Usage (from agentkit/):
+    python -m benchmarks.bench_agent_setup --runs 50
+"""
+
+import argparse
+import time
+
+from modules import agent as agent_module
+
+
+def timed(fn, runs):
+    start = time.perf_counter()
+    for _ in range(runs):
+        fn()
+    return (time.perf_counter() - start) / runs * 1000
+
+
+def fresh_setup():
+    # What get_job_recommendation did before the registry
+    agent_module._chat_models.clear()
+    agent_module.build_agent()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=50)
+    args = parser.parse_args()
+
+    before = timed(fresh_setup, args.runs)
+    agent_module.warm_up()
+    after = timed(agent_module.get_agent, args.runs)
+
+    print(f"{args.runs} runs")
+    print(f"{'setup':<28}{'per request (ms)':>18}")
+    print(f"{'create_agent per request':<28}{before:>18.3f}")
+    print(f"{'registry (warm)':<28}{after:>18.3f}")
+
+
+if __name__ == "__main__":
+    main()
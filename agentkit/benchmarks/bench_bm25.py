@@ -0,0 +1,117 @@
+"""
+bench_bm25.py
+--------------------------------------------------
+Query latency of the BM25 inverted index (modules/bm25.py) vs the old
+JobMatchingGraph._basic_score scan, from 1k to 1M synthetic jobs.
+
+The index is grown in place to each corpus size (so this also measures
+incremental adds), then timed on a set of CV-like queries. The old
+full scan re-tokenizes every job on every query, so it is only run up
+to --legacy-max jobs. Finally a batch of jobs is updated and removed
+to time incremental maintenance at the largest size.
+
+Vocabulary is Zipf-distributed, so common terms have long posting lists
+like real job text.
+
+Usage (from agentkit/):
+    python -m benchmarks.bench_bm25 --sizes 1000,10000,100000,1000000
+"""
+
+import argparse
+import itertools
+import random
+import statistics
+import time
+
+from modules.bm25 import BM25Index
+
+SKILLS = "python sql matlab java c++ c# react aws gcp docker kubernetes spark pandas pytorch tableau excel".split()
+
+
+def make_vocab(size: int, rng: random.Random):
+    letters = "abcdefghijklmnopqrstuvwxyz"
+    words = {"".join(rng.choice(letters) for _ in range(rng.randint(3, 9))) for _ in range(size * 2)}
+    vocab = SKILLS + sorted(words)[: size - len(SKILLS)]
+    rng.shuffle(vocab)
+    cum_weights = list(itertools.accumulate(1 / (rank + 1) for rank in range(len(vocab))))     # Zipf
+    return vocab, cum_weights
+
+
+def job_text(rng: random.Random, vocab, cum_weights, n_words: int = 40) -> str:
+    return " ".join(rng.choices(vocab, cum_weights=cum_weights, k=n_words))
+
+
+def legacy_score(query: str, text: str) -> float:
+    q_words = set(query.lower().split())
+    t_words = set(text.lower().split())
+    return len(q_words & t_words) / max(len(q_words), 1)
+
+
+def legacy_search(query: str, texts, top_k: int):
+    scored = [(legacy_score(query, t), i) for i, t in enumerate(texts)]
+    scored.sort(key=lambda x: x[0], reverse=True)
+    return scored[:top_k]
+
+
+def latency(fn, queries):
+    samples = []
+    for q in queries:
+        start = time.perf_counter()
+        fn(q)
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples), sorted(samples)[int(0.95 * (len(samples) - 1))]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", default="1000,10000,100000,1000000")
+    parser.add_argument("--vocab", type=int, default=20000)
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--legacy-max", type=int, default=100000)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    vocab, cum_weights = make_vocab(args.vocab, rng)
+    queries = [
+        " ".join(rng.sample(SKILLS, 3)) + " " + job_text(rng, vocab, cum_weights, 12) for _ in range(args.queries)
+    ]
+
+    index = BM25Index()
+    texts = []            # kept only while the legacy scan is still measured
+    sizes = sorted(int(s) for s in args.sizes.split(","))
+    print(f"{'jobs':>9} {'add (s)':>8} {'terms':>7}   {'bm25 p50':>9} {'p95':>7}   {'scan p50':>9} {'p95':>8}")
+    for size in sizes:
+        start = time.perf_counter()
+        for doc_id in range(len(index), size):
+            text = job_text(rng, vocab, cum_weights)
+            index.add(doc_id, text)
+            if size <= args.legacy_max:
+                texts.append(text)
+        add_s = time.perf_counter() - start
+
+        bm25_p50, bm25_p95 = latency(lambda q: index.search(q, args.top_k), queries)
+        if size <= args.legacy_max:
+            scan_p50, scan_p95 = latency(lambda q: legacy_search(q, texts, args.top_k), queries[:10])
+            scan = f"{scan_p50:8.1f}ms {scan_p95:6.1f}ms"
+        else:
+            texts = []
+            scan = f"{'-':>9} {'-':>8}"
+        print(f"{size:>9} {add_s:8.1f} {len(index.postings):>7}   {bm25_p50:7.2f}ms {bm25_p95:5.2f}ms   {scan}")
+
+    n_updates = 1000
+    updates = [(doc_id, job_text(rng, vocab, cum_weights)) for doc_id in rng.sample(range(len(index)), n_updates)]
+    start = time.perf_counter()
+    for doc_id, text in updates:
+        index.add(doc_id, text)      # upsert
+    update_ms = (time.perf_counter() - start) * 1000 / n_updates
+    start = time.perf_counter()
+    for doc_id in rng.sample(range(len(index)), n_updates):
+        index.remove(doc_id)
+    remove_ms = (time.perf_counter() - start) * 1000 / n_updates
+    print(f"incremental at {len(index) + n_updates} jobs: upsert {update_ms:.3f} ms/job, remove {remove_ms:.3f} ms/job")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+"""
+bench_contact_info.py
+--------------------------------------------------
+Throughput and equivalence of contact_info.extract_contact_info against
+the previous five-scan implementation (kept here as `legacy`).
+
+Generates large synthetic CVs: prose with dotted tech tokens ("Node.js",
+"e.g."), date ranges, student IDs, repeated contact blocks, emails, phones in several
+formats, LinkedIn / GitHub profiles and websites.
+
+Equivalence, per CV, against the legacy output after the same
+normalization + dedup:
+- emails, linkedin, github: must be identical;
+- phones, websites: the new output must be a subset. What only the
+  legacy scans report (email domains, "Node.js", digits inside URLs or
+  IDs) is counted as dropped false positives.
+
+Exits non-zero if any check fails.
+
+Usage (from agentkit/):
+    python -m benchmarks.bench_contact_info --cvs 200 --kb 50
+"""
+
+import argparse
+import random
+import re
+import sys
+import time
+
+from modules.contact_info import FIELDS, _normalize, extract_contact_info
+
+WORDS = (
+    "developed scalable services using Python Django and Node.js e.g. for payments "
+    "led a team of engineers improved latency by 40% migrated to AWS Kubernetes "
+    "research on machine learning published at NeurIPS worked with ASP.NET and Vue.js "
+    "responsible for data pipelines Spark Airflow dbt stakeholders i.e. product owners"
+).split()
+DOMAINS = ["gmail.com", "outlook.com", "company.io", "uni.edu", "example.org"]
+SITES = ["janedoe.dev", "www.portfolio.me", "https://blog.example.com/posts", "scikit-learn.org", "medium.com/@jane"]
+
+
+def legacy(text: str) -> dict:
+    return {
+        "emails": re.findall(r'[\w\.-]+@[\w\.-]+', text),
+        "phones": re.findall(r'\+?\d[\d\s\-]{7,}\d', text),
+        "linkedin": re.findall(r'(?:https?://)?(?:www\.)?linkedin\.com/[A-Za-z0-9_/.\-]+', text),
+        "github": re.findall(r'(?:https?://)?(?:www\.)?github\.com/[A-Za-z0-9_/.\-]+', text),
+        "websites": re.findall(r'(?:https?://)?(?:www\.)?[A-Za-z0-9\-]+\.[a-z]{2,}(?:/[A-Za-z0-9_\-./]*)?', text),
+    }
+
+
+def normalized(raw: dict) -> dict:
+    out = {}
+    for field in FIELDS:
+        values = (_normalize(field, v) for v in raw[field])
+        out[field] = list(dict.fromkeys(v for v in values if v))
+    return out
+
+
+def contact_block(rng: random.Random) -> str:
+    name = rng.choice(["jane.doe", "j_smith", "alex-k", "maria.rossi"])
+    phone = rng.choice(["+31 6 1234 5678", "+1-415-555-0132", "020 123 4567", "+44 20 7946 0958", "0612345678"])
+    parts = [
+        f"Email: {name}@{rng.choice(DOMAINS)}.",
+        f"Phone: {phone}",
+        f"LinkedIn: {rng.choice(['https://www.linkedin.com/in/', 'linkedin.com/in/'])}{name}/",
+        f"GitHub: github.com/{name}",
+        f"Web: {rng.choice(SITES)}",
+    ]
+    rng.shuffle(parts)
+    return " ".join(parts)
+
+
+def synthetic_cv(rng: random.Random, kb: int) -> str:
+    chunks, size = [contact_block(rng)], 0
+    while size < kb * 1024:
+        roll = rng.random()
+        if roll < 0.02:
+            chunk = contact_block(rng)
+        elif roll < 0.06:
+            chunk = f"{rng.randint(2005, 2018)} - {rng.randint(2019, 2024)} Senior Engineer at Acme"
+        elif roll < 0.07:
+            chunk = f"Student ID S{rng.randint(10**9, 10**10)} at uni.edu/students"
+        else:
+            chunk = " ".join(rng.choice(WORDS) for _ in range(rng.randint(8, 20))) + "."
+        chunks.append(chunk)
+        size += len(chunk) + 1
+    return " ".join(chunks)
+
+
+def timed(fn, texts, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for text in texts:
+            fn(text)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--cvs", type=int, default=200)
+    parser.add_argument("--kb", type=int, default=50, help="Approximate size of each CV in KB")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    texts = [synthetic_cv(rng, args.kb) for _ in range(args.cvs)]
+    mb = sum(len(t) for t in texts) / 1e6
+
+    failures, dropped = [], {field: 0 for field in FIELDS}
+    for i, text in enumerate(texts):
+        new, ref = extract_contact_info(text), normalized(legacy(text))
+        for field in ("emails", "linkedin", "github"):
+            if new[field] != ref[field]:
+                failures.append((i, field, new[field], ref[field]))
+        for field in ("phones", "websites"):
+            extra = set(new[field]) - set(ref[field])
+            if extra:
+                failures.append((i, field, sorted(extra), "not in legacy output"))
+            dropped[field] += len(set(ref[field]) - set(new[field]))
+
+    legacy_s = timed(legacy, texts, args.repeat)
+    new_s = timed(extract_contact_info, texts, args.repeat)
+
+    print(f"{args.cvs} synthetic CVs, {mb:.1f} MB of text")
+    print(f"legacy (5 scans)     {legacy_s:6.2f}s  {mb / legacy_s:6.1f} MB/s")
+    print(f"single pass          {new_s:6.2f}s  {mb / new_s:6.1f} MB/s  speedup {legacy_s / new_s:.2f}x")
+    print(f"dropped legacy false positives: phones {dropped['phones']}, websites {dropped['websites']}")
+    if failures:
+        for failure in failures[:10]:
+            print("MISMATCH", failure)
+        print(f"❌ {len(failures)} equivalence failures")
+        sys.exit(1)
+    print("✅ emails / linkedin / github identical, phones / websites a subset of the legacy output")
+
+
+if __name__ == "__main__":
+    main()
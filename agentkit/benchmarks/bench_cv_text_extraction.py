@@ -0,0 +1,134 @@
+"""
+bench_cv_text_extraction.py
+--------------------------------------------------
+Serial vs batch CV text extraction on a generated corpus.
+
+Writes a synthetic corpus of PDFs (mostly 1–3 pages, plus some long
+ones that get split into page ranges) and DOCX files, then compares:
+- serial: extract_text() per file, one process (the upload path);
+- batch:  cv_text.extract_texts() over a process pool.
+
+Checks that both produce identical text for every file. PDFs are written
+by a tiny built-in writer, so no extra dependency is needed.
+
+Usage (from agentkit/):
+    python -m benchmarks.bench_cv_text_extraction --files 400 --workers 8
+"""
+
+import argparse
+import os
+import random
+import tempfile
+import time
+
+import docx
+
+from modules.cv_text import extract_text, extract_texts
+
+WORDS = (
+    "python machine learning data engineer sql cloud aws docker kubernetes react team lead "
+    "project delivered stakeholders analytics research university master bachelor thesis "
+    "internship optimization pipeline backend frontend api design testing agile scrum"
+).split()
+
+
+def random_line(rng: random.Random) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(rng.randint(6, 14)))
+
+
+def _pdf_escape(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def write_pdf(path: str, pages) -> None:
+    """Minimal PDF: one Helvetica text stream per page (list of lines)."""
+    objects = ["<< /Type /Catalog /Pages 2 0 R >>", None, "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    kids = []
+    for lines in pages:
+        body = "BT /F1 10 Tf 14 TL 50 800 Td " + " ".join(f"({_pdf_escape(l)}) Tj T*" for l in lines) + " ET"
+        objects.append(f"<< /Length {len(body)} >>\nstream\n{body}\nendstream")
+        content_id = len(objects)
+        objects.append(
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+            f"/Resources << /Font << /F1 3 0 R >> >> /Contents {content_id} 0 R >>"
+        )
+        kids.append(f"{len(objects)} 0 R")
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {len(kids)} >>"
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for i, obj in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += f"{i} 0 obj\n{obj}\nendobj\n".encode("latin-1")
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    out += "".join(f"{o:010d} 00000 n \n" for o in offsets).encode()
+    out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode()
+    with open(path, "wb") as f:
+        f.write(out)
+
+
+def write_docx(path: str, lines) -> None:
+    doc = docx.Document()
+    for line in lines:
+        doc.add_paragraph(line)
+    doc.save(path)
+
+
+def build_corpus(out_dir: str, n_files: int, long_share: float, long_pages: int, seed: int):
+    rng = random.Random(seed)
+    paths, n_pages = [], 0
+    for i in range(n_files):
+        if rng.random() < 0.3:
+            path = os.path.join(out_dir, f"cv_{i:05d}.docx")
+            write_docx(path, [random_line(rng) for _ in range(rng.randint(30, 120))])
+        else:
+            pages = long_pages if rng.random() < long_share else rng.randint(1, 3)
+            path = os.path.join(out_dir, f"cv_{i:05d}.pdf")
+            write_pdf(path, [[random_line(rng) for _ in range(45)] for _ in range(pages)])
+            n_pages += pages
+        paths.append(path)
+    return paths, n_pages
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--files", type=int, default=400)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 2)
+    parser.add_argument("--long-share", type=float, default=0.05, help="Share of PDFs that are long")
+    parser.add_argument("--long-pages", type=int, default=60)
+    parser.add_argument("--split-pages", type=int, default=16)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as out_dir:
+        start = time.perf_counter()
+        paths, n_pages = build_corpus(out_dir, args.files, args.long_share, args.long_pages, args.seed)
+        print(f"corpus: {len(paths)} files, {n_pages} PDF pages ({time.perf_counter() - start:.1f}s to generate)")
+
+        start = time.perf_counter()
+        serial = {p: extract_text(p) for p in paths}
+        serial_s = time.perf_counter() - start
+
+        start = time.perf_counter()
+        first = None
+        batch = {}
+        for item in extract_texts(paths, workers=args.workers, split_pages=args.split_pages):
+            first = first or time.perf_counter() - start
+            batch[item["path"]] = item
+        batch_s = time.perf_counter() - start
+
+    mismatches = sum(1 for p in paths if batch[p]["text"] != serial[p])
+    errors = sum(1 for item in batch.values() if item["error"])
+    skipped = sum(len(item["skipped_pages"]) for item in batch.values())
+
+    print(f"serial            {serial_s:7.2f}s  {len(paths) / serial_s:7.1f} files/s")
+    print(
+        f"batch ({args.workers} workers)  {batch_s:7.2f}s  {len(paths) / batch_s:7.1f} files/s"
+        f"  first result after {first * 1000:.0f} ms  speedup {serial_s / batch_s:.2f}x"
+    )
+    print(f"identical text: {len(paths) - mismatches}/{len(paths)}  errors: {errors}  timed-out pages: {skipped}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""
+bench_recommendation_modes.py
+--------------------------------------------------
+Latency and token usage of get_job_recommendation in "agent" mode
+(tool-calling agent) vs "pipeline" mode (summary → exec_query → one
+structured-output call).
+
+Runs against the real models, so GOOGLE_API_KEY / OPENAI_API_KEY must be
+set and cv_profiles must contain the given user.
+
+Usage (from agentkit/):
+    python -m benchmarks.bench_recommendation_modes --user-id 1 --runs 3
+"""
+
+import argparse
+import statistics
+import time
+
+from langchain_core.callbacks import UsageMetadataCallbackHandler
+
+from modules.agent import get_job_recommendation
+
+
+def run(user_id: int, mode: str, runs: int):
+    latencies, tokens = [], []
+    for _ in range(runs):
+        usage = UsageMetadataCallbackHandler()
+        start = time.perf_counter()
+        get_job_recommendation(user_id, mode=mode, callbacks=[usage])
+        latencies.append(time.perf_counter() - start)
+
+        # usage_metadata is keyed by model name and summed over all calls
+        tokens.append(sum(u.get("total_tokens", 0) for u in usage.usage_metadata.values()))
+    return latencies, tokens
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--user-id", type=int, default=1)
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    rows = []
+    for mode in ("agent", "pipeline"):
+        latencies, tokens = run(args.user_id, mode, args.runs)
+        rows.append((mode, statistics.median(latencies), max(latencies), statistics.mean(tokens)))
+
+    print(f"user {args.user_id}, {args.runs} runs per mode")
+    print(f"{'mode':<10}{'p50 (s)':>10}{'max (s)':>10}{'tokens':>10}")
+    for mode, p50, worst, tok in rows:
+        print(f"{mode:<10}{p50:>10.2f}{worst:>10.2f}{tok:>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
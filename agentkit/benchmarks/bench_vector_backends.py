@@ -0,0 +1,109 @@
+"""
+bench_vector_backends.py
+--------------------------------------------------
+Query latency of the Chroma and NumPy vector backends on the same data.
+
+Both stores are filled with identical synthetic chunk embeddings
+(several chunks per job, like JobMatching produces) and queried with
+the same random vectors, so only the search path is measured — no
+embedding API calls. Chroma's HNSW results are also scored against
+the exact NumPy results (recall@k).
+
+Usage (from agentkit/):
+    python -m benchmarks.bench_vector_backends --chunks 20000 --dim 1536
+"""
+
+import argparse
+import shutil
+import tempfile
+import time
+
+import numpy as np
+from langchain_chroma import Chroma
+from langchain_core.embeddings import Embeddings
+
+from modules.numpy_vector_store import NumpyVectorStore
+
+
+class LookupEmbeddings(Embeddings):
+    """Returns pre-generated vectors for "chunk-<i>" texts; no model involved."""
+
+    def __init__(self, vectors: np.ndarray) -> None:
+        self.vectors = vectors
+
+    def embed_documents(self, texts):
+        return [self.vectors[int(t.split("-")[1])].tolist() for t in texts]
+
+    def embed_query(self, text):
+        return self.embed_documents([text])[0]
+
+
+def timed(fn, queries):
+    start = time.perf_counter()
+    results = [fn(q) for q in queries]
+    elapsed = time.perf_counter() - start
+    return results, elapsed / len(queries) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--chunks", type=int, default=20000)
+    parser.add_argument("--chunks-per-job", type=int, default=3)
+    parser.add_argument("--dim", type=int, default=1536)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("-k", type=int, default=10)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    vectors = rng.standard_normal((args.chunks, args.dim), dtype=np.float32)
+    # Unit vectors, like OpenAI embeddings: Chroma's L2 ranking then equals cosine.
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    queries = rng.standard_normal((args.queries, args.dim), dtype=np.float32)
+    embeddings = LookupEmbeddings(vectors)
+
+    texts = [f"chunk-{i}" for i in range(args.chunks)]
+    metadatas = [{"doc_id": str(i // args.chunks_per_job), "chunk": i % args.chunks_per_job} for i in range(args.chunks)]
+    ids = [f"{m['doc_id']}:{m['chunk']}" for m in metadatas]
+
+    tmp_dir = tempfile.mkdtemp(prefix="bench_vector_backends_")
+    try:
+        t0 = time.perf_counter()
+        chroma = Chroma(collection_name="bench", embedding_function=embeddings, persist_directory=f"{tmp_dir}/chroma")
+        for i in range(0, args.chunks, 1000):
+            chroma.add_texts(texts[i : i + 1000], metadatas[i : i + 1000], ids=ids[i : i + 1000])
+        chroma_build = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        store = NumpyVectorStore("bench", embeddings, f"{tmp_dir}/numpy")
+        for i in range(0, args.chunks, 1000):
+            store.add_texts(texts[i : i + 1000], metadatas[i : i + 1000], ids=ids[i : i + 1000])
+        store.flush()
+        numpy_build = time.perf_counter() - t0
+
+        q_list = [q.tolist() for q in queries]
+        chroma_hits, chroma_ms = timed(lambda q: chroma.similarity_search_by_vector(q, k=args.k), q_list)
+        numpy_hits, numpy_ms = timed(lambda q: store.similarity_search_by_vector_with_score(q, k=args.k), q_list)
+        _, docs_ms = timed(lambda q: store.search_docs_by_vectors([q], args.k), q_list)
+
+        t0 = time.perf_counter()
+        store.search_docs_by_vectors(queries, args.k)
+        batch_ms = (time.perf_counter() - t0) / args.queries * 1000
+
+        recall = np.mean([
+            len({d.id for d in c} & {d.id for d, _ in n}) / args.k
+            for c, n in zip(chroma_hits, numpy_hits)
+        ])
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    print(f"{args.chunks} chunks x {args.dim} dims, {args.queries} queries, k={args.k}")
+    print(f"{'backend':<34}{'build (s)':>10}{'query (ms)':>12}")
+    print(f"{'chroma similarity_search':<34}{chroma_build:>10.2f}{chroma_ms:>12.3f}")
+    print(f"{'numpy similarity_search':<34}{numpy_build:>10.2f}{numpy_ms:>12.3f}")
+    print(f"{'numpy search_docs (max-pool)':<34}{'':>10}{docs_ms:>12.3f}")
+    print(f"{'numpy search_docs (batched)':<34}{'':>10}{batch_ms:>12.3f}")
+    print(f"chroma recall@{args.k} vs exact numpy: {recall:.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,208 @@
+"""
+eval_hybrid_retrieval.py
+--------------------------------------------------
+Offline recall / latency evaluation of JobMatching retrieval modes:
+vector-only vs hybrid (vector + BM25, reciprocal rank fusion).
+
+For each k, recall@k = |relevant ∩ top-k jobs| / min(|relevant|, k),
+averaged over the queries, plus median query latency. The last line
+reports the smallest hybrid k that reaches vector-only recall at the
+largest k, i.e. how far the retrieval k can be cut for the same recall.
+
+Data:
+- default (synthetic, no API key): jobs built from skill families
+  (SQL / PostgreSQL / MySQL, MATLAB / Octave / Simulink, ...) embedded
+  with FamilyEmbeddings, a local model where skills of one family are
+  close neighbours. Queries name two exact skills; relevant jobs are
+  those that require both. This reproduces "generic semantic
+  neighbours outrank the exact skill" without network calls.
+- --csv jobs.csv --qrels qrels.jsonl: a real job list embedded with
+  JobMatching's cached OpenAI embeddings (needs OPENAI_API_KEY). Each
+  qrels line is {"query": "...", "relevant": [<row>, ...]}, with rows
+  the 0-based CSV row numbers of the relevant jobs (mapped to job keys).
+
+Usage (from agentkit/):
+    python -m benchmarks.eval_hybrid_retrieval --jobs 3000 --queries 200
+    python -m benchmarks.eval_hybrid_retrieval --csv datastore/joblist_clean_for_rag.csv --qrels qrels.jsonl
+"""
+
+import argparse
+import csv
+import hashlib
+import json
+import os
+import random
+import shutil
+import statistics
+import tempfile
+import time
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+from modules.bm25 import tokenize
+from modules.index_manifest import job_key
+
+FAMILIES = {
+    "databases": ["sql", "postgresql", "mysql", "oracle", "sqlite", "nosql", "mongodb"],
+    "numerical": ["matlab", "octave", "simulink", "numpy", "scipy", "fortran"],
+    "ml": ["pytorch", "tensorflow", "keras", "jax", "xgboost", "sklearn"],
+    "web": ["react", "angular", "vue", "svelte", "javascript", "typescript"],
+    "cloud": ["aws", "gcp", "azure", "terraform", "kubernetes", "docker"],
+    "bi": ["tableau", "powerbi", "looker", "excel", "qlik", "dax"],
+    "backend": ["java", "kotlin", "scala", "golang", "rust", "csharp"],
+}
+FILLER = (
+    "team collaborate fast paced environment passionate growth ownership stakeholders deliver "
+    "impact innovative solutions culture learning opportunity responsible motivated communication"
+).split()
+DIM = 256
+
+
+class FamilyEmbeddings(Embeddings):
+    """Local stand-in for a semantic model: skills of one family share most of their vector."""
+
+    def __init__(self, dim: int = DIM) -> None:
+        self.dim = dim
+        self.family_of = {skill: family for family, skills in FAMILIES.items() for skill in skills}
+
+    def _vec(self, key: str) -> np.ndarray:
+        seed = int.from_bytes(hashlib.sha256(key.encode()).digest()[:4], "little")
+        return np.random.default_rng(seed).standard_normal(self.dim)
+
+    def _embed(self, text: str):
+        total = np.zeros(self.dim)
+        for token in tokenize(text):
+            family = self.family_of.get(token)
+            if family:
+                total += self._vec(f"family:{family}") + 0.5 * self._vec(token)
+            else:
+                total += 0.1 * self._vec(token)
+        norm = np.linalg.norm(total)
+        return (total / norm if norm else total).tolist()
+
+    def embed_documents(self, texts):
+        return [self._embed(t) for t in texts]
+
+    def embed_query(self, text):
+        return self._embed(text)
+
+
+def synthetic_data(out_csv: str, n_jobs: int, n_queries: int, seed: int):
+    rng = random.Random(seed)
+    skills_of = []
+    with open(out_csv, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["title", "company", "location", "remote", "department", "description"])
+        for i in range(n_jobs):
+            families = rng.sample(sorted(FAMILIES), 3)
+            skills = [rng.choice(FAMILIES[fam]) for fam in families]
+            skills_of.append(set(skills))
+            filler = " ".join(rng.choice(FILLER) for _ in range(rng.randint(30, 120)))
+            writer.writerow([
+                f"{skills[0].title()} Engineer {i}",
+                f"Company{i % 97}",
+                rng.choice(["Amsterdam", "Berlin", "Remote"]),
+                rng.choice(["yes", "no"]),
+                rng.choice(["Engineering", "Data"]),
+                f"Requirements: {', '.join(skills)}. {filler}",
+            ])
+
+    qrels = []
+    while len(qrels) < n_queries:
+        a, b = rng.sample(sorted(FAMILIES), 2)
+        skill_a, skill_b = rng.choice(FAMILIES[a]), rng.choice(FAMILIES[b])
+        relevant = [i for i, skills in enumerate(skills_of) if {skill_a, skill_b} <= skills]
+        if relevant:
+            fluff = " ".join(rng.choice(FILLER) for _ in range(15))
+            qrels.append({"query": f"Experienced engineer skilled in {skill_a} and {skill_b}. {fluff}", "relevant": relevant})
+    return qrels
+
+
+def evaluate(search, qrels, ks):
+    recalls = {k: [] for k in ks}
+    latencies = []
+    for q in qrels:
+        relevant = set(q["relevant"])
+        start = time.perf_counter()
+        ranked = search(q["query"], max(ks))
+        latencies.append((time.perf_counter() - start) * 1000)
+        for k in ks:
+            recalls[k].append(len(relevant & set(ranked[:k])) / min(len(relevant), k))
+    return {k: statistics.mean(v) for k, v in recalls.items()}, statistics.median(latencies)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--csv", help="Real job CSV (with --qrels); default is a synthetic corpus")
+    parser.add_argument("--qrels", help="JSONL of {query, relevant: [csv row, ...]}")
+    parser.add_argument("--jobs", type=int, default=3000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--ks", default="3,5,10,20")
+    parser.add_argument("--backend", default="numpy", choices=["numpy", "chroma"])
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+    ks = sorted(int(k) for k in args.ks.split(","))
+
+    workdir = tempfile.mkdtemp(prefix="eval_hybrid_")
+    cwd = os.getcwd()
+    try:
+        if args.csv:
+            csv_path = os.path.abspath(args.csv)
+            with open(args.qrels, encoding="utf-8") as f:
+                qrels = [json.loads(line) for line in f if line.strip()]
+            offline = None
+        else:
+            csv_path = os.path.join(workdir, "jobs.csv")
+            qrels = synthetic_data(csv_path, args.jobs, args.queries, args.seed)
+            offline = FamilyEmbeddings()
+            os.environ.setdefault("OPENAI_API_KEY", "offline")   # OpenAIEmbeddings is built but never called
+
+        # Relevant CSV rows → the job keys JobMatching uses as doc_ids
+        with open(csv_path, newline="", encoding="utf-8") as f:
+            keys = [job_key(r["title"], r["company"]) for r in csv.DictReader(f)]
+        for q in qrels:
+            q["relevant"] = [keys[int(row)] for row in q["relevant"]]
+
+        os.chdir(workdir)       # JobMatching keeps its index directory relative to the cwd
+        from modules.job_matching import JobMatching
+
+        jm = JobMatching(
+            model_name="gemini-2.5-flash-lite",
+            job_list_path=csv_path,
+            vector_backend=args.backend,
+            retrieval="hybrid",
+            embedding_cache_path=os.path.join(workdir, "embedding_cache.db"),
+        )
+        if offline is not None:
+            jm.embeddings = offline
+        jm.load_joblist()
+        index = jm.index
+
+        def vector_search(query, k):
+            return [did for did, _ in jm._dense_docs_by_vectors(index, [jm.embeddings.embed_query(query)], k)[0]]
+
+        def hybrid_search(query, k):
+            return [did for did, _ in jm._rank_docs(index, query, k)]
+
+        print(f"{len(index)} jobs, {len(qrels)} queries, backend={args.backend}")
+        print(f"{'mode':<8}" + "".join(f"{f'R@{k}':>8}" for k in ks) + f"{'p50 ms':>9}")
+        results = {}
+        for mode, search in (("vector", vector_search), ("hybrid", hybrid_search)):
+            recall, p50 = evaluate(search, qrels, ks)
+            results[mode] = recall
+            print(f"{mode:<8}" + "".join(f"{recall[k]:>8.3f}" for k in ks) + f"{p50:>9.1f}")
+
+        target = results["vector"][ks[-1]]
+        reached = [k for k in ks if results["hybrid"][k] >= target]
+        if reached:
+            print(f"hybrid reaches vector R@{ks[-1]} ({target:.3f}) at k={reached[0]}")
+        else:
+            print(f"hybrid does not reach vector R@{ks[-1]} ({target:.3f}) within k={ks[-1]}")
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+"""
+eval_quantization.py
+--------------------------------------------------
+Recall@k and RAM footprint of compact NumPy indexes vs full precision.
+
+For each configuration (precision x PCA dimension x rescoring) the
+top-k chunks returned by NumpyVectorStore are compared with the exact
+float32 top-k for the same queries.
+
+Data is either synthetic (clustered, low-rank embeddings that behave
+like real text embeddings) or, with --csv, the real job list embedded
+with JobMatching's cached OpenAI embeddings (needs OPENAI_API_KEY).
+
+Usage (from agentkit/):
+    python -m benchmarks.eval_quantization --chunks 20000
+    python -m benchmarks.eval_quantization --csv datastore/joblist_clean_for_rag.csv
+"""
+
+import argparse
+import shutil
+import tempfile
+
+import numpy as np
+
+from benchmarks.bench_vector_backends import LookupEmbeddings
+from modules.numpy_vector_store import NumpyVectorStore
+
+CONFIGS = [
+    # (precision, pca_dim, rescore_factor)
+    ("float16", None, 1),
+    ("float16", None, 4),
+    ("int8", None, 1),
+    ("int8", None, 4),
+    ("float16", 512, 4),
+    ("int8", 512, 4),
+    ("int8", 256, 4),
+    ("int8", 128, 4),
+]
+
+
+def synthetic_vectors(n_chunks: int, n_queries: int, dim: int, rank: int = 96, clusters: int = 200):
+    rng = np.random.default_rng(0)
+    basis = rng.standard_normal((rank, dim), dtype=np.float32)
+    centroids = rng.standard_normal((clusters, rank), dtype=np.float32)
+    latent = centroids[rng.integers(0, clusters, n_chunks)] + 0.6 * rng.standard_normal((n_chunks, rank), dtype=np.float32)
+    vectors = latent @ basis + 0.3 * rng.standard_normal((n_chunks, dim), dtype=np.float32)
+
+    picks = rng.integers(0, n_chunks, n_queries)
+    queries = vectors[picks] + 2.0 * rng.standard_normal((n_queries, dim), dtype=np.float32)
+    return vectors, queries
+
+
+def job_vectors(csv_path: str, n_queries: int):
+    import pandas as pd
+    from modules.job_matching import JobMatching
+
+    jm = JobMatching(model_name="gemini-2.5-flash-lite", job_list_path=csv_path)
+    df = pd.read_csv(csv_path).fillna("").reset_index(drop=False).rename(columns={"index": "doc_id"})
+    df["doc_id"] = df["doc_id"].astype(str)
+    chunks, _ = jm._chunk_docs([jm.row_to_doc(r) for _, r in df.iterrows()])
+    texts = [c.page_content for c in chunks]
+
+    vectors = np.asarray(jm.embeddings.embed_documents(texts), dtype=np.float32)
+    rng = np.random.default_rng(0)
+    query_texts = [texts[i][:300] for i in rng.integers(0, len(texts), n_queries)]
+    queries = np.asarray(jm.embeddings.embed_documents(query_texts), dtype=np.float32)
+    return vectors, queries
+
+
+def build_store(tmp_dir, vectors, precision="float32", pca_dim=None, rescore_factor=4):
+    texts = [f"chunk-{i}" for i in range(len(vectors))]
+    metadatas = [{"doc_id": str(i), "chunk": 0} for i in range(len(vectors))]
+    store = NumpyVectorStore("eval", LookupEmbeddings(vectors), tmp_dir)
+    if not store.get(include=[])["ids"]:
+        store.add_texts(texts, metadatas, ids=[f"{i}:0" for i in range(len(vectors))])
+        store.flush()
+    return NumpyVectorStore(
+        "eval", store.embeddings, tmp_dir, precision=precision, pca_dim=pca_dim, rescore_factor=rescore_factor
+    )
+
+
+def top_ids(store, queries, k):
+    return [{d.id for d, _ in store.similarity_search_by_vector_with_score(q, k)} for q in queries]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--csv", help="Embed this job CSV instead of synthetic vectors")
+    parser.add_argument("--chunks", type=int, default=20000)
+    parser.add_argument("--dim", type=int, default=1536)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("-k", type=int, default=10)
+    args = parser.parse_args()
+
+    if args.csv:
+        vectors, queries = job_vectors(args.csv, args.queries)
+    else:
+        vectors, queries = synthetic_vectors(args.chunks, args.queries, args.dim)
+
+    tmp_dir = tempfile.mkdtemp(prefix="eval_quantization_")
+    try:
+        exact_store = build_store(tmp_dir, vectors)
+        exact = top_ids(exact_store, queries, args.k)
+        base = exact_store.memory_usage()
+        base_bytes = base["vectors"]
+
+        print(f"{len(vectors)} chunks x {vectors.shape[1]} dims, {len(queries)} queries, k={args.k}")
+        print("vectors = the matrix searched in RAM; total adds chunk ids, texts and metadata")
+        print(
+            f"{'precision':<10}{'pca':>6}{'rescore':>9}{'vectors MB':>12}{'shrink':>8}{'total MB':>10}"
+            f"{f'recall@{args.k}':>11}"
+        )
+        print(
+            f"{'float32':<10}{'-':>6}{'-':>9}{base_bytes / 1e6:>12.1f}{1.0:>7.1f}x"
+            f"{sum(base.values()) / 1e6:>10.1f}{1.0:>11.3f}"
+        )
+
+        for precision, pca_dim, rescore_factor in CONFIGS:
+            store = build_store(tmp_dir, vectors, precision, pca_dim, rescore_factor)
+            found = top_ids(store, queries, args.k)
+            recall = np.mean([len(e & f) / args.k for e, f in zip(exact, found)])
+            usage = store.memory_usage()
+            print(
+                f"{precision:<10}{pca_dim or '-':>6}{rescore_factor if rescore_factor > 1 else 'no':>9}"
+                f"{usage['vectors'] / 1e6:>12.1f}{base_bytes / usage['vectors']:>7.1f}x"
+                f"{sum(usage.values()) / 1e6:>10.1f}{recall:>11.3f}"
+            )
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,207 @@
+"""
+load_test_async.py
+--------------------------------------------------
+Concurrency load test for a running agentkit server.
+
+Opens `--users` concurrent clients that each call an endpoint
+(default: /show_jobs in pipeline mode) `--requests` times, while a
+probe hits /health every 50 ms. If the event loop never blocks, the
+probe latency stays in the low milliseconds no matter how many
+requests are in flight; a blocking handler shows up as probe spikes.
+
+/show_jobs answers from the materialized recommendations after the
+first request for a user, so one fixed user_id only measures the cache.
+A `{user_id}` placeholder in --path is filled from --user-ids, a new id
+per request (cycling once they run out), and latency is reported
+separately for cold (live run, "cached": false) and warm responses.
+
+The ids must be users with a CV summary (a cv_profiles row), or every
+request fails with "No CV summary found". Only users who uploaded a CV
+have one, so --seed-profiles N writes N synthetic profiles with distinct
+summaries into the server's DB (--db, ids from --seed-start on, their
+recommendations cleared), uses them as the ids, and deletes them after
+the run (--keep-profiles keeps them). Without it the default id is 1.
+
+Usage (from agentkit/, with `uvicorn main:app` running):
+    python -m benchmarks.load_test_async --users 200 --requests 3 --seed-profiles 600
+    python -m benchmarks.load_test_async --path "/show_jobs?user_id={user_id}&mode=agent" --seed-profiles 50
+    python -m benchmarks.load_test_async --user-ids 1-5
+    python -m benchmarks.load_test_async --path /health
+"""
+
+import argparse
+import asyncio
+import itertools
+import random
+import sqlite3
+import statistics
+import time
+from collections import defaultdict
+from datetime import datetime
+
+import httpx
+
+
+ROLES = ["data scientist", "backend engineer", "frontend developer", "ML engineer", "data analyst",
+         "DevOps engineer", "product analyst", "research engineer"]
+SKILLS = ["Python", "SQL", "MATLAB", "React", "AWS", "Kubernetes", "PyTorch", "Tableau", "Java",
+          "Excel", "Terraform", "Go", "Spark", "TypeScript", "Power BI", "Scala"]
+
+
+def percentile(values, q):
+    if not values:
+        return float("nan")
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+def parse_ids(spec: str):
+    """"1-200" or "3,7,9" (or a mix: "1-10,42") → list of ids."""
+    ids = []
+    for part in spec.split(","):
+        if "-" in part:
+            lo, hi = part.split("-")
+            ids.extend(range(int(lo), int(hi) + 1))
+        elif part.strip():
+            ids.append(int(part))
+    return ids
+
+
+def seed_profiles(db_path: str, ids):
+    """Write a distinct synthetic CV summary for every id and clear their recommendations."""
+    from modules.recommendations import invalidate_user
+
+    rng = random.Random(0)
+    now = datetime.utcnow().isoformat()
+    rows = []
+    for uid in ids:
+        role, skills = rng.choice(ROLES), rng.sample(SKILLS, 3)
+        summary = (
+            f"{role.capitalize()} with {rng.randint(1, 15)} years of experience in "
+            f"{', '.join(skills)}, looking for a new role (load test profile {uid})."
+        )
+        rows.append((uid, f"Load Test {uid}", summary, now))
+    try:
+        with sqlite3.connect(db_path) as conn:
+            conn.executemany("INSERT OR REPLACE INTO cv_profiles (id, name, summary, created_at) VALUES (?, ?, ?, ?)", rows)
+    except sqlite3.OperationalError as e:
+        raise SystemExit(f"❌ Cannot seed {db_path} ({e}); upload one CV first so cv_profiles exists.")
+    for uid in ids:
+        invalidate_user(uid, db_path)
+    print(f"Seeded {len(ids)} profiles (ids {ids[0]}-{ids[-1]}) into {db_path}")
+
+
+def remove_profiles(db_path: str, ids):
+    from modules.recommendations import invalidate_user
+
+    with sqlite3.connect(db_path) as conn:
+        conn.executemany("DELETE FROM cv_profiles WHERE id = ?", [(uid,) for uid in ids])
+    for uid in ids:
+        invalidate_user(uid, db_path)
+    print(f"Removed the {len(ids)} seeded profiles")
+
+
+def classify(resp) -> str:
+    """"cold" / "warm" from /show_jobs' `cached` flag, "other" for any other endpoint."""
+    try:
+        cached = resp.json().get("cached")
+    except (ValueError, AttributeError):
+        return "other"
+    if cached is None:
+        return "other"
+    return "warm" if cached else "cold"
+
+
+async def user(client, paths, n_requests, latencies, errors):
+    for _ in range(n_requests):
+        path = next(paths)
+        start = time.perf_counter()
+        try:
+            resp = await client.get(path)
+            if resp.status_code >= 400:
+                errors.append(resp.status_code)
+            else:
+                latencies[classify(resp)].append(time.perf_counter() - start)
+        except httpx.HTTPError as e:
+            errors.append(type(e).__name__)
+
+
+async def probe(client, stop, samples):
+    while not stop.is_set():
+        start = time.perf_counter()
+        try:
+            await client.get("/health")
+            samples.append(time.perf_counter() - start)
+        except httpx.HTTPError:
+            pass
+        await asyncio.sleep(0.05)
+
+
+async def main_async(args):
+    if "{user_id}" in args.path:
+        ids = parse_ids(args.user_ids)
+        paths = (args.path.format(user_id=uid) for uid in itertools.cycle(ids))
+    else:
+        ids = None
+        paths = itertools.repeat(args.path)
+
+    limits = httpx.Limits(max_connections=args.users + 1, max_keepalive_connections=args.users + 1)
+    async with httpx.AsyncClient(base_url=args.url, timeout=args.timeout, limits=limits) as client:
+        latencies, errors, probes = defaultdict(list), [], []
+        stop = asyncio.Event()
+        probe_task = asyncio.create_task(probe(client, stop, probes))
+
+        start = time.perf_counter()
+        await asyncio.gather(*(user(client, paths, args.requests, latencies, errors) for _ in range(args.users)))
+        elapsed = time.perf_counter() - start
+
+        stop.set()
+        await probe_task
+
+    total = args.users * args.requests
+    n_ok = sum(len(v) for v in latencies.values())
+    print(f"{args.users} concurrent users x {args.requests} requests → {args.path}")
+    if ids is not None:
+        print(f"user ids: {len(ids)} distinct" + (" (cycled: later requests can hit the cache)" if total > len(ids) else ""))
+    print(f"ok {n_ok}/{total}, errors {len(errors)} in {elapsed:.1f}s ({n_ok / elapsed:.1f} req/s)")
+    for kind in ("cold", "warm", "other"):
+        values = latencies.get(kind)
+        if values:
+            print(
+                f"{kind:<5} {len(values):>5}  p50 {statistics.median(values) * 1000:.0f} ms"
+                f"  p95 {percentile(values, 0.95) * 1000:.0f} ms  max {max(values) * 1000:.0f} ms"
+            )
+    if probes:
+        print(
+            f"/health probe    p50 {statistics.median(probes) * 1000:.1f} ms"
+            f"  p99 {percentile(probes, 0.99) * 1000:.1f} ms  max {max(probes) * 1000:.1f} ms  ({len(probes)} samples)"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument("--path", default="/show_jobs?user_id={user_id}&mode=pipeline")
+    parser.add_argument("--user-ids", default="1", help='ids for {user_id} in --path, e.g. "1-600" or "1,5,9"')
+    parser.add_argument("--seed-profiles", type=int, default=0, help="seed N synthetic profiles and use them as the ids")
+    parser.add_argument("--seed-start", type=int, default=100000, help="first seeded id (kept clear of real users)")
+    parser.add_argument("--keep-profiles", action="store_true", help="keep the seeded profiles after the run")
+    parser.add_argument("--db", default="assistant.db", help="the server's SQLite DB (for --seed-profiles)")
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--requests", type=int, default=3)
+    parser.add_argument("--timeout", type=float, default=120.0)
+    args = parser.parse_args()
+
+    seeded = list(range(args.seed_start, args.seed_start + args.seed_profiles))
+    if seeded:
+        seed_profiles(args.db, seeded)
+        args.user_ids = f"{seeded[0]}-{seeded[-1]}"
+    try:
+        asyncio.run(main_async(args))
+    finally:
+        if seeded and not args.keep_profiles:
+            remove_profiles(args.db, seeded)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""
+sim_llm_scheduler.py
+--------------------------------------------------
+Drive LLMScheduler against a local fake provider that enforces its own
+requests-per-minute limit and answers 429 when it is exceeded.
+
+Two runs with the same load (a burst of background calls, then
+interactive calls arriving while the background queue is still full):
+- direct:    threads call the provider with no scheduling → 429 failures;
+- scheduled: every call goes through LLMScheduler → no failures, and
+             interactive calls overtake the queued background work.
+
+Both sides run on a sped-up fake clock (injected into the scheduler),
+so minutes of rate limiting take seconds. No network or API key is needed.
+
+Usage (from agentkit/):
+    python -m benchmarks.sim_llm_scheduler --provider-rpm 20 --background 40 --interactive 10
+"""
+
+import argparse
+import statistics
+import threading
+import time
+
+from modules.llm_scheduler import BACKGROUND, INTERACTIVE, LLMScheduler, ModelLimits, TokenBucket, llm_priority
+
+MODEL = "fake-model"
+
+
+class FakeRateLimitError(Exception):
+    status_code = 429
+
+
+class FakeProvider:
+    """Enforces `rpm` with its own token bucket; answers 429 when it is empty."""
+
+    def __init__(self, rpm: int, latency: float, clock) -> None:
+        self.bucket = TokenBucket(rpm, clock)
+        self.latency = latency
+        self.rejected = 0
+        self.lock = threading.Lock()
+
+    def generate(self, prompt: str) -> str:
+        with self.lock:
+            if self.bucket.wait_time(1) > 0:
+                self.rejected += 1
+                raise FakeRateLimitError("429 RESOURCE_EXHAUSTED: quota exceeded")
+            self.bucket.take(1)
+        time.sleep(self.latency)
+        return f"answer to {prompt}"
+
+
+def run_load(call, clock, n_background: int, n_interactive: int, interactive_delay: float):
+    latencies = {"background": [], "interactive": []}
+    failures = {"background": 0, "interactive": 0}
+    lock = threading.Lock()
+
+    def worker(kind, priority, i):
+        start = clock()
+        try:
+            with llm_priority(priority):
+                call(f"{kind}-{i}")
+            with lock:
+                latencies[kind].append(clock() - start)
+        except Exception:
+            with lock:
+                failures[kind] += 1
+
+    threads = [threading.Thread(target=worker, args=("background", BACKGROUND, i)) for i in range(n_background)]
+    for t in threads:
+        t.start()
+    time.sleep(interactive_delay)
+    late = [threading.Thread(target=worker, args=("interactive", INTERACTIVE, i)) for i in range(n_interactive)]
+    for t in late:
+        t.start()
+    for t in threads + late:
+        t.join()
+    return latencies, failures
+
+
+def report(name, latencies, failures, extra=""):
+    for kind in ("interactive", "background"):
+        lat = latencies[kind]
+        p50 = f"{statistics.median(lat):.2f}" if lat else "-"
+        worst = f"{max(lat):.2f}" if lat else "-"
+        print(f"{name:<11}{kind:<13}{len(lat):>4} ok{failures[kind]:>6} failed   p50 {p50:>6}s   max {worst:>6}s")
+    if extra:
+        print(f"{'':<11}{extra}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--provider-rpm", type=int, default=20)
+    parser.add_argument("--background", type=int, default=40)
+    parser.add_argument("--interactive", type=int, default=10)
+    parser.add_argument("--speedup", type=float, default=60.0, help="Simulated seconds per real second")
+    args = parser.parse_args()
+
+    # Simulated time: both the provider and the scheduler run on the same fast clock,
+    # so a minute of rate limiting takes 1 s of wall time. Latencies are simulated seconds.
+    clock = lambda: time.monotonic() * args.speedup
+    sleep = lambda seconds: time.sleep(seconds / args.speedup)
+    latency = 2.0 / args.speedup                      # ~2 s per simulated model call
+    delay = 5.0 / args.speedup                        # interactive users arrive 5 s later
+
+    print(f"provider limit {args.provider_rpm} rpm, {args.background} background + {args.interactive} interactive calls")
+
+    provider = FakeProvider(args.provider_rpm, latency, clock)
+    latencies, failures = run_load(provider.generate, clock, args.background, args.interactive, delay)
+    report("direct", latencies, failures, f"provider 429s: {provider.rejected}")
+
+    provider = FakeProvider(args.provider_rpm, latency, clock)
+    scheduler = LLMScheduler(
+        limits={MODEL: ModelLimits(rpm=args.provider_rpm, tpm=1_000_000, max_concurrency=4)},
+        clock=clock,
+        sleep=sleep,
+    )
+    latencies, failures = run_load(
+        lambda p: scheduler.call(provider.generate, MODEL, 100, p), clock, args.background, args.interactive, delay
+    )
+    report("scheduled", latencies, failures, f"provider 429s: {provider.rejected}")
+    print(f"scheduler metrics: {scheduler.metrics()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,16 +1,26 @@
 import os
-import shutil
-from fastapi import FastAPI, UploadFile, Form
+import asyncio
+import hashlib
+import tempfile
+from fastapi import FastAPI, UploadFile, Form, HTTPException
 # from modules.graph import build_graph
 # from modules.utils import get_jobs_for_embedding
-from modules.action_agent import run_langchain_pipeline
+from modules.action_agent import arun_langchain_pipeline
 from modules.google_auth import router as google_router
-from modules.extract_cv_metadata_gemini import extract_metadata
+from modules.extract_cv_metadata_gemini import aextract_metadata
 from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
-from modules.agent import get_job_recommendation
-from modules.job_matching import JobMatching
-import json
+from modules.agent import aget_job_recommendation, get_job_recommendations_batch, jm, warm_up
+from modules.async_runtime import run_blocking, run_db, shutdown as shutdown_executors
+from modules.job_updater import periodic_job_refresh, UPDATE_INTERVAL
+from modules.task_queue import DONE, FAILED, TaskQueue
+from modules.recommendations import (
+    BATCH_MODE,
+    get_cached_recommendations,
+    parse_recommendations,
+    periodic_recommendation_refresh,
+    save_recommendations,
+)
 
 
 app = FastAPI(title="LangGraph CV Assistant")
@@ -28,51 +38,175 @@ app.add_middleware(
 SAVE_DIR = "saved_cvs"
 os.makedirs(SAVE_DIR, exist_ok=True)
 
+# Long-running pipelines (CV extraction, applications) run as persistent background tasks
+tasks = TaskQueue()
+
+
+async def extract_cv_task(file_path: str, user_id: str, content_hash: str):
+    # The profile is stored under the uploading user's id (cv_profiles.id)
+    metadata = await aextract_metadata(file_path, content_hash=content_hash, user_id=int(user_id))
+    return {"user_id": user_id, "name": metadata.get("name", "")}
+
+
+async def apply_job_task(user_id: str, job_id: int, action: str):
+    result = await arun_langchain_pipeline(user_id, job_id)
+    return {
+        "message": result.get("assistant_message", ""),
+        "email_status": result.get("email_status"),
+        "pdf_path": result.get("pdf_path"),
+    }
+
+
+tasks.register("extract_cv", extract_cv_task)
+# Sends an email: an interrupted application is marked failed, never sent twice
+tasks.register("apply_job", apply_job_task, max_attempts=1)
+
+
+@app.on_event("startup")
+async def warm_up_agent():
+    """Compile the agent and model clients once, before the first request."""
+    await asyncio.to_thread(warm_up)
+
+
+@app.on_event("startup")
+async def start_job_refresher():
+    """Refresh jobs in the background and hot-swap the index used by search_jobs."""
+    # agent.jm already loaded the index at import, so wait one interval first.
+    app.state.job_refresher = asyncio.create_task(periodic_job_refresh(jm, initial_delay=UPDATE_INTERVAL))
+
+
+@app.on_event("startup")
+async def start_task_workers():
+    """Re-queue tasks interrupted by the last shutdown and start the worker pool."""
+    await tasks.start()
+
+
+@app.on_event("shutdown")
+async def stop_executors():
+    await tasks.stop()
+    shutdown_executors()
+
+
+async def acompute_recommendations(user_id, mode: str = "agent"):
+    """(parsed recommendations, job keys of the jobs retrieved for them)."""
+    result, job_keys = await aget_job_recommendation(user_id, mode=mode)
+    return parse_recommendations(result), job_keys
+
+
+# Live runs in flight in this worker, per (user, mode): concurrent cache misses share one
+_inflight_recommendations = {}
+
+
+async def single_flight_recommendations(user_id: str, mode: str):
+    """Compute and materialize a user's recommendations once, however many requests miss at the same time."""
+    key = (str(user_id), mode)
+    task = _inflight_recommendations.get(key)
+    if task is None:
+        async def run():
+            try:
+                parsed, job_keys = await acompute_recommendations(user_id, mode=mode)
+                await run_db(save_recommendations, user_id, parsed, mode, job_keys)
+                return parsed
+            finally:
+                _inflight_recommendations.pop(key, None)
+
+        task = asyncio.create_task(run())
+        _inflight_recommendations[key] = task
+    # A client that disconnects must not cancel the run other requests are waiting on
+    return await asyncio.shield(task)
+
+
+UPLOAD_CHUNK = 1024 * 1024
+
+
+async def save_upload(file: UploadFile) -> tuple:
+    """
+    Stream an upload to disk while hashing it, stored as saved_cvs/<sha256><ext>.
+    Identical files map to one path; different users' same-named files never collide.
+    """
+    ext = os.path.splitext(file.filename or "")[1].lower()
+    tmp = await run_blocking(tempfile.NamedTemporaryFile, dir=SAVE_DIR, suffix=".part", delete=False)
+    digest = hashlib.sha256()
+    try:
+        while chunk := await file.read(UPLOAD_CHUNK):
+            digest.update(chunk)
+            await run_blocking(tmp.write, chunk)
+        await run_blocking(tmp.close)
+        content_hash = digest.hexdigest()
+        file_path = os.path.join(SAVE_DIR, f"{content_hash}{ext}")
+        await run_blocking(os.replace, tmp.name, file_path)
+    except BaseException:
+        tmp.close()
+        if os.path.exists(tmp.name):
+            os.remove(tmp.name)
+        raise
+    return content_hash, file_path
+
+
+@app.get("/health")
+async def health():
+    """Event-loop liveness probe (used by benchmarks/load_test_async.py)."""
+    return {"status": "ok"}
+
+
+@app.on_event("startup")
+async def start_recommendation_refresher():
+    """
+    Materialize pipeline-mode recommendations nightly so /show_jobs is a table read.
+    Waits for the nightly window; one worker per night does the (batched) work.
+    """
+    app.state.recommendation_refresher = asyncio.create_task(
+        periodic_recommendation_refresh(get_job_recommendations_batch)
+    )
+
 
 @app.post("/upload_cv")
-async def upload_cv(user_id: str = Form(...), file: UploadFile = None):
+async def upload_cv(user_id: int = Form(...), file: UploadFile = None):
     """
-    Upload CV (PDF/DOCX) → save → extract metadata using Gemini → run job match workflow.
+    Upload CV (PDF/DOCX) → save (content-addressed) → enqueue metadata extraction (Gemini).
+    Returns a task id immediately; poll /tasks/{task_id} for progress.
+    A CV that was already extracted is mapped back to its profile without LLM calls.
     """
-    # --- Step 1: Save file locally ---
-    file_path = os.path.join(SAVE_DIR, file.filename)
-    with open(file_path, "wb") as f:
-        shutil.copyfileobj(file.file, f)
+    # --- Step 1: Stream to saved_cvs/<sha256>.<ext> (off the event loop) ---
+    content_hash, file_path = await save_upload(file)
 
-    # --- Step 2: Extract metadata using Gemini ---
-    _ = extract_metadata(file_path)
+    # --- Step 2: Extract metadata in the background task queue ---
+    task_id, created = await tasks.asubmit(
+        "extract_cv",
+        {"file_path": file_path, "user_id": user_id, "content_hash": content_hash},
+        dedup_key=f"{user_id}:{content_hash}",
+        dedup_window=0,     # a finished upload is re-applied cheaply from cv_uploads
+    )
 
     return JSONResponse(
             content={
-                "message": "CV processed successfully.",
-                "status": "ok"
+                "message": "CV received, processing started." if created else "CV already being processed.",
+                "status": "queued",
+                "task_id": task_id,
             },
-            status_code=200
+            status_code=202
         )
 
 
 
 @app.get("/show_jobs")
-def show_jobs(user_id: str):
-    """Show top matching jobs (mocked fallback)."""
-    import re
+async def show_jobs(user_id: str, mode: str = BATCH_MODE):
+    """
+    Show top matching jobs: materialized row for (user, mode) if fresh, live run on a miss.
+    Defaults to the mode the nightly batch materializes ("pipeline": one structured
+    LLM call); mode="agent" runs the tool-calling agent instead.
+    """
     try:
-        raw_result = get_job_recommendation(user_id)
-        # Try parsing if it's still a string
-        if isinstance(raw_result, str):
-            cleaned = re.sub(r"^```json|```$", "", raw_result.strip(), flags=re.MULTILINE).strip()
-            cleaned = cleaned.replace("```", "").strip()
-
-            if "```json" in raw_result:
-                raw_result = raw_result.split("```json")[-1].split("```")[0]
-            parsed = json.loads(raw_result)
-        else:
-            parsed = raw_result
+        parsed = await run_db(get_cached_recommendations, user_id, mode)
+        cached = parsed is not None
+        if not cached:
+            parsed = await single_flight_recommendations(user_id, mode)
 
         return JSONResponse(
             content={
                 "status": "ok",
                 "user_id": user_id,
+                "cached": cached,
                 "recommendations": parsed,
             },
             status_code=200
@@ -90,11 +224,39 @@ def show_jobs(user_id: str):
 
 
 @app.post("/action")
-def action(user_id: str = Form(...), job_id: int = Form(...), action: str = Form(...)):
-    """User applies/likes/saves a job."""
-    result = run_langchain_pipeline(user_id, job_id)
-    return {
-        "message": result.get("assistant_message", ""),
-        "email_status": result.get("email_status"),
-        "pdf_path": result.get("pdf_path"),
-    }
+async def action(user_id: str = Form(...), job_id: int = Form(...), action: str = Form(...)):
+    """User applies/likes/saves a job. Runs in the background; returns a task id."""
+    task_id, created = await tasks.asubmit("apply_job", {"user_id": user_id, "job_id": job_id, "action": action})
+    return JSONResponse(
+        content={
+            "message": "Application queued." if created else "Application already submitted.",
+            "status": "queued",
+            "task_id": task_id,
+        },
+        status_code=202
+    )
+
+
+@app.get("/tasks/{task_id}")
+async def task_status(task_id: str):
+    """Status of a background task: queued, running, done or failed."""
+    task = await run_db(tasks.get, task_id)
+    if task is None:
+        raise HTTPException(status_code=404, detail="Unknown task id")
+    return task
+
+
+@app.get("/tasks/{task_id}/result")
+async def task_result(task_id: str):
+    """Result of a finished task (202 while it is still queued or running)."""
+    task = await run_db(tasks.get, task_id, True)
+    if task is None:
+        raise HTTPException(status_code=404, detail="Unknown task id")
+    if task["status"] == DONE:
+        return {"status": DONE, "task_id": task_id, "result": task["result"]}
+    if task["status"] == FAILED:
+        return JSONResponse(
+            content={"status": FAILED, "task_id": task_id, "error": task["error"]},
+            status_code=500
+        )
+    return JSONResponse(content={"status": task["status"], "task_id": task_id}, status_code=202)
@@ -7,6 +7,7 @@ and emailing the recruiter with a tailored PDF attachment.
 
 import os
 import json
+import asyncio
 import sqlite3
 import subprocess
 from pathlib import Path
@@ -15,8 +16,9 @@ from typing import Dict, Any
 # ✅ Correct imports for LangChain 1.0+
 from langchain_classic.chains import LLMChain
 from langchain_core.prompts import PromptTemplate
-from langchain_google_genai import ChatGoogleGenerativeAI
 
+from modules.async_runtime import run_blocking, run_db
+from modules.llm_client import get_llm_client
 from modules.utils import (
     save_user_action,
     send_email_to_recruiter,
@@ -32,7 +34,7 @@ if not GEMINI_API_KEY:
     raise EnvironmentError("❌ GEMINI_API_KEY not found in environment.")
 
 MODEL_NAME = "gemini-2.5-flash-lite"
-llm = ChatGoogleGenerativeAI(model=MODEL_NAME, google_api_key=GEMINI_API_KEY)
+# Gemini calls go through modules.llm_client (reused model + response cache)
 
 
 # -----------------------------------------------------------------------------
@@ -140,8 +142,7 @@ def parse_cv_if_needed(user: Dict[str, Any]) -> Dict[str, Any]:
     }
 
 
-def tailor_cv(cv_text: str, job: Dict[str, Any], user_id: str) -> Path:
-    """Generate a LaTeX → PDF CV tailored for a specific job."""
+def _tailor_prompt(cv_text: str, job: Dict[str, Any]) -> str:
     prompt_template = PromptTemplate(
         input_variables=["cv_text", "title", "company"],
         template="""
@@ -159,12 +160,10 @@ def tailor_cv(cv_text: str, job: Dict[str, Any], user_id: str) -> Path:
         """,
     )
     print(prompt_template)
-    chain = prompt_template | llm
-    result = chain.invoke({"cv_text": cv_text, "title": job["title"], "company": job["company"]})
-    print(result)
-    latex_code = result.content if hasattr(result, "content") else str(result)
+    return prompt_template.format(cv_text=cv_text, title=job["title"], company=job["company"])
 
 
+def _compile_cv(latex_code: str, job: Dict[str, Any], user_id: str) -> Path:
     out_dir = Path("generated_cvs")
     out_dir.mkdir(exist_ok=True)
     tex_path = out_dir / f"user_{user_id}_job_{job['id']}.tex"
@@ -184,12 +183,30 @@ def tailor_cv(cv_text: str, job: Dict[str, Any], user_id: str) -> Path:
         raise RuntimeError("⚠️ Failed to compile CV")
 
 
-def generate_cover_letter(user: Dict[str, Any], job: Dict[str, Any]) -> str:
-    """
-    Generate a concise 3–5 line professional cover letter using Gemini,
-    personalized with both user and job information.
-    """
-
+def tailor_cv(cv_text: str, job: Dict[str, Any], user_id: str) -> Path:
+    """Generate a LaTeX → PDF CV tailored for a specific job."""
+    prompt = _tailor_prompt(cv_text, job)
+    latex_code = get_llm_client().chat(prompt, model=MODEL_NAME)
+    print(latex_code)
+    try:
+        return _compile_cv(latex_code, job, user_id)
+    except RuntimeError:
+        # LaTeX that doesn't compile must not be replayed from the cache
+        get_llm_client().evict("chat", prompt, MODEL_NAME)
+        raise
+
+
+async def atailor_cv(cv_text: str, job: Dict[str, Any], user_id: str) -> Path:
+    prompt = _tailor_prompt(cv_text, job)
+    latex_code = await get_llm_client().achat(prompt, model=MODEL_NAME)
+    try:
+        return await run_blocking(_compile_cv, latex_code, job, user_id)   # pdflatex
+    except RuntimeError:
+        await run_db(get_llm_client().evict, "chat", prompt, MODEL_NAME)
+        raise
+
+
+def _cover_letter_prompt(user: Dict[str, Any], job: Dict[str, Any]) -> str:
     prompt = PromptTemplate(
         input_variables=["name", "summary", "experience", "skills", "title", "company", "description"],
         template=(
@@ -206,22 +223,43 @@ def generate_cover_letter(user: Dict[str, Any], job: Dict[str, Any]) -> str:
         ),
     )
 
-    chain = prompt | llm
-    result = chain.invoke({
-        "name": user.get("name", ""),
-        "summary": user.get("summary", ""),
-        "experience": user.get("experience", ""),
-        "skills": user.get("skills", ""),
-        "title": job["title"],
-        "company": job["company"],
-        "description": job.get("description", ""),
-    })
+    return prompt.format(
+        name=user.get("name", ""),
+        summary=user.get("summary", ""),
+        experience=user.get("experience", ""),
+        skills=user.get("skills", ""),
+        title=job["title"],
+        company=job["company"],
+        description=job.get("description", ""),
+    )
 
-    cover_letter = result.content if hasattr(result, "content") else str(result)
+
+def generate_cover_letter(user: Dict[str, Any], job: Dict[str, Any]) -> str:
+    """
+    Generate a concise 3–5 line professional cover letter using Gemini,
+    personalized with both user and job information.
+    """
+    cover_letter = get_llm_client().chat(_cover_letter_prompt(user, job), model=MODEL_NAME)
     print("✅ Generated personalized cover letter")
     return cover_letter.strip()
 
 
+async def agenerate_cover_letter(user: Dict[str, Any], job: Dict[str, Any]) -> str:
+    cover_letter = await get_llm_client().achat(_cover_letter_prompt(user, job), model=MODEL_NAME)
+    return cover_letter.strip()
+
+
+def get_job(job_id: int) -> Dict[str, Any]:
+    # Mock job (until DB job table is ready)
+    return {
+        "id": 5,
+        "title": "Research Engineer",
+        "company": "DeepMind",
+        "description": "Conduct applied ML research and build scalable experiments. Publish and collaborate with leading AI researchers.",
+        "recruiter_email": "kichujyothis@gmail.com",
+    }
+
+
 # -----------------------------------------------------------------------------
 # MAIN PIPELINE
 # -----------------------------------------------------------------------------
@@ -240,13 +278,7 @@ def run_langchain_pipeline(user_id: str, job_id: int):
     user = get_user_from_db(user_id)
 
     # 2️⃣ Mock job (until DB job table is ready)
-    job = {
-        "id": 5,
-        "title": "Research Engineer",
-        "company": "DeepMind",
-        "description": "Conduct applied ML research and build scalable experiments. Publish and collaborate with leading AI researchers.",
-        "recruiter_email": "kichujyothis@gmail.com",
-    }
+    job = get_job(job_id)
 
     # 3️⃣ Prepare CV prompt
     parsed = parse_cv_if_needed(user)
@@ -282,3 +314,34 @@ def run_langchain_pipeline(user_id: str, job_id: int):
 
     print(json.dumps(result, indent=2))
     return result
+
+
+async def arun_langchain_pipeline(user_id: str, job_id: int):
+    """
+    Async run_langchain_pipeline for the FastAPI path: the tailored CV and the
+    cover letter are generated concurrently; DB, pdflatex and SMTP run off the loop.
+    """
+    user = await run_db(get_user_from_db, user_id)
+    job = get_job(job_id)
+    parsed = parse_cv_if_needed(user)
+
+    pdf_path, cover_letter = await asyncio.gather(
+        atailor_cv(parsed["cv_text"], job, user_id),
+        agenerate_cover_letter(user, job),
+    )
+
+    await run_blocking(
+        send_email_to_recruiter,
+        to="jyothisgm@gmail.com",
+        subject=f"Application for {job['title']} at {job['company']}",
+        body=cover_letter,
+        attachment_path=str(pdf_path),
+    )
+
+    return {
+        "assistant_message": f"✅ Application sent to {job['company']} with tailored CV.",
+        "email_status": "sent",
+        "pdf_path": str(pdf_path),
+        "user": {"name": user["name"], "email": user["email"]},
+        "job": {"title": job["title"], "company": job["company"]},
+    }
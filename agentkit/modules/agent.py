@@ -3,31 +3,74 @@ from modules.job_matching import JobMatching  # import your class
 from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain.agents import create_agent
 from langchain.chat_models import init_chat_model
+from pydantic import BaseModel, Field
+from typing import Dict, List, Literal, Optional
+import os
 import sqlite3
+import threading
 
-# Create a persistent instance of JobMatching so it reuses the Chroma DB
-jm = JobMatching(model_name="gemini-2.5-flash-lite", job_list_path="datastore/joblist_clean_for_rag.csv", db_path ="assistant.db")
+from modules.job_cards import card_doc_ids
+from modules.llm_client import scheduled_chat_model
+
+# Create a persistent instance of JobMatching so it reuses the Chroma DB.
+# JOB_RETRIEVAL=hybrid (vector + BM25, rank-fused) is opt-in: it keeps exact
+# skills like "MATLAB" in the results on the synthetic corpus of
+# benchmarks/eval_hybrid_retrieval.py, but has not been measured on real
+# queries yet (run the benchmark with --csv/--qrels before making it default).
+jm = JobMatching(
+    model_name="gemini-2.5-flash-lite",
+    job_list_path="datastore/joblist_clean_for_rag.csv",
+    db_path="assistant.db",
+    retrieval=os.getenv("JOB_RETRIEVAL", "vector"),
+)
 jm.load_joblist()
 
+# Token budget for the job cards search_jobs puts into the agent context
+SEARCH_TOKEN_BUDGET = int(os.getenv("SEARCH_JOBS_TOKEN_BUDGET", "1200"))
+# Jobs retrieved per search. With hybrid retrieval a smaller k may keep the
+# same recall, but only synthetic data shows that so far; lower it via env.
+SEARCH_TOP_K = int(os.getenv("SEARCH_JOBS_TOP_K", "10"))
+
 @tool("search_jobs", return_direct=False)
-def search_jobs(query: str, top_k: int = 10, summarize: bool = False) -> str:
+def search_jobs(
+    query: str,
+    top_k: int = SEARCH_TOP_K,
+    summarize: bool = False,
+    remote_only: bool = False,
+    locations: Optional[List[str]] = None,
+    departments: Optional[List[str]] = None,
+) -> str:
     """
     Search job listings semantically.
 
     Args:
         query: users CV Summary.
         top_k: Number of results to return (default: 10).
-        summarize: If True, summarize each job with the LLM; if False, return raw descriptions.
+        summarize: If True, summarize each job with the LLM; if False, return compact job cards.
+        remote_only: Only return fully remote jobs.
+        locations: Only return jobs in these cities (e.g. ["Amsterdam", "London"]).
+        departments: Only return jobs in these departments (e.g. ["Engineering"]).
 
     Returns:
-        A formatted string of summarized or full job results.
+        Compact job cards (title, company, location, remote, salary,
+        key requirements, email), or LLM summaries of the full descriptions.
     """
-    results = jm.exec_query(query, top_k=top_k)
     if False:
+        results = jm.exec_query(
+            query, top_k=top_k, remote_only=remote_only, locations=locations, departments=departments
+        )
         summaries = jm.refine_result(results)
         return "\n\n".join(summaries)
     else:
-        return "\n\n".join(results)
+        cards = jm.exec_query_cards(
+            query,
+            top_k=top_k,
+            token_budget=SEARCH_TOKEN_BUDGET,
+            remote_only=remote_only,
+            locations=locations,
+            departments=departments,
+        )
+        return "\n\n".join(cards)
     
 @tool("get_user_cv_summary", return_direct=False)
 def get_user_cv_summary(user_id: int) -> str:
@@ -43,15 +86,18 @@ def get_user_cv_summary(user_id: int) -> str:
     return results
 
 
-def get_job_recommendation(user_id:int):
+# ======================================================
+# AGENT REGISTRY
+# ======================================================
+# The compiled agent graph and chat model clients are built once per process
+# (per model / prompt version) and shared by all requests, so the provider's
+# HTTP connection pool is reused instead of rebuilt on every /show_jobs call.
 
-    #openai:gpt-5-nano
-    #llm=init_chat_model("gemini-2.5-flash-lite", temperature=0.3)
-    # llm = ChatGoogleGenerativeAI(model="gemini-2.5-flash-lite", temperature=0)
+AGENT_MODEL = "gemini-2.5-flash-lite"
+PROMPT_VERSION = "v1"
 
-    tools = [search_jobs, get_user_cv_summary]
-
-    system_prompt = """
+SYSTEM_PROMPTS = {
+    "v1": """
     You are an intelligent Job Search Agent.
 
     The user will provide a user id. 
@@ -73,15 +119,129 @@ def get_job_recommendation(user_id:int):
 
     Your response must be a **valid JSON list** of four job objects.
     Focus on clarity, concise reasoning, and accurate matching.
-    """
-    print(system_prompt)
+    """,
+}
+
+_chat_models = {}
+_agents = {}
+_registry_lock = threading.RLock()
+
+
+def get_chat_model(model: str = AGENT_MODEL, temperature: Optional[float] = None):
+    """Shared ChatGoogleGenerativeAI client per (model, temperature)."""
+    key = (model, temperature)
+    with _registry_lock:
+        if key not in _chat_models:
+            kwargs = {} if temperature is None else {"temperature": temperature}
+            # Every agent/pipeline step holds a slot of the shared scheduler while it runs
+            _chat_models[key] = scheduled_chat_model(model, **kwargs)
+        return _chat_models[key]
 
-    agent = create_agent(
-        model="google_genai:gemini-2.5-flash-lite",
+
+def build_agent(model: str = AGENT_MODEL, prompt_version: str = PROMPT_VERSION):
+    """Compile a fresh tool-calling agent (what every request used to do)."""
+    return create_agent(
+        model=get_chat_model(model),
         #model="openai:gpt-5-nano",
-        system_prompt=system_prompt,
-        tools=tools,
+        system_prompt=SYSTEM_PROMPTS[prompt_version],
+        tools=[search_jobs, get_user_cv_summary],
+    )
+
+
+def get_agent(model: str = AGENT_MODEL, prompt_version: str = PROMPT_VERSION):
+    """Compiled agent for (model, prompt version), built on first use."""
+    key = (model, prompt_version)
+    with _registry_lock:
+        if key not in _agents:
+            _agents[key] = build_agent(model, prompt_version)
+            print(f"🤖 Agent ready: {model} (prompt {prompt_version})")
+        return _agents[key]
+
+
+def warm_up():
+    """Build the agent and pipeline model up front (FastAPI startup hook)."""
+    get_agent()
+    get_chat_model(AGENT_MODEL, temperature=0)
+
+
+# ======================================================
+# PIPELINE MODE
+# ======================================================
+# Fixed retrieve-and-rank path: summary → exec_query → ONE structured LLM call,
+# instead of letting the agent decide on tool calls (≥3 sequential round trips).
+
+class JobRecommendation(BaseModel):
+    Company: str
+    Salary: str
+    JobTitle: str
+    Remote: Literal["yes", "not"]
+    Responsibility: str = Field(description="At most 200 words")
+    MatchingScore: int = Field(alias="Matching Score", ge=0, le=100)
+    Strength: str = Field(description="Why the candidate is a good fit")
+    Weakness: str = Field(description="Why it might not be a perfect fit")
+    Email: str
+
+    model_config = {"populate_by_name": True}
+
+
+class JobRecommendations(BaseModel):
+    jobs: List[JobRecommendation] = Field(description="Exactly the top 4 most relevant jobs")
+
+
+PIPELINE_PROMPT = """
+You are an intelligent Job Search assistant.
+
+Below are a candidate's CV summary and job listings retrieved for it.
+Carefully analyze the listings and return the **top 4 most relevant jobs**,
+ranked best first, with a matching score (0–100), the candidate's strength
+and weakness for each, and the responsibility in at most 200 words
+(based on the listed requirements).
+Use only information present in the listings.
+
+CV SUMMARY:
+{summary}
+
+JOB LISTINGS:
+{jobs}
+"""
+
+
+def _searched_job_keys(messages) -> List[str]:
+    """doc_ids (job keys) of the cards search_jobs returned during an agent run."""
+    return card_doc_ids(m.content for m in messages if m.type == "tool" and isinstance(m.content, str))
+
+
+def get_job_recommendation_pipeline(user_id: int, top_k: int = SEARCH_TOP_K, callbacks=None):
+    summary = jm.get_user_info(user_id)
+    if not summary:
+        raise ValueError(f"No CV summary found for user {user_id}")
+
+    cards = jm.exec_query_cards(summary, top_k=top_k, token_budget=SEARCH_TOKEN_BUDGET)
+
+    llm = get_chat_model(AGENT_MODEL, temperature=0)
+    ranked = llm.with_structured_output(JobRecommendations).invoke(
+        PIPELINE_PROMPT.format(summary=summary, jobs="\n\n".join(cards)),
+        config={"callbacks": callbacks or []},
     )
+    return [job.model_dump(by_alias=True) for job in ranked.jobs[:4]], card_doc_ids(cards)
+
+
+def get_job_recommendation(user_id: int, mode: str = "agent", callbacks=None):
+    """
+    Recommend the top 4 jobs for a user.
+
+    mode="agent"    → tool-calling agent (model decides which tools to call)
+    mode="pipeline" → deterministic retrieval + one structured-output call
+
+    Returns (result, job_keys): job_keys are the doc_ids of every job that was
+    retrieved for the answer, which materialized recommendations are invalidated on.
+    """
+    if mode == "pipeline":
+        return get_job_recommendation_pipeline(user_id, callbacks=callbacks)
+    if mode != "agent":
+        raise ValueError(f"Unknown recommendation mode: {mode}")
+
+    agent = get_agent()
 
     #query="Amalia Stuger is a highly accomplished and results-driven professional with dual Master's degrees in Artificial Intelligence and Business IT & Management, following a strong BSc in AI with Honours. Equipped with expertise in Python, MATLAB, and SQL, Amalia brings practical experience in developing digital and technical skills, having led robotics and programming workshops for youth. Her role as a Teaching Assistant further highlights her ability to guide students in complex AI concepts, coding, and robotics. Additionally, her entrepreneurial background as a Salon Owner demonstrates robust leadership in business operations, marketing, and client relations, showcasing a unique blend of technical proficiency, problem-solving, and strategic thinking"
 
@@ -93,9 +253,9 @@ def get_job_recommendation(user_id:int):
 
 
     messages = [{"role": "user", "content": f"user_id:{user_id}"}]
-    resp = agent.invoke({"messages": messages})
+    resp = agent.invoke({"messages": messages}, config={"callbacks": callbacks or []})
     print(resp["messages"][-1].content)
-    return resp["messages"][-1].content
+    return resp["messages"][-1].content, _searched_job_keys(resp["messages"])
 
     # final_message = None
     # for event in agent.stream(
@@ -109,4 +269,61 @@ def get_job_recommendation(user_id:int):
     # # print or return the final result
     # if final_message:
     #     print(final_message.content)
-    #     return final_message.content
\ No newline at end of file
+    #     return final_message.content
+
+def get_job_recommendations_batch(user_ids: List[int], top_k: int = SEARCH_TOP_K, max_concurrency: int = 4) -> Dict[int, list]:
+    """
+    Pipeline mode for many users (nightly materialization): one batched
+    retrieval for all of them (jm.exec_query_by_users), then the ranking
+    calls, max_concurrency at a time. Users without a CV summary are left out.
+
+    Returns {user_id: (recommendations, job_keys of the retrieved cards)}.
+    """
+    summaries = jm.get_user_infos(user_ids)
+    cards = jm.exec_query_by_users(list(summaries), top_k=top_k, token_budget=SEARCH_TOKEN_BUDGET)
+    users = [uid for uid in summaries if uid in cards]
+    if not users:
+        return {}
+
+    llm = get_chat_model(AGENT_MODEL, temperature=0).with_structured_output(JobRecommendations)
+    ranked = llm.batch(
+        [PIPELINE_PROMPT.format(summary=summaries[uid], jobs="\n\n".join(cards[uid])) for uid in users],
+        config={"max_concurrency": max_concurrency},
+        return_exceptions=True,
+    )
+    results = {}
+    for uid, result in zip(users, ranked):
+        if isinstance(result, Exception):
+            print(f"[Recommendations] ⚠️ Ranking failed for user {uid}: {result}")
+            continue
+        results[uid] = ([job.model_dump(by_alias=True) for job in result.jobs[:4]], card_doc_ids(cards[uid]))
+    return results
+
+# ======================================================
+# ASYNC PATH (FastAPI handlers)
+# ======================================================
+async def aget_job_recommendation_pipeline(user_id: int, top_k: int = SEARCH_TOP_K, callbacks=None):
+    summary = await jm.aget_user_info(user_id)
+    if not summary:
+        raise ValueError(f"No CV summary found for user {user_id}")
+
+    cards = await jm.aexec_query_cards(summary, top_k=top_k, token_budget=SEARCH_TOKEN_BUDGET)
+
+    llm = get_chat_model(AGENT_MODEL, temperature=0)
+    ranked = await llm.with_structured_output(JobRecommendations).ainvoke(
+        PIPELINE_PROMPT.format(summary=summary, jobs="\n\n".join(cards)),
+        config={"callbacks": callbacks or []},
+    )
+    return [job.model_dump(by_alias=True) for job in ranked.jobs[:4]], card_doc_ids(cards)
+
+
+async def aget_job_recommendation(user_id: int, mode: str = "agent", callbacks=None):
+    """Async get_job_recommendation: model calls are awaited, sync tools run in the executor."""
+    if mode == "pipeline":
+        return await aget_job_recommendation_pipeline(user_id, callbacks=callbacks)
+    if mode != "agent":
+        raise ValueError(f"Unknown recommendation mode: {mode}")
+
+    messages = [{"role": "user", "content": f"user_id:{user_id}"}]
+    resp = await get_agent().ainvoke({"messages": messages}, config={"callbacks": callbacks or []})
+    return resp["messages"][-1].content, _searched_job_keys(resp["messages"])
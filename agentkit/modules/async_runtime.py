@@ -0,0 +1,57 @@
+"""
+async_runtime.py
+--------------------------------------------------
+Executors that keep blocking work off the FastAPI event loop.
+
+- run_db():       SQLite access on a small dedicated thread pool
+                  (sqlite3 is blocking; connections stay per call);
+- run_cpu():      CPU-heavy work (PDF/DOCX parsing) in a process pool,
+                  so it neither blocks the loop nor holds the GIL;
+- run_blocking(): other blocking I/O (pdflatex, SMTP, file writes)
+                  on the default thread pool.
+
+Configuration (env): DB_THREADS, CPU_WORKERS.
+"""
+
+import asyncio
+import functools
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Callable, Optional
+
+DB_THREADS = int(os.getenv("DB_THREADS", "8"))
+CPU_WORKERS = int(os.getenv("CPU_WORKERS", str(os.cpu_count() or 2)))
+
+_db_executor = ThreadPoolExecutor(max_workers=DB_THREADS, thread_name_prefix="db")
+_cpu_executor: Optional[ProcessPoolExecutor] = None
+_cpu_lock = threading.Lock()
+
+
+def _get_cpu_executor() -> ProcessPoolExecutor:
+    global _cpu_executor
+    with _cpu_lock:
+        if _cpu_executor is None:
+            _cpu_executor = ProcessPoolExecutor(max_workers=CPU_WORKERS)
+        return _cpu_executor
+
+
+async def run_db(fn: Callable, *args, **kwargs):
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_db_executor, functools.partial(fn, *args, **kwargs))
+
+
+async def run_cpu(fn: Callable, *args, **kwargs):
+    """fn and its arguments must be picklable (module-level function)."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_get_cpu_executor(), functools.partial(fn, *args, **kwargs))
+
+
+async def run_blocking(fn: Callable, *args, **kwargs):
+    return await asyncio.to_thread(fn, *args, **kwargs)
+
+
+def shutdown():
+    _db_executor.shutdown(wait=False)
+    if _cpu_executor is not None:
+        _cpu_executor.shutdown(wait=False)
@@ -0,0 +1,175 @@
+"""
+bm25.py
+--------------------------------------------------
+In-memory inverted index with Okapi BM25 scoring.
+
+- documents are tokenized once, when they are added;
+- postings map term → compact arrays of (doc number, term frequency),
+  with document lengths kept alongside, so a query only visits the
+  postings of its own terms instead of every document in the corpus;
+  scoring over a posting list is vectorized with numpy;
+- add / remove / upsert keep the index current as jobs change, without
+  a rebuild. Removal marks the document deleted (it stops being
+  returned immediately); postings are compacted once deleted documents
+  exceed `compact_ratio` of the index. Until then they still count in
+  document frequencies, as in Lucene.
+
+Scoring is Lucene-style BM25: idf = ln(1 + (N - df + 0.5) / (df + 0.5)).
+"""
+
+import math
+import re
+import threading
+from array import array
+from collections import Counter
+from typing import Collection, Dict, Hashable, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+_TOKEN = re.compile(r"[a-z0-9][a-z0-9+#]*")
+
+STOPWORDS = frozenset(
+    """
+    a an and are as at be by for from has have in is it its of on or our that the
+    their this to was we were will with you your
+    """.split()
+)
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased word tokens; keeps "c++" / "c#", drops common English stopwords."""
+    return [t for t in _TOKEN.findall(text.lower()) if t not in STOPWORDS]
+
+
+class BM25Index:
+    def __init__(self, k1: float = 1.5, b: float = 0.75, compact_ratio: float = 0.2) -> None:
+        self.k1 = k1
+        self.b = b
+        self.compact_ratio = compact_ratio
+        # term → (doc numbers, term frequencies)
+        self.postings: Dict[str, Tuple[array, array]] = {}
+        self._ids: List[Hashable] = []          # doc number → doc_id
+        self._numbers: Dict[Hashable, int] = {}  # doc_id → doc number (live docs only)
+        self._lengths = array("i")
+        self._alive = bytearray()
+        self._total_len = 0
+        self._deleted = 0
+        self._lock = threading.RLock()
+
+    def __len__(self) -> int:
+        return len(self._numbers)
+
+    def __contains__(self, doc_id: Hashable) -> bool:
+        return doc_id in self._numbers
+
+    # -------------------------------------------------------------------------
+    # Updates
+    # -------------------------------------------------------------------------
+    def add(self, doc_id: Hashable, text: str) -> None:
+        """Index a document; replaces it if doc_id is already indexed."""
+        tokens = tokenize(text)
+        counts = Counter(tokens)
+        with self._lock:
+            if doc_id in self._numbers:
+                self._delete(doc_id)
+            number = len(self._ids)
+            self._ids.append(doc_id)
+            self._numbers[doc_id] = number
+            self._lengths.append(len(tokens))
+            self._alive.append(1)
+            self._total_len += len(tokens)
+            for term, tf in counts.items():
+                postings = self.postings.get(term)
+                if postings is None:
+                    postings = self.postings[term] = (array("i"), array("i"))
+                postings[0].append(number)
+                postings[1].append(tf)
+
+    def add_many(self, docs: Iterable[Tuple[Hashable, str]]) -> None:
+        for doc_id, text in docs:
+            self.add(doc_id, text)
+
+    def remove(self, doc_id: Hashable) -> bool:
+        with self._lock:
+            if doc_id not in self._numbers:
+                return False
+            self._delete(doc_id)
+            if self._deleted > self.compact_ratio * len(self._ids):
+                self.compact()
+            return True
+
+    def _delete(self, doc_id: Hashable) -> None:
+        number = self._numbers.pop(doc_id)
+        self._alive[number] = 0
+        self._total_len -= self._lengths[number]
+        self._deleted += 1
+
+    def compact(self) -> None:
+        """Drop deleted documents from the postings and renumber the live ones."""
+        with self._lock:
+            alive = np.frombuffer(bytes(self._alive), dtype=np.uint8).astype(bool)
+            renumber = np.cumsum(alive, dtype=np.int64) - 1
+            postings = {}
+            for term, (docs, tfs) in self.postings.items():
+                docs_np = np.frombuffer(docs, dtype=np.int32)
+                keep = alive[docs_np]
+                if keep.any():
+                    postings[term] = (
+                        array("i", renumber[docs_np[keep]].astype(np.int32).tobytes()),
+                        array("i", np.frombuffer(tfs, dtype=np.int32)[keep].tobytes()),
+                    )
+            self.postings = postings
+            self._ids = [doc_id for doc_id, ok in zip(self._ids, alive) if ok]
+            self._numbers = {doc_id: n for n, doc_id in enumerate(self._ids)}
+            self._lengths = array("i", np.frombuffer(self._lengths, dtype=np.int32)[alive].tobytes())
+            self._alive = bytearray(b"\x01" * len(self._ids))
+            self._deleted = 0
+
+    # -------------------------------------------------------------------------
+    # Query
+    # -------------------------------------------------------------------------
+    def search(
+        self, query: str, top_k: int = 10, allowed: Optional[Collection[Hashable]] = None
+    ) -> List[Tuple[Hashable, float]]:
+        """
+        Top-k (doc_id, score), best first. Documents sharing no query term are
+        not returned; with `allowed`, only those doc_ids are candidates.
+        """
+        terms = Counter(tokenize(query))
+        with self._lock:
+            n_live = len(self._numbers)
+            if not n_live or top_k <= 0:
+                return []
+            n_docs = len(self._ids)
+            avgdl = self._total_len / n_live or 1.0
+            k1 = self.k1
+            norm_const = k1 * (1 - self.b)
+            norm_len = k1 * self.b / avgdl
+            lengths = np.frombuffer(self._lengths, dtype=np.int32)
+
+            scores = None
+            for term, qtf in terms.items():
+                postings = self.postings.get(term)
+                if postings is None:
+                    continue
+                docs = np.frombuffer(postings[0], dtype=np.int32)
+                tfs = np.frombuffer(postings[1], dtype=np.int32).astype(np.float32)
+                df = len(docs)
+                weight = qtf * math.log(1 + (n_docs - self._deleted - df + 0.5) / (df + 0.5)) * (k1 + 1)
+                if scores is None:
+                    scores = np.zeros(n_docs, dtype=np.float32)
+                # A document appears at most once per posting list, so fancy-index += is safe
+                scores[docs] += weight * tfs / (tfs + norm_const + norm_len * lengths[docs])
+            if scores is None:
+                return []
+
+            if self._deleted:
+                scores[np.frombuffer(self._alive, dtype=np.uint8) == 0] = 0
+            if allowed is not None:
+                keep = np.zeros(n_docs, dtype=bool)
+                keep[[self._numbers[d] for d in allowed if d in self._numbers]] = True
+                scores[~keep] = 0
+            k = min(top_k, n_docs)
+            top = np.argpartition(-scores, k - 1)[:k] if k < n_docs else np.arange(n_docs)
+            top = top[np.argsort(-scores[top], kind="stable")]
+            return [(self._ids[n], float(scores[n])) for n in top if scores[n] > 0]
@@ -0,0 +1,108 @@
+"""
+contact_info.py
+--------------------------------------------------
+Single-pass contact extraction from CV text.
+
+One precompiled alternation (email | LinkedIn | GitHub | website | phone)
+is scanned over the text once, token by token, instead of five
+independent findall passes. Matches are consumed left to right, so an
+email's domain or a LinkedIn URL is not reported again as a website,
+and digits inside a URL or an ID are not reported as a phone number.
+
+Results are normalized and deduplicated (first occurrence order):
+- emails:   lowercased, trailing punctuation stripped, domain must have a dot;
+- phones:   "+" and digits only, 8–15 digits, year ranges ("2019 - 2021") dropped;
+- linkedin / github / websites: "https://host/path", host lowercased,
+  "www." and trailing "/" or punctuation stripped;
+- websites: only hosts with a common TLD (so "Node.js" or "e.g." are not URLs)
+  unless written with a scheme or "www.".
+
+The individual patterns are the ones the previous five-scan
+implementation used, so on emails, LinkedIn and GitHub the output
+equals the normalized old output (see benchmarks/bench_contact_info.py).
+"""
+
+import re
+from typing import Dict, List, Optional
+
+EMAIL = r"[\w\.-]+@[\w\.-]+"
+LINKEDIN = r"(?:https?://)?(?:www\.)?linkedin\.com/[A-Za-z0-9_/.\-]+"
+GITHUB = r"(?:https?://)?(?:www\.)?github\.com/[A-Za-z0-9_/.\-]+"
+WEBSITE = r"(?:https?://)?(?:www\.)?[A-Za-z0-9\-]+\.[a-z]{2,}(?:/[A-Za-z0-9_\-./]*)?"
+PHONE = r"\+?\d[\d\s\-]{7,}\d"
+
+# Matches may only start at a token boundary (not after a word char, "." or "-"):
+# inside a word the scan fails on one look-behind instead of trying every alternative.
+CONTACT_PATTERN = re.compile(
+    r"(?<![\w.-])"
+    f"(?:(?P<emails>{EMAIL})|(?P<linkedin>{LINKEDIN})|(?P<github>{GITHUB})|(?P<websites>{WEBSITE})|(?P<phones>{PHONE}))"
+)
+FIELDS = ("emails", "phones", "linkedin", "github", "websites")
+
+COMMON_TLDS = frozenset(
+    """
+    com org net edu gov io ai dev app co me info biz tech cloud site online xyz
+    uk de nl fr es it be ch at se no dk fi pl pt ie eu us ca au nz in sg jp cn
+    br mx za ru tr gr cz hu ro il ae hk kr tw
+    """.split()
+)
+
+_EXPLICIT = re.compile(r"(?:https?://|www\.)", re.IGNORECASE)
+_SCHEME = re.compile(r"^(?:https?://)?(?:www\.)?", re.IGNORECASE)
+_YEAR_RANGE = re.compile(r"^(?:19|20)\d{2}\s*-\s*(?:19|20)\d{2}$")
+_NON_PHONE = re.compile(r"[^\d+]")
+_TRAILING = ".,;:-_/"
+
+
+# ======================================================
+# NORMALIZERS
+# ======================================================
+def normalize_email(raw: str) -> Optional[str]:
+    email = raw.strip(_TRAILING).lower()
+    local, _, domain = email.partition("@")
+    if not local or "." not in domain or domain.startswith("."):
+        return None
+    return email
+
+
+def normalize_phone(raw: str) -> Optional[str]:
+    raw = raw.strip()
+    if _YEAR_RANGE.match(raw):
+        return None
+    phone = ("+" if raw.startswith("+") else "") + _NON_PHONE.sub("", raw).lstrip("+")
+    digits = len(phone) - phone.startswith("+")
+    return phone if 8 <= digits <= 15 else None
+
+
+def normalize_url(raw: str, require_tld: bool = False) -> Optional[str]:
+    explicit = bool(_EXPLICIT.match(raw))
+    rest = _SCHEME.sub("", raw).rstrip(_TRAILING)
+    host, _, path = rest.partition("/")
+    host = host.lower()
+    if "." not in host:
+        return None
+    if require_tld and not explicit and host.rsplit(".", 1)[1] not in COMMON_TLDS:
+        return None
+    path = path.rstrip(_TRAILING)
+    return f"https://{host}/{path}" if path else f"https://{host}"
+
+
+def _normalize(field: str, raw: str) -> Optional[str]:
+    if field == "emails":
+        return normalize_email(raw)
+    if field == "phones":
+        return normalize_phone(raw)
+    return normalize_url(raw, require_tld=field == "websites")
+
+
+# ======================================================
+# EXTRACTION
+# ======================================================
+def extract_contact_info(text: str) -> Dict[str, List[str]]:
+    found: Dict[str, dict] = {field: {} for field in FIELDS}
+    for match in CONTACT_PATTERN.finditer(text):
+        field = match.lastgroup
+        value = _normalize(field, match.group())
+        if value:
+            found[field].setdefault(value, None)     # dict keeps first-seen order
+    return {field: list(values) for field, values in found.items()}
@@ -0,0 +1,186 @@
+"""
+cv_text.py
+--------------------------------------------------
+CV text extraction (PDF / DOCX) for single uploads and bulk imports.
+
+- extract_text():  one file, in the calling process (upload path);
+- extract_texts(): batch entry point for bulk imports. Files fan out
+  across a process pool; PDFs with more than `split_pages` pages are
+  split into page ranges that are extracted in parallel and reassembled
+  in order. Results are yielded as each file completes, so callers can
+  stream thousands of CVs without holding them all in memory.
+
+Every PDF page runs under a timeout (SIGALRM in the worker), so a
+pathological page is skipped and reported instead of stalling the batch.
+Text is normalized per page range (whitespace collapsed), which gives
+exactly the same text as normalizing the whole document.
+
+Configuration (env): CV_EXTRACT_WORKERS, CV_PAGE_TIMEOUT, CV_SPLIT_PAGES.
+"""
+
+import os
+import re
+import signal
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+import docx
+from PyPDF2 import PdfReader
+
+CV_EXTRACT_WORKERS = int(os.getenv("CV_EXTRACT_WORKERS", str(os.cpu_count() or 2)))
+CV_PAGE_TIMEOUT = float(os.getenv("CV_PAGE_TIMEOUT", "10"))    # seconds per PDF page
+CV_SPLIT_PAGES = int(os.getenv("CV_SPLIT_PAGES", "16"))        # split PDFs longer than this
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+class PageTimeout(Exception):
+    pass
+
+
+def normalize_text(text: str) -> str:
+    return _WHITESPACE.sub(" ", text.strip())
+
+
+# ======================================================
+# SINGLE FILE
+# ======================================================
+def extract_text(file_path: str) -> str:
+    _, ext = os.path.splitext(file_path)
+    text = ""
+    if ext.lower() == ".pdf":
+        reader = PdfReader(file_path)
+        for page in reader.pages:
+            t = page.extract_text()
+            if t:
+                text += t + "\n"
+    elif ext.lower() == ".docx":
+        doc = docx.Document(file_path)
+        text = "\n".join(p.text for p in doc.paragraphs)
+    else:
+        raise ValueError(f"Unsupported file type: {ext}")
+    return normalize_text(text)
+
+
+# ======================================================
+# WORKER FUNCTIONS (module level → picklable)
+# ======================================================
+def _on_alarm(signum, frame):
+    raise PageTimeout()
+
+
+def _page_text(page, timeout: float) -> str:
+    if not timeout or not hasattr(signal, "setitimer"):
+        return page.extract_text() or ""
+    previous = signal.signal(signal.SIGALRM, _on_alarm)
+    signal.setitimer(signal.ITIMER_REAL, timeout)
+    try:
+        return page.extract_text() or ""
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous)
+
+
+def _pdf_range(reader: PdfReader, start: int, stop: int, timeout: float) -> Tuple[str, List[int]]:
+    parts, skipped = [], []
+    for i in range(start, stop):
+        try:
+            parts.append(_page_text(reader.pages[i], timeout))
+        except PageTimeout:
+            skipped.append(i)
+    return normalize_text("\n".join(parts)), skipped
+
+
+def _extract_range(file_path: str, start: int, stop: int, timeout: float) -> Tuple[str, List[int]]:
+    return _pdf_range(PdfReader(file_path), start, stop, timeout)
+
+
+def _extract_file(file_path: str, timeout: float, split_pages: int) -> dict:
+    """
+    Whole-file extraction in a worker. Returns {"text", "pages", "skipped_pages"},
+    or {"pages", "split": True} (no text) when the PDF should be fanned out by page range.
+    """
+    ext = os.path.splitext(file_path)[1].lower()
+    if ext == ".docx":
+        doc = docx.Document(file_path)
+        return {"text": normalize_text("\n".join(p.text for p in doc.paragraphs)), "pages": None, "skipped_pages": []}
+    if ext != ".pdf":
+        raise ValueError(f"Unsupported file type: {ext}")
+
+    reader = PdfReader(file_path)
+    n_pages = len(reader.pages)
+    if split_pages and n_pages > split_pages:
+        return {"pages": n_pages, "split": True}
+    text, skipped = _pdf_range(reader, 0, n_pages, timeout)
+    return {"text": text, "pages": n_pages, "skipped_pages": skipped}
+
+
+# ======================================================
+# BATCH ENTRY POINT
+# ======================================================
+def extract_texts(
+    paths: Iterable[str],
+    workers: int = CV_EXTRACT_WORKERS,
+    page_timeout: float = CV_PAGE_TIMEOUT,
+    split_pages: int = CV_SPLIT_PAGES,
+    executor: Optional[ProcessPoolExecutor] = None,
+) -> Iterator[dict]:
+    """
+    Extract many CVs in parallel. Yields one dict per file, in completion order:
+    {"path", "text", "pages", "skipped_pages", "error"} (text is None on error).
+    """
+    own_executor = executor is None
+    pool = executor or ProcessPoolExecutor(max_workers=workers)
+    pending: Dict = {}                 # future → (path, start, stop) ; start is None for whole-file tasks
+    ranges: Dict[str, dict] = {}       # path → reassembly state for split PDFs
+
+    try:
+        for path in paths:
+            pending[pool.submit(_extract_file, path, page_timeout, split_pages)] = (path, None, None)
+
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                path, start, stop = pending.pop(future)
+                error = future.exception()
+
+                if start is None:
+                    if error is not None:
+                        yield {"path": path, "text": None, "pages": None, "skipped_pages": [], "error": str(error)}
+                        continue
+                    result = future.result()
+                    if not result.get("split"):
+                        yield {"path": path, "error": None, **result}
+                        continue
+                    # Large PDF: fan out page ranges across the pool
+                    n_pages = result["pages"]
+                    bounds = [(s, min(s + split_pages, n_pages)) for s in range(0, n_pages, split_pages)]
+                    ranges[path] = {"pages": n_pages, "parts": {}, "left": len(bounds), "error": None}
+                    for s, e in bounds:
+                        pending[pool.submit(_extract_range, path, s, e, page_timeout)] = (path, s, e)
+                    continue
+
+                state = ranges[path]
+                state["left"] -= 1
+                if error is not None:
+                    state["error"] = state["error"] or str(error)
+                else:
+                    state["parts"][start] = future.result()
+                if state["left"] == 0:
+                    del ranges[path]
+                    yield _assemble(path, state)
+    finally:
+        if own_executor:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _assemble(path: str, state: dict) -> dict:
+    if state["error"]:
+        return {"path": path, "text": None, "pages": state["pages"], "skipped_pages": [], "error": state["error"]}
+    texts, skipped = [], []
+    for start in sorted(state["parts"]):
+        text, part_skipped = state["parts"][start]
+        if text:
+            texts.append(text)
+        skipped.extend(part_skipped)
+    return {"path": path, "text": " ".join(texts), "pages": state["pages"], "skipped_pages": skipped, "error": None}
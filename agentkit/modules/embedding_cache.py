@@ -0,0 +1,164 @@
+"""
+embedding_cache.py
+--------------------------------------------------
+Disk-backed embedding cache shared by indexing and querying.
+
+CachedEmbeddings wraps any LangChain Embeddings (OpenAIEmbeddings in
+JobMatching) and stores every vector in SQLite keyed by
+sha256(model name + text). Job chunks that were already embedded
+before a crash or rebuild, and CV summaries queried on every
+/show_jobs call, are served from disk instead of the API.
+The table is bounded to `max_entries` rows with LRU eviction.
+"""
+
+import hashlib
+import os
+import sqlite3
+import time
+from array import array
+from typing import List
+
+from langchain_core.embeddings import Embeddings
+
+from modules.async_runtime import run_db
+
+
+class CachedEmbeddings(Embeddings):
+    def __init__(
+        self,
+        underlying: Embeddings,
+        model_name: str,
+        cache_path: str = "embedding_cache.db",
+        max_entries: int = 50_000,
+    ) -> None:
+        self.underlying = underlying
+        self.model_name = model_name
+        self.cache_path = cache_path
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+
+        os.makedirs(os.path.dirname(os.path.abspath(cache_path)), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS embedding_cache (
+                    key TEXT PRIMARY KEY,
+                    model TEXT NOT NULL,
+                    vector BLOB NOT NULL,
+                    last_used REAL NOT NULL
+                )
+                """
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_embedding_cache_last_used ON embedding_cache(last_used)")
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.cache_path, timeout=30)
+
+    def _key(self, text: str) -> str:
+        return hashlib.sha256(f"{self.model_name}\0{text}".encode("utf-8")).hexdigest()
+
+    # -------------------------------------------------------------------------
+    # Embeddings interface
+    # -------------------------------------------------------------------------
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        keys = [self._key(t) for t in texts]
+        found = self._lookup(keys)
+
+        missing = [i for i, k in enumerate(keys) if k not in found]
+        self.hits += len(texts) - len(missing)
+        self.misses += len(missing)
+
+        if missing:
+            # Embed each distinct missing text once, even if repeated in the batch.
+            unique = list(dict.fromkeys(keys[i] for i in missing))
+            text_by_key = {keys[i]: texts[i] for i in missing}
+            vectors = self.underlying.embed_documents([text_by_key[k] for k in unique])
+            new = dict(zip(unique, vectors))
+            self._store(new)
+            found.update(new)
+
+        return [list(found[k]) for k in keys]
+
+    def embed_query(self, text: str) -> List[float]:
+        key = self._key(text)
+        found = self._lookup([key])
+        if key in found:
+            self.hits += 1
+            return list(found[key])
+
+        self.misses += 1
+        vector = self.underlying.embed_query(text)
+        self._store({key: vector})
+        return vector
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        keys = [self._key(t) for t in texts]
+        found = await run_db(self._lookup, keys)
+
+        missing = [i for i, k in enumerate(keys) if k not in found]
+        self.hits += len(texts) - len(missing)
+        self.misses += len(missing)
+
+        if missing:
+            unique = list(dict.fromkeys(keys[i] for i in missing))
+            text_by_key = {keys[i]: texts[i] for i in missing}
+            vectors = await self.underlying.aembed_documents([text_by_key[k] for k in unique])
+            new = dict(zip(unique, vectors))
+            await run_db(self._store, new)
+            found.update(new)
+
+        return [list(found[k]) for k in keys]
+
+    async def aembed_query(self, text: str) -> List[float]:
+        key = self._key(text)
+        found = await run_db(self._lookup, [key])
+        if key in found:
+            self.hits += 1
+            return list(found[key])
+
+        self.misses += 1
+        vector = await self.underlying.aembed_query(text)
+        await run_db(self._store, {key: vector})
+        return vector
+
+    # -------------------------------------------------------------------------
+    # Storage
+    # -------------------------------------------------------------------------
+    def _lookup(self, keys: List[str]) -> dict:
+        found = {}
+        now = time.time()
+        BATCH_SIZE = 500
+        with self._connect() as conn:
+            for i in range(0, len(keys), BATCH_SIZE):
+                batch = list(set(keys[i : i + BATCH_SIZE]))
+                placeholders = ",".join("?" * len(batch))
+                cur = conn.execute(
+                    f"SELECT key, vector FROM embedding_cache WHERE key IN ({placeholders})", batch
+                )
+                for key, blob in cur.fetchall():
+                    found[key] = array("f", blob)
+            if found:
+                conn.executemany(
+                    "UPDATE embedding_cache SET last_used = ? WHERE key = ?",
+                    [(now, k) for k in found],
+                )
+        return found
+
+    def _store(self, vectors: dict) -> None:
+        now = time.time()
+        with self._connect() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO embedding_cache (key, model, vector, last_used) VALUES (?, ?, ?, ?)",
+                [(k, self.model_name, array("f", v).tobytes(), now) for k, v in vectors.items()],
+            )
+            (count,) = conn.execute("SELECT COUNT(*) FROM embedding_cache").fetchone()
+            if count > self.max_entries:
+                conn.execute(
+                    """
+                    DELETE FROM embedding_cache WHERE key IN (
+                        SELECT key FROM embedding_cache ORDER BY last_used ASC LIMIT ?
+                    )
+                    """,
+                    (count - self.max_entries,),
+                )
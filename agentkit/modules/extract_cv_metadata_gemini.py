@@ -7,18 +7,32 @@ Outputs:
 1️⃣ profile_<name>.json  → structured metadata
 2️⃣ summary_<name>.txt   → ~100-word professional summary
 3️⃣ Saves metadata & summary into SQLite DB (assistant.db)
+
+Metadata and summary come from ONE schema-constrained Gemini call
+(CVExtraction); if it fails or does not validate, the two-call path
+(enrich_with_gemini → summarize_applicant) is used instead.
+
+Uploads are content-addressed: the `cv_uploads` table maps a file's
+SHA-256 to the extracted metadata and summary, so re-uploading the same
+CV restores its profile without text extraction or Gemini calls.
+
+Each user's profile is the cv_profiles row whose id is their user_id
+(what /show_jobs and the job agent look up).
 """
 
+import hashlib
 import os
-import re
 import json
 import sqlite3
 from datetime import datetime
-from PyPDF2 import PdfReader
-import docx
+from pydantic import BaseModel, Field
+from typing import List
 
-from langchain_google_genai import ChatGoogleGenerativeAI
-from langchain.messages import HumanMessage
+from modules.async_runtime import run_blocking, run_cpu, run_db
+from modules.contact_info import extract_contact_info
+from modules.cv_text import extract_text
+from modules.llm_client import get_llm_client
+from modules.recommendations import invalidate_user
 
 # ======================================================
 # CONFIGURATION
@@ -31,8 +45,7 @@ GEMINI_MODEL = os.getenv("GEMINI_MODEL", "gemini-2.5-flash")
 if not GEMINI_API_KEY:
     raise EnvironmentError("❌ Please set GEMINI_API_KEY in your environment.")
 
-# Initialize model
-model = ChatGoogleGenerativeAI(model=GEMINI_MODEL, google_api_key=GEMINI_API_KEY)
+# Gemini calls go through the shared client (reused model + response cache)
 
 # ======================================================
 # DATABASE SETUP
@@ -61,46 +74,85 @@ def init_db():
         )
         """
     )
+    cursor.execute(
+        """
+        CREATE TABLE IF NOT EXISTS cv_uploads (
+            sha256 TEXT PRIMARY KEY,
+            file_path TEXT NOT NULL,
+            profile_id INTEGER NOT NULL,
+            metadata TEXT NOT NULL,
+            summary TEXT NOT NULL,
+            created_at TEXT
+        )
+        """
+    )
     conn.commit()
     conn.close()
 
+# ======================================================
+# CONTENT-ADDRESSED UPLOADS
+# ======================================================
+def file_sha256(file_path: str, chunk_size: int = 1024 * 1024) -> str:
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def get_cv_upload(content_hash: str):
+    """(metadata, summary) previously extracted from this file, or None."""
+    conn = sqlite3.connect(DB_PATH)
+    row = conn.execute("SELECT metadata, summary FROM cv_uploads WHERE sha256 = ?", (content_hash,)).fetchone()
+    conn.close()
+    return (json.loads(row[0]), row[1]) if row else None
+
+
+def record_cv_upload(content_hash: str, file_path: str, metadata: dict, summary: str, profile_id: int):
+    conn = sqlite3.connect(DB_PATH)
+    conn.execute(
+        """
+        INSERT OR REPLACE INTO cv_uploads (sha256, file_path, profile_id, metadata, summary, created_at)
+        VALUES (?, ?, ?, ?, ?, ?)
+        """,
+        (content_hash, file_path, profile_id, json.dumps(metadata, ensure_ascii=False), summary, datetime.utcnow().isoformat()),
+    )
+    conn.commit()
+    conn.close()
+
+
+def restore_profile(metadata: dict, summary: str, profile_id: int):
+    """Point the user's cv_profiles row at a known upload; no write if it already matches."""
+    conn = sqlite3.connect(DB_PATH)
+    row = conn.execute("SELECT summary FROM cv_profiles WHERE id = ?", (profile_id,)).fetchone()
+    conn.close()
+    if row and row[0] == summary:
+        print("✅ CV unchanged, profile already up to date.")
+        return
+    save_to_db(metadata, summary, profile_id)
+
+
+def _extraction_ok(metadata: dict, summary: str) -> bool:
+    # Only remember complete extractions, so a failed Gemini call is retried on re-upload
+    return "name" in metadata and not summary.startswith("Summary unavailable")
+
 # ======================================================
 # TEXT EXTRACTION
 # ======================================================
-def extract_text(file_path: str) -> str:
-    _, ext = os.path.splitext(file_path)
-    text = ""
-    if ext.lower() == ".pdf":
-        reader = PdfReader(file_path)
-        for page in reader.pages:
-            t = page.extract_text()
-            if t:
-                text += t + "\n"
-    elif ext.lower() == ".docx":
-        doc = docx.Document(file_path)
-        text = "\n".join(p.text for p in doc.paragraphs)
-    else:
-        raise ValueError(f"Unsupported file type: {ext}")
-    return re.sub(r"\s+", " ", text.strip())
+# extract_text (PDF/DOCX) lives in modules/cv_text.py, shared with the
+# bulk-import batch extractor (extract_texts).
 
 # ======================================================
 # CONTACT INFO EXTRACTION
 # ======================================================
-def extract_contact_info(text: str) -> dict:
-    return {
-        "emails": re.findall(r'[\w\.-]+@[\w\.-]+', text),
-        "phones": re.findall(r'\+?\d[\d\s\-]{7,}\d', text),
-        "linkedin": re.findall(r'(?:https?://)?(?:www\.)?linkedin\.com/[A-Za-z0-9_/.\-]+', text),
-        "github": re.findall(r'(?:https?://)?(?:www\.)?github\.com/[A-Za-z0-9_/.\-]+', text),
-        "websites": re.findall(r'(?:https?://)?(?:www\.)?[A-Za-z0-9\-]+\.[a-z]{2,}(?:/[A-Za-z0-9_\-./]*)?', text),
-    }
+# extract_contact_info lives in modules/contact_info.py (single compiled pass,
+# normalized and deduplicated).
 
 # ======================================================
 # GEMINI ENRICHMENT (LangChain)
 # ======================================================
-def enrich_with_gemini(text: str, contact_info: dict) -> dict:
-    """Send extracted text to Gemini via LangChain and ensure JSON output."""
-    prompt = f"""
+def _enrich_prompt(text: str, contact_info: dict) -> str:
+    return f"""
     You are a professional CV parser and data extractor.
     Read the following resume text and return a JSON object with this structure:
 
@@ -127,13 +179,28 @@ def enrich_with_gemini(text: str, contact_info: dict) -> dict:
 
     Only output valid JSON — no explanations, no markdown, nothing outside the braces.
     """
+
+
+def _parse_json_object(raw_output: str) -> dict:
+    start, end = raw_output.find("{"), raw_output.rfind("}") + 1
+    return json.loads(raw_output[start:end])
+
+
+def enrich_with_gemini(text: str, contact_info: dict) -> dict:
+    """Send extracted text to Gemini via LangChain and ensure JSON output."""
+    try:
+        # Cached only once it parses, so a bad reply is retried on re-upload
+        return get_llm_client().chat(_enrich_prompt(text, contact_info), model=GEMINI_MODEL, validate=_parse_json_object)
+    except Exception as e:
+        print(f"⚠️ Gemini parse error: {e}")
+        return {"raw_text": text, "contact_info": contact_info}
+
+
+async def aenrich_with_gemini(text: str, contact_info: dict) -> dict:
     try:
-        response = model.invoke([HumanMessage(content=prompt)])
-        raw_output = response.content.strip()
-        start, end = raw_output.find("{"), raw_output.rfind("}") + 1
-        json_str = raw_output[start:end]
-        parsed = json.loads(json_str)
-        return parsed
+        return await get_llm_client().achat(
+            _enrich_prompt(text, contact_info), model=GEMINI_MODEL, validate=_parse_json_object
+        )
     except Exception as e:
         print(f"⚠️ Gemini parse error: {e}")
         return {"raw_text": text, "contact_info": contact_info}
@@ -141,7 +208,7 @@ def enrich_with_gemini(text: str, contact_info: dict) -> dict:
 # ======================================================
 # GEMINI SUMMARY GENERATION (LangChain)
 # ======================================================
-def summarize_applicant(metadata: dict, text: str) -> str:
+def _summary_prompt(metadata: dict, text: str) -> str:
     structured_context = json.dumps({
         "name": metadata.get("name", ""),
         "summary": metadata.get("summary", ""),
@@ -151,7 +218,7 @@ def summarize_applicant(metadata: dict, text: str) -> str:
         "industries": metadata.get("industries", []),
     }, ensure_ascii=False)
 
-    prompt = f"""
+    return f"""
     You are an AI resume summarizer.
     Write a concise, professional summary (~100 words) for a job application profile,
     based on this structured metadata and CV text.
@@ -165,18 +232,102 @@ def summarize_applicant(metadata: dict, text: str) -> str:
     The summary should sound natural, positive, and highlight strengths, expertise, and key industries.
     Output only the summary paragraph.
     """
+
+
+def summarize_applicant(metadata: dict, text: str) -> str:
+    try:
+        summary_text = get_llm_client().chat(_summary_prompt(metadata, text), model=GEMINI_MODEL)
+        return summary_text or "Summary unavailable."
+    except Exception as e:
+        print(f"⚠️ Gemini summary error: {e}")
+        return "Summary unavailable due to an error."
+
+
+async def asummarize_applicant(metadata: dict, text: str) -> str:
     try:
-        response = model.invoke([HumanMessage(content=prompt)])
-        summary_text = response.content.strip()
+        summary_text = await get_llm_client().achat(_summary_prompt(metadata, text), model=GEMINI_MODEL)
         return summary_text or "Summary unavailable."
     except Exception as e:
         print(f"⚠️ Gemini summary error: {e}")
         return "Summary unavailable due to an error."
 
+# ======================================================
+# SINGLE-PASS STRUCTURED EXTRACTION
+# ======================================================
+class Education(BaseModel):
+    degree: str = ""
+    field: str = ""
+    institution: str = ""
+    start: str = ""
+    end: str = ""
+
+
+class Experience(BaseModel):
+    title: str = ""
+    company: str = ""
+    start: str = ""
+    end: str = ""
+    description: str = ""
+
+
+class Project(BaseModel):
+    name: str = ""
+    description: str = ""
+    tech_stack: List[str] = []
+
+
+class CVExtraction(BaseModel):
+    name: str = Field(min_length=1)
+    summary: str = Field("", description="Summary or objective as written in the CV, empty if none")
+    education: List[Education] = []
+    experience: List[Experience] = []
+    projects: List[Project] = []
+    skills: List[str] = []
+    languages: List[str] = []
+    industries: List[str] = []
+    profile_summary: str = Field(
+        min_length=1,
+        description="Concise, professional ~100-word summary for a job application profile",
+    )
+
+
+def _extraction_prompt(text: str) -> str:
+    return f"""
+    You are a professional CV parser and resume summarizer.
+    From the resume text below:
+    1. Extract the structured profile (name, summary, education, experience,
+       projects, skills, languages, industries).
+    2. Write `profile_summary`: a concise, professional summary (~100 words) for a
+       job application profile that sounds natural and positive and highlights
+       strengths, expertise, and key industries.
+
+    Resume text:
+    {text[:15000]}
+    """
+
+
+def _split_extraction(result: CVExtraction, text: str, contact_info: dict):
+    metadata = result.model_dump(exclude={"profile_summary"})
+    metadata["contact_info"] = contact_info
+    metadata["raw_text"] = text
+    return metadata, result.profile_summary
+
+
+def extract_profile(text: str, contact_info: dict):
+    """One structured Gemini call → (metadata, summary)."""
+    result = get_llm_client().structured(_extraction_prompt(text), model=GEMINI_MODEL, schema=CVExtraction)
+    return _split_extraction(result, text, contact_info)
+
+
+async def aextract_profile(text: str, contact_info: dict):
+    result = await get_llm_client().astructured(_extraction_prompt(text), model=GEMINI_MODEL, schema=CVExtraction)
+    return _split_extraction(result, text, contact_info)
+
+
 # ======================================================
 # SAVE TO SQLITE
 # ======================================================
-def save_to_db(metadata: dict, summary: str):
+def save_to_db(metadata: dict, summary: str, profile_id: int):
     conn = sqlite3.connect(DB_PATH)
     cursor = conn.cursor()
     cursor.execute(
@@ -188,7 +339,7 @@ def save_to_db(metadata: dict, summary: str):
         VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
         """,
         (
-            1,
+            profile_id,
             metadata.get("name", ""),
             ", ".join(metadata.get("contact_info", {}).get("emails", [])),
             ", ".join(metadata.get("contact_info", {}).get("phones", [])),
@@ -207,20 +358,15 @@ def save_to_db(metadata: dict, summary: str):
     )
     conn.commit()
     conn.close()
-    print("✅ Metadata and summary inserted into SQLite database.")
+    print(f"✅ Metadata and summary saved to profile {profile_id}.")
+
+    # The profile changed, so its materialized recommendations are stale
+    invalidate_user(profile_id, db_path=DB_PATH)
 
 # ======================================================
 # MAIN PIPELINE
 # ======================================================
-def extract_metadata(file_path: str) -> dict:
-    print(f"📄 Processing: {file_path}")
-    init_db()
-    text = extract_text(file_path)
-    contact_info = extract_contact_info(text)
-    metadata = enrich_with_gemini(text, contact_info)
-    metadata.setdefault("contact_info", contact_info)
-    metadata.setdefault("raw_text", text)
-
+def _write_outputs(file_path: str, metadata: dict, summary: str):
     os.makedirs(OUTPUT_DIR, exist_ok=True)
     base_name = os.path.splitext(os.path.basename(file_path))[0]
 
@@ -228,14 +374,69 @@ def extract_metadata(file_path: str) -> dict:
     with open(json_path, "w", encoding="utf-8") as f:
         json.dump(metadata, f, indent=2, ensure_ascii=False)
 
-    summary = summarize_applicant(metadata, text)
     summary_path = os.path.join(OUTPUT_DIR, f"summary_{base_name}.txt")
     with open(summary_path, "w", encoding="utf-8") as f:
         f.write(summary)
 
-    save_to_db(metadata, summary)
-
     print(f"✅ Profile saved → {json_path}")
     print(f"✅ Summary saved → {summary_path}")
+
+
+def extract_metadata(file_path: str, content_hash: str = None, user_id: int = 1) -> dict:
+    print(f"📄 Processing: {file_path}")
+    init_db()
+    content_hash = content_hash or file_sha256(file_path)
+    cached = get_cv_upload(content_hash)
+    if cached:
+        print(f"♻️ Known CV ({content_hash[:12]}), skipping extraction.")
+        restore_profile(*cached, user_id)
+        return cached[0]
+
+    text = extract_text(file_path)
+    contact_info = extract_contact_info(text)
+    try:
+        metadata, summary = extract_profile(text, contact_info)
+    except Exception as e:
+        print(f"⚠️ Single-pass extraction failed, falling back to two calls: {e}")
+        metadata = enrich_with_gemini(text, contact_info)
+        metadata.setdefault("contact_info", contact_info)
+        metadata.setdefault("raw_text", text)
+        summary = summarize_applicant(metadata, text)
+
+    _write_outputs(file_path, metadata, summary)
+    save_to_db(metadata, summary, user_id)
+    if _extraction_ok(metadata, summary):
+        record_cv_upload(content_hash, file_path, metadata, summary, user_id)
     return metadata
 
+
+async def aextract_metadata(file_path: str, content_hash: str = None, user_id: int = 1) -> dict:
+    """
+    Async extract_metadata for the FastAPI path: parsing runs in the CPU
+    process pool, Gemini calls are awaited, file and DB writes run off the loop.
+    """
+    print(f"📄 Processing: {file_path}")
+    await run_db(init_db)
+    content_hash = content_hash or await run_blocking(file_sha256, file_path)
+    cached = await run_db(get_cv_upload, content_hash)
+    if cached:
+        print(f"♻️ Known CV ({content_hash[:12]}), skipping extraction.")
+        await run_db(restore_profile, *cached, user_id)
+        return cached[0]
+
+    text = await run_cpu(extract_text, file_path)
+    contact_info = extract_contact_info(text)
+    try:
+        metadata, summary = await aextract_profile(text, contact_info)
+    except Exception as e:
+        print(f"⚠️ Single-pass extraction failed, falling back to two calls: {e}")
+        metadata = await aenrich_with_gemini(text, contact_info)
+        metadata.setdefault("contact_info", contact_info)
+        metadata.setdefault("raw_text", text)
+        summary = await asummarize_applicant(metadata, text)
+
+    await run_blocking(_write_outputs, file_path, metadata, summary)
+    await run_db(save_to_db, metadata, summary, user_id)
+    if _extraction_ok(metadata, summary):
+        await run_db(record_cv_upload, content_hash, file_path, metadata, summary, user_id)
+    return metadata
@@ -19,6 +19,7 @@ from langgraph.graph import StateGraph
 
 from modules.extract_cv_metadata_gemini import extract_metadata
 from modules.job_matching import JobMatching
+from modules.llm_client import get_llm_client
 from modules.utils import save_cv_to_db, save_user_action, send_email_to_recruiter
 
 # -----------------------------------------------------------------------------
@@ -52,11 +53,9 @@ class AgentState(TypedDict, total=False):
 # HELPERS
 # -----------------------------------------------------------------------------
 def gemini_invoke(prompt: str) -> str:
-    """Wrapper for Gemini text generation."""
+    """Wrapper for Gemini text generation (shared model + response cache)."""
     try:
-        model = genai.GenerativeModel(MODEL_NAME)
-        resp = model.generate_content(prompt)
-        return resp.text.strip()
+        return get_llm_client().generate(prompt, model=MODEL_NAME)
     except Exception as e:
         print(f"[Gemini error] {e}")
         return ""
@@ -77,7 +76,7 @@ def parse_cv_node(state: AgentState) -> AgentState:
         state["assistant_message"] = "❌ Missing CV file"
         return state
 
-    metadata = extract_metadata(file_path)
+    metadata = extract_metadata(file_path, user_id=int(state.get("user_id") or 1))
     state["cv_parsed"] = metadata
     state["cv_text"] = metadata.get("raw_text", "")
     state["assistant_message"] = "✅ CV parsed successfully"
@@ -0,0 +1,158 @@
+"""
+index_manifest.py
+--------------------------------------------------
+Small SQLite manifest that remembers which job documents are
+already embedded in a vector collection, and with which content.
+
+One row per (collection, doc_id) holding the SHA-256 of the
+document text that was indexed. JobMatching compares it against
+the current CSV to embed only new or changed jobs and to drop
+chunks of jobs that disappeared from the feed.
+
+Every sync stamps the rows it saw with a run id, so removed jobs
+can be found without holding the whole feed in memory.
+
+The normalization version the collection was indexed under is kept
+alongside (index_meta): metadata changes do not change the document
+text, so the content hashes alone would never re-index them.
+
+doc_ids are stable job keys (job_key): a hash of (title, company), the
+same key the jobs table deduplicates on. A row position would shift
+every later id whenever one job is inserted or removed from the feed.
+"""
+
+import hashlib
+import os
+import sqlite3
+from typing import Dict, Iterable, List, Optional, Tuple
+
+
+def content_hash(text: str) -> str:
+    """Stable hash of a document's indexed text."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def job_key(title, company) -> str:
+    """Stable doc_id of a job: its (title, company) identity, independent of feed order."""
+    return hashlib.sha256(f"{title}\x1f{company}".encode("utf-8")).hexdigest()[:16]
+
+
+class IndexManifest:
+    def __init__(self, path: str, collection: str) -> None:
+        self.path = path
+        self.collection = collection
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS index_manifest (
+                    collection TEXT NOT NULL,
+                    doc_id TEXT NOT NULL,
+                    content_hash TEXT NOT NULL,
+                    run_id TEXT,
+                    PRIMARY KEY (collection, doc_id)
+                )
+                """
+            )
+            columns = [r[1] for r in conn.execute("PRAGMA table_info(index_manifest)")]
+            if "run_id" not in columns:
+                conn.execute("ALTER TABLE index_manifest ADD COLUMN run_id TEXT")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS index_meta (
+                    collection TEXT PRIMARY KEY,
+                    schema_version INTEGER NOT NULL
+                )
+                """
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path)
+
+    def is_empty(self) -> bool:
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT 1 FROM index_manifest WHERE collection = ? LIMIT 1", (self.collection,)
+            ).fetchone()
+        return row is None
+
+    def schema_version(self) -> Optional[int]:
+        """Normalization version the collection was last synced with (None if never recorded)."""
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT schema_version FROM index_meta WHERE collection = ?", (self.collection,)
+            ).fetchone()
+        return row[0] if row else None
+
+    def set_schema_version(self, version: int) -> None:
+        with self._connect() as conn:
+            conn.execute(
+                """
+                INSERT INTO index_meta (collection, schema_version) VALUES (?, ?)
+                ON CONFLICT(collection) DO UPDATE SET schema_version = excluded.schema_version
+                """,
+                (self.collection, version),
+            )
+
+    def invalidate(self) -> None:
+        """Forget every content hash, so the next sync re-indexes all docs (and prunes removed ones)."""
+        with self._connect() as conn:
+            conn.execute("UPDATE index_manifest SET content_hash = '' WHERE collection = ?", (self.collection,))
+
+    def hashes_for(self, doc_ids: List[str]) -> Dict[str, str]:
+        """Return {doc_id: content_hash} for the given ids that are indexed."""
+        found = {}
+        BATCH_SIZE = 500
+        with self._connect() as conn:
+            for i in range(0, len(doc_ids), BATCH_SIZE):
+                batch = doc_ids[i : i + BATCH_SIZE]
+                placeholders = ",".join("?" * len(batch))
+                cur = conn.execute(
+                    f"SELECT doc_id, content_hash FROM index_manifest "
+                    f"WHERE collection = ? AND doc_id IN ({placeholders})",
+                    [self.collection, *batch],
+                )
+                found.update(cur.fetchall())
+        return found
+
+    def upsert(self, entries: Iterable[Tuple[str, str]], run_id: Optional[str] = None) -> None:
+        """Record (doc_id, content_hash) pairs as indexed during `run_id`."""
+        with self._connect() as conn:
+            conn.executemany(
+                """
+                INSERT INTO index_manifest (collection, doc_id, content_hash, run_id)
+                VALUES (?, ?, ?, ?)
+                ON CONFLICT(collection, doc_id) DO UPDATE SET
+                    content_hash = excluded.content_hash,
+                    run_id = excluded.run_id
+                """,
+                [(self.collection, doc_id, h, run_id) for doc_id, h in entries],
+            )
+
+    def touch(self, doc_ids: List[str], run_id: str) -> None:
+        """Mark unchanged docs as seen during `run_id`."""
+        with self._connect() as conn:
+            conn.executemany(
+                "UPDATE index_manifest SET run_id = ? WHERE collection = ? AND doc_id = ?",
+                [(run_id, self.collection, doc_id) for doc_id in doc_ids],
+            )
+
+    def stale(self, run_id: str) -> List[str]:
+        """Doc ids that were not seen during `run_id`."""
+        with self._connect() as conn:
+            cur = conn.execute(
+                "SELECT doc_id FROM index_manifest WHERE collection = ? AND run_id IS NOT ?",
+                (self.collection, run_id),
+            )
+            return [r[0] for r in cur.fetchall()]
+
+    def delete(self, doc_ids: List[str]) -> None:
+        with self._connect() as conn:
+            conn.executemany(
+                "DELETE FROM index_manifest WHERE collection = ? AND doc_id = ?",
+                [(self.collection, doc_id) for doc_id in doc_ids],
+            )
+
+    def clear(self) -> None:
+        with self._connect() as conn:
+            conn.execute("DELETE FROM index_manifest WHERE collection = ?", (self.collection,))
@@ -0,0 +1,177 @@
+"""
+job_cards.py
+--------------------------------------------------
+Compact, token-budgeted job cards for LLM context.
+
+A card keeps only what the recommender needs to rank and present a
+job — title, company, location, remote, salary, key requirements and
+recruiter email — instead of the full description. Cards are built
+without any LLM call when jobs are indexed and stored per doc_id in
+a small SQLite table, keyed by the hash of the job text they were
+built from, so unchanged jobs are never rebuilt.
+
+Tokens are counted with tiktoken (cl100k_base) when its encoding is
+available, otherwise estimated at ~4 characters per token.
+"""
+
+import os
+import re
+import sqlite3
+from typing import Dict, Iterable, List, Mapping, Tuple
+
+CARD_MAX_TOKENS = 120
+MAX_REQUIREMENTS = 5
+
+REQUIREMENT_HINTS = re.compile(
+    r"\b(require|must|experience|proficien|knowledge|familiar|skill|degree|"
+    r"background|expert|years?|fluent|ability to|strong|qualification|need|looking for)",
+    re.IGNORECASE,
+)
+SALARY_PATTERN = re.compile(
+    r"(?:[€$£]|EUR|USD|GBP)\s?\d[\d.,]*\s?[kK]?"
+    r"(?:\s?(?:-|–|to)\s?(?:[€$£]|EUR|USD|GBP)?\s?\d[\d.,]*\s?[kK]?)?"
+    r"(?:\s?(?:per|/)\s?(?:year|month|hour|annum))?",
+)
+SENTENCE_SPLIT = re.compile(r"(?<=[.!?])\s+|\n+\s*[-•*]?\s*")
+CARD_HEADER = re.compile(r"^\[([^\]\s]+)\] ", re.MULTILINE)   # "[doc_id] Title — Company"
+
+_encoding = None
+
+
+# ======================================================
+# TOKENS
+# ======================================================
+def count_tokens(text: str) -> int:
+    global _encoding
+    if _encoding is None:
+        try:
+            import tiktoken
+
+            _encoding = tiktoken.get_encoding("cl100k_base")
+        except Exception:
+            _encoding = False  # offline / not installed: fall back to the estimate
+    if _encoding:
+        return len(_encoding.encode(text))
+    return max(1, len(text) // 4)
+
+
+# ======================================================
+# CARD BUILDING
+# ======================================================
+def extract_salary(description: str) -> str:
+    match = SALARY_PATTERN.search(description or "")
+    return match.group(0).strip() if match else "Not specified"
+
+
+def extract_requirements(description: str, limit: int = MAX_REQUIREMENTS) -> List[str]:
+    """Short requirement-like sentences/bullets from the description, in order."""
+    found = []
+    for part in SENTENCE_SPLIT.split(description or ""):
+        part = part.strip(" -•*\t")
+        if 15 <= len(part) <= 220 and REQUIREMENT_HINTS.search(part) and part not in found:
+            found.append(part)
+            if len(found) >= limit:
+                break
+    return found
+
+
+def build_job_card(job: Mapping, doc_id: str = "", max_tokens: int = CARD_MAX_TOKENS) -> str:
+    """Render one job as a compact card of at most `max_tokens` tokens."""
+    description = str(job.get("description", "") or "")
+    header = [
+        f"[{doc_id}] {job.get('title', '')} — {job.get('company', '')}".strip(),
+        f"Location: {job.get('location', '') or 'n/a'} | Remote: {job.get('remote', '') or 'n/a'}",
+        f"Salary: {extract_salary(description)}",
+    ]
+    email = f"Email: {job.get('recruiter_email', '') or 'n/a'}"
+
+    requirements = extract_requirements(description)
+    while True:
+        lines = header + ([f"Requirements: {'; '.join(requirements)}"] if requirements else []) + [email]
+        card = "\n".join(lines)
+        if count_tokens(card) <= max_tokens or not requirements:
+            break
+        requirements = requirements[:-1]
+
+    if count_tokens(card) > max_tokens:
+        card = card[: max_tokens * 4]
+    return card
+
+
+def card_doc_ids(cards: Iterable[str]) -> List[str]:
+    """doc_ids in the headers of the given cards (or of texts that join several cards), in order."""
+    found = []
+    for text in cards:
+        for doc_id in CARD_HEADER.findall(text):
+            if doc_id not in found:
+                found.append(doc_id)
+    return found
+
+
+def fit_to_budget(cards: Iterable[str], token_budget: int) -> List[str]:
+    """Keep cards in rank order until the next one would exceed the budget."""
+    kept, used = [], 0
+    for card in cards:
+        tokens = count_tokens(card)
+        if kept and used + tokens > token_budget:
+            break
+        kept.append(card)
+        used += tokens
+    return kept
+
+
+# ======================================================
+# STORAGE
+# ======================================================
+class JobCardStore:
+    """SQLite table of cards: one row per doc_id with the hash of its source text."""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS job_cards (
+                    doc_id TEXT PRIMARY KEY,
+                    content_hash TEXT NOT NULL,
+                    card TEXT NOT NULL
+                )
+                """
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path)
+
+    def _select(self, columns: str, doc_ids: List[str]) -> Dict[str, object]:
+        found = {}
+        BATCH_SIZE = 500
+        with self._connect() as conn:
+            for i in range(0, len(doc_ids), BATCH_SIZE):
+                batch = doc_ids[i : i + BATCH_SIZE]
+                placeholders = ",".join("?" * len(batch))
+                cur = conn.execute(f"SELECT doc_id, {columns} FROM job_cards WHERE doc_id IN ({placeholders})", batch)
+                found.update((row[0], row[1] if len(row) == 2 else row[1:]) for row in cur.fetchall())
+        return found
+
+    def hashes_for(self, doc_ids: List[str]) -> Dict[str, str]:
+        return self._select("content_hash", doc_ids)
+
+    def get(self, doc_ids: List[str]) -> Dict[str, Tuple[str, str]]:
+        """Return {doc_id: (content_hash, card)}."""
+        return self._select("content_hash, card", doc_ids)
+
+    def upsert(self, entries: Iterable[Tuple[str, str, str]]) -> None:
+        """Store (doc_id, content_hash, card) triples."""
+        with self._connect() as conn:
+            conn.executemany(
+                """
+                INSERT INTO job_cards (doc_id, content_hash, card) VALUES (?, ?, ?)
+                ON CONFLICT(doc_id) DO UPDATE SET content_hash = excluded.content_hash, card = excluded.card
+                """,
+                list(entries),
+            )
+
+    def delete(self, doc_ids: List[str]) -> None:
+        with self._connect() as conn:
+            conn.executemany("DELETE FROM job_cards WHERE doc_id = ?", [(d,) for d in doc_ids])
@@ -0,0 +1,159 @@
+"""
+job_filters.py
+--------------------------------------------------
+Canonical job metadata and structured search filters.
+
+Feeds spell the same thing many ways ("yes" / "Remote" / "100% remote",
+"London, UK" / "london", "Eng" / "Engineering"), so location, remote
+and department are normalized once, at ingest, before a job is hashed
+and indexed. Filters go through the same normalizers, which makes an
+exact match on the stored metadata reliable:
+
+- remote      → "remote" | "hybrid" | "onsite" | "" (unknown)
+- location    → city, title-cased, country suffix dropped ("London");
+                "Remote" / "Anywhere" → "" (and remote → "remote")
+- department  → title-cased, common abbreviations expanded
+
+JobFilters renders a Chroma `where` clause (also understood by
+NumpyVectorStore); its clauses() are also matched in SQL against the
+stored job rows for the BM25 side of hybrid search (job_rows.py).
+"""
+
+import re
+from dataclasses import dataclass
+from typing import Iterable, Mapping, Optional, Tuple
+
+# Bump whenever a normalizer (or the metadata row_to_doc stores) changes:
+# collections indexed under another version are fully re-synced, since
+# their stored metadata no longer matches what the filters produce.
+NORMALIZATION_VERSION = 1
+
+REMOTE = "remote"
+HYBRID = "hybrid"
+ONSITE = "onsite"
+
+REMOTE_VALUES = {
+    REMOTE: {"yes", "y", "true", "1", "remote", "fully remote", "full remote", "100% remote", "remote only",
+             "work from home", "wfh", "anywhere"},
+    HYBRID: {"hybrid", "partial", "partially remote", "partly remote", "flexible", "remote/hybrid"},
+    ONSITE: {"no", "n", "false", "0", "onsite", "on-site", "on site", "office", "in office", "in-office", "not remote"},
+}
+_REMOTE_LOOKUP = {value: canonical for canonical, values in REMOTE_VALUES.items() for value in values}
+
+REMOTE_LOCATIONS = {"remote", "anywhere", "worldwide", "global", "work from home", "wfh"}
+LOCATION_ALIASES = {
+    "nyc": "New York",
+    "new york city": "New York",
+    "sf": "San Francisco",
+    "den haag": "The Hague",
+    "'s-gravenhage": "The Hague",
+    "münchen": "Munich",
+    "muenchen": "Munich",
+}
+DEPARTMENT_ALIASES = {
+    "eng": "Engineering",
+    "engineering & technology": "Engineering",
+    "r&d": "Research",
+    "hr": "Human Resources",
+    "people": "Human Resources",
+    "it": "IT",
+    "ops": "Operations",
+    "bizdev": "Business Development",
+}
+
+_SPACES = re.compile(r"\s+")
+
+
+def _clean(value) -> str:
+    return _SPACES.sub(" ", str(value or "")).strip()
+
+
+def _title(value: str) -> str:
+    # str.title() would turn "AI" into "Ai"; only recase lowercase or shouted words.
+    return " ".join(
+        w[:1].upper() + w[1:].lower() if w.islower() or (w.isupper() and len(w) > 3) else w
+        for w in value.split(" ")
+    )
+
+
+# ======================================================
+# NORMALIZERS
+# ======================================================
+def normalize_remote(value) -> str:
+    key = _clean(value).lower()
+    if key in _REMOTE_LOOKUP:
+        return _REMOTE_LOOKUP[key]
+    if HYBRID in key:
+        return HYBRID
+    if "remote" in key:
+        return ONSITE if key.startswith(("no", "not")) else REMOTE
+    return ""
+
+
+def normalize_location(value) -> str:
+    location = _clean(value)
+    if location.lower() in REMOTE_LOCATIONS:
+        return ""
+    city = location.split(",")[0].split("(")[0].strip()
+    return LOCATION_ALIASES.get(city.lower(), _title(city))
+
+
+def normalize_department(value) -> str:
+    department = _clean(value)
+    return DEPARTMENT_ALIASES.get(department.lower(), _title(department))
+
+
+def normalize_job_fields(job: Mapping) -> dict:
+    """Canonical {"location", "remote", "department"} for a job record."""
+    remote = normalize_remote(job.get("remote", ""))
+    if not remote and _clean(job.get("location", "")).lower() in REMOTE_LOCATIONS:
+        remote = REMOTE
+    return {
+        "location": normalize_location(job.get("location", "")),
+        "remote": remote,
+        "department": normalize_department(job.get("department", "")),
+    }
+
+
+# ======================================================
+# FILTERS
+# ======================================================
+@dataclass(frozen=True)
+class JobFilters:
+    remote_only: bool = False
+    locations: Tuple[str, ...] = ()
+    departments: Tuple[str, ...] = ()
+
+    @classmethod
+    def build(
+        cls,
+        remote_only: bool = False,
+        locations: Optional[Iterable[str]] = None,
+        departments: Optional[Iterable[str]] = None,
+    ) -> Optional["JobFilters"]:
+        """Normalized filters, or None when nothing is filtered. A "Remote" location means remote_only."""
+        locations = list(locations or ())
+        filters = cls(
+            remote_only=bool(remote_only) or any(_clean(v).lower() in REMOTE_LOCATIONS for v in locations),
+            locations=tuple(sorted({normalize_location(v) for v in locations} - {""})),
+            departments=tuple(sorted({normalize_department(v) for v in departments or ()} - {""})),
+        )
+        return filters if filters.clauses() else None
+
+    def clauses(self):
+        """(metadata field, allowed values) pairs, all of which must match."""
+        clauses = []
+        if self.remote_only:
+            clauses.append(("remote", (REMOTE,)))
+        if self.locations:
+            clauses.append(("location", self.locations))
+        if self.departments:
+            clauses.append(("department", self.departments))
+        return clauses
+
+    def where(self) -> Optional[dict]:
+        """Chroma metadata filter, e.g. {"$and": [{"remote": {"$in": ["remote"]}}, ...]}."""
+        clauses = [{field: {"$in": list(values)}} for field, values in self.clauses()]
+        if not clauses:
+            return None
+        return clauses[0] if len(clauses) == 1 else {"$and": clauses}
@@ -0,0 +1,158 @@
+"""
+job_ingest.py
+--------------------------------------------------
+Streaming, bounded-memory job feed ingestion.
+
+    chunked CSV/JSONL reader → normalizer → DB upsert → embed batch → vector upsert
+
+The normalizer also maps location / remote / department onto the
+canonical values search filters match on (modules/job_filters.py).
+
+Only one batch of postings is held in memory at a time, so feeds of
+a million jobs can be ingested on a small worker box:
+- assistant.db is updated through job_updater's bulk upsert, one
+  transaction per batch, and jobs missing from the feed are deleted
+  at the end;
+- if a JobMatching instance is given, each batch is hashed against the
+  index manifest and only new/changed jobs are embedded and upserted
+  into its inactive collection, which is swapped in once the feed is
+  done (blue/green: the collection serving queries is never written).
+
+Usage (from agentkit/):
+    python -m modules.job_ingest datastore/joblist_clean_for_rag.csv --index
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+from typing import Iterator, List, Optional
+
+import pandas as pd
+
+from modules.index_manifest import job_key
+from modules.job_filters import normalize_job_fields
+from modules.job_updater import DB_PATH, begin_job_sync, finish_job_sync, upsert_jobs
+
+JOB_FIELDS = ("title", "company", "location", "remote", "department", "description", "recruiter_email")
+BATCH_SIZE = 500
+
+
+# -----------------------------------------------------------------------------
+# READER
+# -----------------------------------------------------------------------------
+def iter_job_records(path: str, batch_size: int = BATCH_SIZE) -> Iterator[List[dict]]:
+    """Yield raw job records from a .csv or .jsonl feed, `batch_size` at a time."""
+    _, ext = os.path.splitext(path)
+    if ext.lower() == ".csv":
+        for chunk in pd.read_csv(path, chunksize=batch_size):
+            yield chunk.fillna("").to_dict("records")
+    elif ext.lower() in (".jsonl", ".ndjson"):
+        batch = []
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                batch.append(json.loads(line))
+                if len(batch) >= batch_size:
+                    yield batch
+                    batch = []
+        if batch:
+            yield batch
+    else:
+        raise ValueError(f"Unsupported feed type: {ext}")
+
+
+# -----------------------------------------------------------------------------
+# NORMALIZER
+# -----------------------------------------------------------------------------
+def normalize_job(record: dict) -> dict:
+    """
+    Map a raw record onto the fields used by assistant.db and JobMatching.
+
+    doc_id is the job key of (title, company), the same id load_joblist()
+    assigns when it reads the CSV, so both paths index identical documents
+    and a job keeps its id when others are added to or dropped from the feed.
+    Location, remote and department get the same canonical values too.
+    """
+    job = {}
+    for field in JOB_FIELDS:
+        value = record.get(field)
+        job[field] = "" if value is None else str(value)
+    job.update(normalize_job_fields(job))
+    job["doc_id"] = job_key(job["title"], job["company"])
+    return job
+
+
+# -----------------------------------------------------------------------------
+# PIPELINE
+# -----------------------------------------------------------------------------
+def ingest_job_feed(
+    path: str,
+    jm=None,
+    batch_size: int = BATCH_SIZE,
+    db_path: str = DB_PATH,
+    delete_missing: bool = True,
+) -> dict:
+    """
+    Stream a job feed into assistant.db and (optionally) jm's vector index.
+
+    Returns {"jobs": n, "db": {"inserted": [...], "updated": [...], "deleted": [...]},
+    "index": {"added": .., "updated": .., "deleted": .., "unchanged": ..} or None}.
+    """
+    conn = sqlite3.connect(db_path, isolation_level=None)
+    n_jobs = 0
+
+    def job_batches():
+        nonlocal n_jobs
+        for records in iter_job_records(path, batch_size):
+            jobs = [normalize_job(r) for r in records]
+            n_jobs += len(jobs)
+
+            conn.execute("BEGIN")
+            upsert_jobs(conn, [(j["title"], j["company"], j["description"], j["recruiter_email"]) for j in jobs])
+            conn.execute("COMMIT")
+            yield jobs
+
+    try:
+        begin_job_sync(conn)
+        try:
+            if jm is not None:
+                new_index = jm.refresh_index([jm.row_to_doc(j) for j in jobs] for jobs in job_batches())
+                index_stats = new_index.sync_stats
+            else:
+                index_stats = None
+                for _ in job_batches():
+                    pass
+            changes = finish_job_sync(conn, delete_missing=delete_missing)
+        except Exception:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+    finally:
+        conn.close()
+
+    print(
+        f"[Ingest] ✅ {n_jobs} jobs streamed: {len(changes['inserted'])} inserted, "
+        f"{len(changes['updated'])} updated, {len(changes['deleted'])} deleted."
+    )
+    if index_stats is not None:
+        print(f"[Ingest] ✅ Vector index synced and swapped in: {index_stats}")
+    return {"jobs": n_jobs, "db": changes, "index": index_stats}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Stream a job feed into assistant.db and the RAG index.")
+    parser.add_argument("feed", help="Path to a .csv or .jsonl job feed")
+    parser.add_argument("--index", action="store_true", help="Also sync the RAG index (inactive slot, then swap)")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    parser.add_argument("--db-path", default=DB_PATH)
+    args = parser.parse_args()
+
+    jm: Optional[object] = None
+    if args.index:
+        from modules.job_matching import JobMatching
+
+        jm = JobMatching(model_name="gemini-2.5-flash-lite", job_list_path=args.feed, db_path=args.db_path)
+
+    ingest_job_feed(args.feed, jm=jm, batch_size=args.batch_size, db_path=args.db_path)
@@ -1,5 +1,4 @@
 import os
-import pandas as pd
 from dotenv import load_dotenv
 
 from langchain_core.documents import Document
@@ -7,14 +6,63 @@ from langchain_text_splitters import RecursiveCharacterTextSplitter
 from langchain_openai import OpenAIEmbeddings
 from langchain_chroma import Chroma
 
-# Use a chat model for summarization
-from langchain_google_genai import ChatGoogleGenerativeAI  # for Gemini
 # from langchain_openai import ChatOpenAI  # uncomment if you want OpenAI chat
 
+import asyncio
 import sqlite3
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+
+from modules.async_runtime import run_db
+from modules.bm25 import BM25Index
+from modules.embedding_cache import CachedEmbeddings
+from modules.index_manifest import IndexManifest, content_hash
+from modules.job_filters import NORMALIZATION_VERSION, JobFilters
+from modules.job_cards import JobCardStore, build_job_card, fit_to_budget
+from modules.job_rows import JobRowStore
+from modules.job_summaries import JobSummaryCache
+from modules.llm_client import scheduled_chat_model
+from modules.llm_scheduler import BACKGROUND, llm_priority
+from modules.numpy_vector_store import NumpyVectorStore
+from modules.rank_fusion import reciprocal_rank_fusion
 
 load_dotenv(override=True)
 
+AGGREGATES = ("max", "sum")
+OVERFETCH = 3  # first Chroma fetch: top_k * OVERFETCH chunks, grown until top_k distinct jobs
+
+
+class JobIndex:
+    """
+    One built version of the job index: a Chroma collection plus the job rows
+    it was built from (and, in hybrid mode, a BM25 index over the same docs).
+    JobMatching swaps whole snapshots, so a query that read `jm.index` once
+    keeps a consistent view even if a refresh lands mid-query.
+
+    Job rows live on disk (JobRowStore, one set per collection); lookups
+    skip doc_ids without a row instead of failing the query.
+    """
+    def __init__(self, version: int, collection_name: str, vector_store, rows, default_k: int, bm25=None, sync_stats=None) -> None:
+        self.version = version
+        self.collection_name = collection_name
+        self.vector_store = vector_store
+        self.rows = rows
+        self.bm25 = bm25
+        self.sync_stats = sync_stats
+        self.retriever = vector_store.as_retriever(search_kwargs={"k": default_k})
+        # BM25 candidates per filter combination; rows don't change under a snapshot's queries
+        self.allowed_ids = lru_cache(maxsize=128)(lambda filters: frozenset(rows.matching_ids(filters)))
+
+    def __len__(self) -> int:
+        return self.rows.count()
+
+    def get_jobs(self, doc_ids) -> Dict[str, dict]:
+        """{doc_id: job} for the doc_ids this snapshot has rows for."""
+        return self.rows.get(list(doc_ids))
+
 
 class JobMatching:
     """
@@ -27,34 +75,110 @@ class JobMatching:
 
     row_to_doc(row)
         Convert a CSV row into a LangChain Document for embedding.
-
-    load_joblist(rebuild=False)
-        Load or build the Chroma vector store.
-        - If `rebuild=False` and the DB exists, reuse it.
-        - If `rebuild=True`, re-index the CSV and overwrite the DB.
+        Location, remote and department are normalized to canonical values
+        (modules/job_filters.py) when the job list is read, so they can be
+        filtered on exactly.
+
+    load_joblist(incremental=False)
+        Load or build the vector store (Chroma, or NumPy with vector_backend="numpy").
+        - If `incremental=False` and the DB exists, reuse it as is.
+        - If `incremental=True`, hash each job's document text and only embed
+          new or changed jobs, deleting chunks of jobs removed from the CSV.
+        The job list is streamed in batches (job_ingest's reader and
+        normalizer); job rows are kept on disk next to the index (job_rows.py).
+
+    refresh_index(doc_batches=None)
+        Blue/green sync of the inactive collection (from the CSV, or from
+        Document batches streamed by job_ingest), then atomically swap the
+        snapshot used by queries.
 
     format_full_row(row)
         Format one job entry into readable text.
 
-    refine_result(results)
+    refine_result(results, doc_ids=None, max_concurrency=8)
         Summarize a list of job descriptions using the specified model (e.g., Gemini or GPT).
-
-    exec_query(qry_str, top_k=5)
-        Search for the top-k semantically similar jobs given a query string.
-        Returns a list of formatted job descriptions.
+        Summaries are cached by job content hash; misses run concurrently.
+        arefine_result() is the async variant (semaphore-bounded ainvoke calls).
+
+    search_docs(qry_str, top_k=5, remote_only=False, locations=None, departments=None, aggregate="max")
+        Doc-level search: the top-k distinct jobs as (formatted job, score).
+        Chunk scores are aggregated per job (max or sum); Chroma, which ranks
+        chunks, is over-fetched adaptively until top_k distinct jobs are found.
+
+    exec_query(qry_str, top_k=5, remote_only=False, locations=None, departments=None)
+        search_docs without the scores: a list of formatted job descriptions.
+        The optional filters are pushed into the vector store query (Chroma
+        `where` / NumpyVectorStore row mask), so only matching jobs are scored.
+        With retrieval="hybrid", a BM25 search over the same job text runs in
+        parallel with the vector search and the two rankings are fused with
+        reciprocal rank fusion, so exact skill tokens ("MATLAB", "SQL") count.
+
+    exec_query_cards(qry_str, top_k=10, token_budget=1200, remote_only=False, locations=None, departments=None)
+        Same search and filters, returning compact job cards that fit in a token budget.
+
+    exec_query_by_user(user_id, top_k=5)
+        exec_query with the user's CV summary from cv_profiles as the query.
+
+    exec_query_by_users(user_ids, top_k=5, token_budget=None)
+        Batched exec_query_by_user for many users: one DB read, one embedding
+        request and one scoring call; returns {user_id: [job, ...]}, or job
+        cards within token_budget when it is given.
     """
-    def __init__(self, model_name: str, job_list_path: str, default_k: int = 10,db_path: str = "assistant.db") -> None:
+    def __init__(
+        self,
+        model_name: str,
+        job_list_path: str,
+        default_k: int = 10,
+        db_path: str = "assistant.db",
+        embedding_cache_path: str = "embedding_cache.db",
+        vector_backend: str = "chroma",
+        embedding_dimensions: Optional[int] = None,
+        index_precision: str = "float32",
+        index_pca_dim: Optional[int] = None,
+        retrieval: str = "vector",
+        hybrid_depth: int = 2,
+    ) -> None:
         self.model_name = model_name  # e.g. "google_genai:gemini-2.5-flash-lite"
         self.job_list_path = job_list_path
-        self.df = None
-        self.df_by_id = None
         self.search_param = default_k
 
-        # Embeddings: OpenAI (ensure OPENAI_API_KEY is set)
-        self.embeddings = OpenAIEmbeddings(model="text-embedding-3-small")
+        # Embeddings: OpenAI (ensure OPENAI_API_KEY is set), cached on disk so
+        # re-indexing and repeated CV-summary queries don't pay twice.
+        # embedding_dimensions shortens text-embedding-3 vectors at the source
+        # (changing it requires building the index into a fresh directory).
+        embedding_model = "text-embedding-3-small"
+        self.embeddings = CachedEmbeddings(
+            OpenAIEmbeddings(model=embedding_model, dimensions=embedding_dimensions),
+            model_name=f"{embedding_model}@{embedding_dimensions}" if embedding_dimensions else embedding_model,
+            cache_path=embedding_cache_path,
+        )
 
-        self.vector_store = None
-        self.retriever = None
+        # "chroma" (default) or "numpy" (in-process brute force, see numpy_vector_store.py).
+        if vector_backend not in ("chroma", "numpy"):
+            raise ValueError(f"Unknown vector_backend: {vector_backend}")
+        if vector_backend != "numpy" and (index_precision != "float32" or index_pca_dim):
+            raise ValueError("index_precision/index_pca_dim require vector_backend='numpy'")
+        self.vector_backend = vector_backend
+        # Compact in-RAM index: float16/int8 codes, optional PCA, exact rescoring of the top candidates.
+        self.index_precision = index_precision
+        self.index_pca_dim = index_pca_dim
+
+        # "vector" (default) or "hybrid" (vector + BM25, fused with RRF).
+        # Each side fetches top_k * hybrid_depth candidates before fusion.
+        if retrieval not in ("vector", "hybrid"):
+            raise ValueError(f"Unknown retrieval mode: {retrieval}")
+        self.retrieval = retrieval
+        self.hybrid_depth = hybrid_depth
+        self._lexical_executor = None
+
+        # Two collections in the same index directory alternate as blue/green.
+        self.db_dir = "chroma_langchain_n_db" if vector_backend == "chroma" else "numpy_job_index"
+        self.collection_slots = ("jobs_rag", "jobs_rag_green")
+        self.index = None
+        self._refresh_lock = threading.Lock()
+        self._card_store = None
+        self._chat = None
+        self._summaries = None
 
         self.db_path = db_path
         
@@ -76,60 +200,269 @@ class JobMatching:
             "location": row["location"],
             "remote": row["remote"],
             "department": row["department"],
+            "recruiter_email": row.get("recruiter_email", ""),
         }
         return Document(page_content=content, metadata=metadata)
 
-    def load_joblist(self):
-        self.df = pd.read_csv(self.job_list_path)
-        self.df = self.df.fillna("").reset_index(drop=False).rename(columns={"index": "doc_id"})
-        self.df["doc_id"] = self.df["doc_id"].astype(str)
-
-        base_docs = [self.row_to_doc(r) for _, r in self.df.iterrows()]
-        print(f"Loaded {len(base_docs)} base docs")
+    @property
+    def vector_store(self):
+        return self.index.vector_store if self.index is not None else None
+
+    @property
+    def retriever(self):
+        return self.index.retriever if self.index is not None else None
+
+    def load_joblist(self, incremental: bool = False):
+        collection_name = self._active_collection()
+        sync = incremental or not os.path.exists(self.db_dir)
+        if not sync and not self._job_rows(collection_name).count():
+            print(f"No job rows stored for {collection_name}, syncing from the job list...")
+            sync = True
+        if not sync and self._manifest(collection_name).schema_version() != NORMALIZATION_VERSION:
+            print(f"{collection_name} was indexed with another job normalization, re-syncing from the job list...")
+            sync = True
+        if incremental:
+            print(f"Incrementally syncing {self.vector_backend} index...")
+        elif not sync:
+            print(f"Loading existing {self.vector_backend} index {collection_name}...")
+        self.index = self._build_index(collection_name, sync=sync, version=1)
+
+    def refresh_index(self, doc_batches=None):
+        """
+        Sync the inactive collection and swap it in.
 
-        db_dir="chroma_langchain_n_db"
+        The jobs come from the CSV, or from `doc_batches` (an iterator of
+        Document batches, e.g. job_ingest streaming a feed), so memory is
+        bounded by the batch size either way; jobs not seen in any batch are
+        pruned from the collection at the end. The serving collection is never
+        written to.
 
-        if  os.path.exists(db_dir):
-            print("Loading existing Chroma database...")
-            self.vector_store = Chroma(
-                collection_name="jobs_rag",
-                embedding_function=self.embeddings,
-                persist_directory=db_dir,
+        The swap is a single attribute assignment, so queries never take a lock:
+        in-flight ones finish on the old snapshot, new ones see the new one. The
+        old collection stays untouched until the next refresh reuses its slot.
+        """
+        with self._refresh_lock:
+            current = self.index
+            active = current.collection_name if current is not None else self._active_collection()
+            target = next(c for c in self.collection_slots if c != active)
+
+            new_index = self._build_index(
+                target,
+                sync=True,
+                version=(current.version + 1) if current is not None else 1,
+                doc_batches=doc_batches,
             )
-        else:
+            self.index = new_index
+            self._write_active_collection(target)
+            print(f"Swapped job index to {target} (v{new_index.version})")
+            return new_index
+
+    def _build_index(self, collection_name, sync, version, doc_batches=None):
+        vector_store = self._open_vector_store(collection_name)
+        rows = self._job_rows(collection_name)
+        stats = None
+        if sync:
+            if doc_batches is None:
+                doc_batches = self._feed_doc_batches()
+            stats = self._sync_index(vector_store, collection_name, doc_batches)
+            print(f"Done indexing {collection_name}: {stats}")
+
+        return JobIndex(
+            version=version,
+            collection_name=collection_name,
+            vector_store=vector_store,
+            rows=rows,
+            default_k=self.search_param,
+            bm25=self._build_bm25(rows) if self.retrieval == "hybrid" else None,
+            sync_stats=stats,
+        )
 
-            splitter = RecursiveCharacterTextSplitter(
-                chunk_size=1200,
-                chunk_overlap=150,
-                separators=["\n\n", "\n", " ", ""],
+    def _feed_doc_batches(self):
+        """Documents for job_list_path, one batch at a time, via job_ingest's reader and normalizer."""
+        from modules.job_ingest import iter_job_records, normalize_job  # job_ingest imports this module indirectly
+
+        for records in iter_job_records(self.job_list_path):
+            yield [self.row_to_doc(normalize_job(r)) for r in records]
+
+    def _manifest(self, collection_name):
+        return IndexManifest(os.path.join(self.db_dir, "index_manifest.sqlite3"), collection_name)
+
+    def _job_rows(self, collection_name):
+        return JobRowStore(os.path.join(self.db_dir, "job_rows.sqlite3"), collection_name)
+
+    def _build_bm25(self, rows):
+        """Lexical index over the same row_to_doc text the vector store embeds."""
+        bm25 = BM25Index()
+        bm25.add_many((j["doc_id"], self.row_to_doc(j).page_content) for batch in rows.iter_batches() for j in batch)
+        print(f"Built BM25 index over {len(bm25)} docs")
+        return bm25
+
+    def _active_collection(self):
+        path = os.path.join(self.db_dir, "active_collection")
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                name = f.read().strip()
+            if name in self.collection_slots:
+                return name
+        return self.collection_slots[0]
+
+    def _write_active_collection(self, collection_name):
+        path = os.path.join(self.db_dir, "active_collection")
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(collection_name)
+        os.replace(tmp_path, path)
+
+    def _open_vector_store(self, collection_name):
+        if self.vector_backend == "numpy":
+            return NumpyVectorStore(
+                collection_name,
+                self.embeddings,
+                self.db_dir,
+                precision=self.index_precision,
+                pca_dim=self.index_pca_dim,
             )
+        return Chroma(
+            collection_name=collection_name,
+            embedding_function=self.embeddings,
+            persist_directory=self.db_dir,
+        )
 
-            chunked_docs = []
-            for d in base_docs:
-                for i, ch in enumerate(splitter.split_text(d.page_content)):
-                    md = dict(d.metadata)
-                    md["chunk"] = i
-                    chunked_docs.append(Document(page_content=ch, metadata=md))
-
-            print(f"Prepared {len(chunked_docs)} chunks")
+    def _chunk_docs(self, docs):
+        """Split base docs into chunks with deterministic ids "<doc_id>:<chunk>"."""
+        splitter = RecursiveCharacterTextSplitter(
+            chunk_size=1200,
+            chunk_overlap=150,
+            separators=["\n\n", "\n", " ", ""],
+        )
 
-            self.vector_store = Chroma(
-                collection_name="jobs_rag",
-                embedding_function=self.embeddings,
-                persist_directory="./chroma_langchain_n_db",
-            )
+        chunked_docs, chunk_ids = [], []
+        for d in docs:
+            for i, ch in enumerate(splitter.split_text(d.page_content)):
+                md = dict(d.metadata)
+                md["chunk"] = i
+                chunked_docs.append(Document(page_content=ch, metadata=md))
+                chunk_ids.append(f"{md['doc_id']}:{i}")
+        return chunked_docs, chunk_ids
+
+    def _delete_doc_chunks(self, vector_store, doc_ids):
+        """Remove every chunk belonging to the given doc_ids."""
+        BATCH_SIZE = 100
+        for i in range(0, len(doc_ids), BATCH_SIZE):
+            batch = doc_ids[i : i + BATCH_SIZE]
+            found = vector_store.get(where={"doc_id": {"$in": batch}}, include=[])
+            if found["ids"]:
+                vector_store.delete(ids=found["ids"])
+
+    def _sync_index(self, vector_store, collection_name, doc_batches):
+        """
+        Bring the collection in line with the docs using the content-hash manifest:
+        embed only new/changed docs and delete chunks of removed ones. The
+        collection's job rows are written alongside.
 
-            BATCH_SIZE = 100
-            ids = []
-            for i in range(0, len(chunked_docs), BATCH_SIZE):
-                batch = chunked_docs[i : i + BATCH_SIZE]
-                ids.extend(self.vector_store.add_documents(batch))
+        A collection indexed under another NORMALIZATION_VERSION is re-indexed
+        in full, so its chunk metadata matches the current filters (the
+        embedding cache keeps unchanged texts from being re-embedded remotely).
+        """
+        manifest = self._manifest(collection_name)
+        rows = self._job_rows(collection_name)
+        if manifest.is_empty():
+            # Collection built before the manifest existed: its docs have unknown hashes.
+            existing = vector_store.get(include=["metadatas"])
+            manifest.upsert({(str(md["doc_id"]), "") for md in existing["metadatas"] if md})
+        elif manifest.schema_version() != NORMALIZATION_VERSION:
+            print(f"Normalization changed for {collection_name}, re-indexing every job")
+            manifest.invalidate()
+
+        run_id = uuid.uuid4().hex
+        stats = {"added": 0, "updated": 0, "deleted": 0, "unchanged": 0}
+        for base_docs in doc_batches:
+            for key, n in self._index_batch(vector_store, manifest, rows, base_docs, run_id).items():
+                stats[key] += n
+
+        stale = manifest.stale(run_id)
+        self._delete_doc_chunks(vector_store, stale)
+        manifest.delete(stale)
+        rows.delete(stale)
+        self._job_cards().delete(stale)
+        stats["deleted"] = len(stale)
+
+        if isinstance(vector_store, NumpyVectorStore):
+            vector_store.flush()
+        manifest.set_schema_version(NORMALIZATION_VERSION)
+        return stats
+
+    def _index_batch(self, vector_store, manifest, rows, base_docs, run_id):
+        """Embed the new/changed docs of one batch and stamp all of them with run_id."""
+        base_docs = list({d.metadata["doc_id"]: d for d in base_docs}.values())  # last one per job key
+        current = {d.metadata["doc_id"]: content_hash(d.page_content) for d in base_docs}
+        indexed = manifest.hashes_for(list(current))
+
+        changed = [d for d in base_docs if indexed.get(d.metadata["doc_id"]) != current[d.metadata["doc_id"]]]
+        reindexed = [d.metadata["doc_id"] for d in changed if d.metadata["doc_id"] in indexed]
+        self._delete_doc_chunks(vector_store, reindexed)
+
+        chunked_docs, chunk_ids = self._chunk_docs(changed)
+        BATCH_SIZE = 100
+        for i in range(0, len(chunked_docs), BATCH_SIZE):
+            vector_store.add_documents(chunked_docs[i : i + BATCH_SIZE], ids=chunk_ids[i : i + BATCH_SIZE])
+
+        changed_ids = {d.metadata["doc_id"] for d in changed}
+        manifest.upsert(((did, current[did]) for did in changed_ids), run_id=run_id)
+        manifest.touch([did for did in current if did not in changed_ids], run_id)
+        rows.upsert(self._doc_to_job(d) for d in base_docs)
+        self._sync_cards(base_docs)
+
+        return {
+            "added": len(changed) - len(reindexed),
+            "updated": len(reindexed),
+            "unchanged": len(base_docs) - len(changed),
+        }
 
-            print("Example IDs:", ids[:3])
-            print("Done indexing.")
+    # ------------------------------------------------------------------
+    # Job cards (compact LLM context, see job_cards.py)
+    # ------------------------------------------------------------------
+    def _job_cards(self):
+        # Created lazily: load_joblist() treats a missing db_dir as "build from scratch".
+        if self._card_store is None:
+            self._card_store = JobCardStore(os.path.join(self.db_dir, "job_cards.sqlite3"))
+        return self._card_store
+
+    @staticmethod
+    def _card_hash(doc):
+        return content_hash(f"{doc.page_content}\n{doc.metadata.get('recruiter_email', '')}")
+
+    @staticmethod
+    def _doc_to_job(doc):
+        return {**doc.metadata, "description": doc.page_content.split("Description:\n", 1)[-1]}
+
+    def _sync_cards(self, base_docs):
+        """(Re)build cards for docs whose text changed since their card was stored."""
+        cards = self._job_cards()
+        current = {d.metadata["doc_id"]: self._card_hash(d) for d in base_docs}
+        stored = cards.hashes_for(list(current))
+        cards.upsert(
+            (did, current[did], build_job_card(self._doc_to_job(d), did))
+            for d in base_docs
+            for did in [d.metadata["doc_id"]]
+            if stored.get(did) != current[did]
+        )
 
-        self.df_by_id = self.df.set_index("doc_id", drop=False)
-        self.retriever = self.vector_store.as_retriever(search_kwargs={"k": self.search_param})
+    def job_cards_for(self, index, doc_ids):
+        """Cards for doc_ids in order; built on the fly if missing or from another feed version."""
+        stored = self._job_cards().get(list(doc_ids))
+        jobs = index.get_jobs(doc_ids)
+        cards = []
+        for did in doc_ids:
+            if did not in jobs:
+                continue
+            doc = self.row_to_doc(jobs[did])
+            hit = stored.get(did)
+            if hit and hit[0] == self._card_hash(doc):
+                cards.append(hit[1])
+            else:
+                cards.append(build_job_card(self._doc_to_job(doc), did))
+        return cards
 
     def format_full_row(self, row):
         return (
@@ -145,58 +478,265 @@ class JobMatching:
         """
         Returns a chat model instance based on self.model_name.
         Default: Gemini via langchain_google_genai.
+        Built once and reused, so its HTTP client is shared across calls.
         """
         # If you want to switch on prefixes, do it here.
         # For now assume Gemini name is passed.
-        return ChatGoogleGenerativeAI(model=self.model_name, temperature=0)
+        if self._chat is None:
+            self._chat = scheduled_chat_model(self.model_name, temperature=0)
+        return self._chat
 
         # For OpenAI instead:
         # return ChatOpenAI(model=self.model_name, temperature=0)
 
-    def refine_result(self, results: list):
-        chat = self._get_chat_model()
-
-        system = (
-            "You summarize job descriptions. Return STRICT JSON only with keys: "
-            'Company, JobTitle, Remote, Description, Requirements, Email. '
-            'Remote must be "yes" or "not". Keep Description ≤ 200 words.'
+    def _summary_cache(self):
+        if self._summaries is None:
+            self._summaries = JobSummaryCache(os.path.join(self.db_dir, "job_summaries.sqlite3"))
+        return self._summaries
+
+    REFINE_SYSTEM = (
+        "You summarize job descriptions. Return STRICT JSON only with keys: "
+        'Company, JobTitle, Remote, Description, Requirements, Email. '
+        'Remote must be "yes" or "not". Keep Description ≤ 200 words.'
+    )
+
+    def _refine_messages(self, job_text):
+        return [
+            {"role": "system", "content": self.REFINE_SYSTEM},
+            {"role": "user", "content": f"Summarize this job:\n\n{job_text}\n\nReturn only JSON."},
+        ]
+
+    def _split_cached(self, results):
+        """Return (summaries with cache hits filled in, hashes, indexes still to summarize)."""
+        hashes = [content_hash(text) for text in results]
+        cached = self._summary_cache().get_many(self.model_name, list(set(hashes)))
+        summaries = [cached.get(h) for h in hashes]
+        # Summarize each distinct missing text once
+        todo, first = [], {}
+        for i, h in enumerate(hashes):
+            if summaries[i] is None and h not in first:
+                first[h] = i
+                todo.append(i)
+        return summaries, hashes, todo
+
+    def _store_summaries(self, summaries, hashes, todo, doc_ids):
+        self._summary_cache().put_many(
+            self.model_name, ((hashes[i], doc_ids[i] if doc_ids else None, summaries[i]) for i in todo)
         )
+        by_hash = {hashes[i]: summaries[i] for i in todo}
+        return [s if s is not None else by_hash[h] for s, h in zip(summaries, hashes)]
 
-        refined = []
-        for job_text in results:
-            messages = [
-                {"role": "system", "content": system},
-                {"role": "user", "content": f"Summarize this job:\n\n{job_text}\n\nReturn only JSON."},
-            ]
-            resp = chat.invoke(messages)
-            refined.append(resp.content.strip())
-            print(resp.content.strip())
-        return refined
-
-    def exec_query(self, qry_str: str, top_k: int = 5):
-        # allow per-call k override
-        retriever = (
-            self.vector_store.as_retriever(search_kwargs={"k": top_k})
-            if self.vector_store is not None
-            else self.retriever
-        )
-        if retriever is None:
+    def refine_result(self, results: list, doc_ids: Optional[list] = None, max_concurrency: int = 8):
+        """
+        Summarize job texts with the chat model. Cached summaries (same model and
+        job text) are reused; the rest are sent concurrently, max_concurrency at a time,
+        at the scheduler's BACKGROUND priority so they yield to interactive requests.
+        """
+        summaries, hashes, todo = self._split_cached(results)
+        if todo:
+            chat = self._get_chat_model()
+            with llm_priority(BACKGROUND):
+                responses = chat.batch(
+                    [self._refine_messages(results[i]) for i in todo], config={"max_concurrency": max_concurrency}
+                )
+            for i, resp in zip(todo, responses):
+                summaries[i] = resp.content.strip()
+                print(summaries[i])
+        return self._store_summaries(summaries, hashes, todo, doc_ids)
+
+    async def arefine_result(self, results: list, doc_ids: Optional[list] = None, max_concurrency: int = 8):
+        """Async refine_result: cache misses run as ainvoke calls bounded by a semaphore."""
+        summaries, hashes, todo = await asyncio.to_thread(self._split_cached, results)
+        if todo:
+            chat = self._get_chat_model()
+            semaphore = asyncio.Semaphore(max_concurrency)
+
+            async def summarize(i):
+                async with semaphore:
+                    resp = await chat.ainvoke(self._refine_messages(results[i]))
+                summaries[i] = resp.content.strip()
+
+            with llm_priority(BACKGROUND):
+                await asyncio.gather(*(summarize(i) for i in todo))
+        return await asyncio.to_thread(self._store_summaries, summaries, hashes, todo, doc_ids)
+
+    # ------------------------------------------------------------------
+    # Retrieval (vector, or hybrid vector + BM25)
+    # ------------------------------------------------------------------
+    # Everything goes through one doc-level primitive, _rank_docs_by_vectors:
+    # chunk scores are aggregated per job ("max": best chunk, "sum": all
+    # retrieved chunks), and Chroma, which only ranks chunks, is over-fetched
+    # until top_k distinct jobs are found. Callers ask for the number of jobs
+    # they want and get (doc_id, score) pairs, best first.
+    def _lexical_pool(self):
+        if self._lexical_executor is None:
+            self._lexical_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="bm25")
+        return self._lexical_executor
+
+    def _lexical_doc_ids(self, index, qry_str: str, top_k: int, filters: Optional[JobFilters] = None):
+        allowed = None
+        if filters is not None:
+            allowed = index.allowed_ids(filters)
+        return [did for did, _ in index.bm25.search(qry_str, top_k * self.hybrid_depth, allowed)]
+
+    def _dense_docs_by_vectors(self, index, vectors, top_k: int, where=None, aggregate: str = "max"):
+        """Per query vector: top_k distinct (doc_id, score) from the vector store, best first."""
+        if aggregate not in AGGREGATES:
+            raise ValueError(f"Unknown aggregate: {aggregate}")
+        if isinstance(index.vector_store, NumpyVectorStore):
+            # Scores every chunk, so pooling per doc_id is exact.
+            return index.vector_store.search_docs_by_vectors(vectors, top_k, where, aggregate)
+
+        collection = index.vector_store._collection
+        # Distances → cosine similarity (embeddings are unit length), as NumpyVectorStore scores
+        space = (collection.metadata or {}).get("hnsw:space", "l2")
+        to_similarity = (lambda d: 1.0 - d / 2.0) if space == "l2" else (lambda d: 1.0 - d)
+        n_chunks = collection.count()
+        results = [[] for _ in vectors]
+        pending = list(range(len(vectors)))
+        fetch = top_k * OVERFETCH
+        while pending and n_chunks:
+            fetch = min(fetch, n_chunks)
+            found = collection.query(
+                query_embeddings=[vectors[i] for i in pending],
+                n_results=fetch,
+                where=where,
+                include=["metadatas", "distances"],
+            )
+            still_short = []
+            for i, mds, distances in zip(pending, found["metadatas"], found["distances"]):
+                scores = {}
+                for md, distance in zip(mds, distances):
+                    score = to_similarity(distance)
+                    did = md["doc_id"]
+                    if did not in scores:
+                        scores[did] = score
+                    elif aggregate == "max":
+                        scores[did] = max(scores[did], score)
+                    else:
+                        scores[did] += score
+                results[i] = sorted(scores.items(), key=lambda item: item[1], reverse=True)[:top_k]
+                # Short on distinct jobs, and the store has more chunks to give
+                if len(scores) < top_k and len(mds) == fetch and fetch < n_chunks:
+                    still_short.append(i)
+            if not still_short:
+                break
+            # Grow by the chunks-per-job ratio seen so far (at least double)
+            per_doc = max(len(m) / max(len({md["doc_id"] for md in m}), 1) for m in found["metadatas"])
+            fetch = max(fetch * 2, int(top_k * per_doc * 1.5))
+            pending = still_short
+        return results
+
+    def _fuse(self, dense, lexical_ids, top_k: int):
+        fused = reciprocal_rank_fusion([[did for did, _ in dense], lexical_ids])
+        return fused[:top_k]
+
+    def _rank_docs_by_vectors(self, index, vectors, top_k: int, filters=None, lexical=None, aggregate="max"):
+        """
+        Doc-level search for already embedded queries: top_k distinct
+        (doc_id, score) per query, best first. With `lexical` (BM25 doc_ids
+        per query, hybrid mode) the score is the fused RRF score.
+        """
+        where = filters.where() if filters is not None else None
+        if lexical is None:
+            return self._dense_docs_by_vectors(index, vectors, top_k, where, aggregate)
+        dense = self._dense_docs_by_vectors(index, vectors, top_k * self.hybrid_depth, where, aggregate)
+        return [self._fuse(d, lexical_ids, top_k) for d, lexical_ids in zip(dense, lexical)]
+
+    def _rank_docs(self, index, qry_str: str, top_k: int, filters=None, aggregate="max"):
+        """_rank_docs_by_vectors for one query string; BM25 runs alongside the embedding call."""
+        if index.bm25 is None:
+            return self._rank_docs_by_vectors(index, [self.embeddings.embed_query(qry_str)], top_k, filters, None, aggregate)[0]
+
+        lexical = self._lexical_pool().submit(self._lexical_doc_ids, index, qry_str, top_k, filters)
+        vector = self.embeddings.embed_query(qry_str)
+        return self._rank_docs_by_vectors(index, [vector], top_k, filters, [lexical.result()], aggregate)[0]
+
+    def search_docs(
+        self,
+        qry_str: str,
+        top_k: int = 5,
+        remote_only: bool = False,
+        locations: Optional[List[str]] = None,
+        departments: Optional[List[str]] = None,
+        aggregate: str = "max",
+    ) -> List[Tuple[str, float]]:
+        """
+        Top-k distinct jobs for a query as (formatted job, score), best first.
+
+        aggregate="max" scores a job by its best matching chunk, "sum" by
+        the total over its retrieved chunks. In hybrid mode the score is the
+        reciprocal-rank-fusion score instead of a similarity.
+        """
+        # Read the snapshot once: refresh_index() may swap it while we run.
+        index = self.index
+        if index is None:
             raise RuntimeError("Retriever not initialized. Did you call load_joblist()?")
 
-        chunks = retriever.invoke(qry_str)
+        filters = JobFilters.build(remote_only, locations, departments)
+        ranked = self._rank_docs(index, qry_str, top_k, filters, aggregate)
+        jobs = index.get_jobs(did for did, _ in ranked)
+        return [(self.format_full_row(jobs[did]), score) for did, score in ranked if did in jobs]
+
+    def exec_query(
+        self,
+        qry_str: str,
+        top_k: int = 5,
+        remote_only: bool = False,
+        locations: Optional[List[str]] = None,
+        departments: Optional[List[str]] = None,
+    ):
+        return [text for text, _ in self.search_docs(qry_str, top_k, remote_only, locations, departments)]
+
+    def _cards_for_vector(self, index, vector, top_k: int, token_budget: int, filters=None, lexical_ids=None):
+        lexical = [lexical_ids] if lexical_ids is not None else None
+        ranked = self._rank_docs_by_vectors(index, [vector], top_k, filters, lexical)[0]
+        return fit_to_budget(self.job_cards_for(index, [did for did, _ in ranked]), token_budget)
+
+    async def aexec_query_cards(
+        self,
+        qry_str: str,
+        top_k: int = 10,
+        token_budget: int = 1200,
+        remote_only: bool = False,
+        locations: Optional[List[str]] = None,
+        departments: Optional[List[str]] = None,
+    ):
+        """Async exec_query_cards: aembed_query (and BM25 alongside), then search + card lookup in a worker thread."""
+        index = self.index
+        if index is None:
+            raise RuntimeError("Retriever not initialized. Did you call load_joblist()?")
 
-        seen = set()
-        results = []
-        for ch in chunks:
-            did = ch.metadata["doc_id"]
-            if did in seen:
-                continue
-            seen.add(did)
-            row = self.df_by_id.loc[did]
-            results.append(self.format_full_row(row))
-            if len(results) >= top_k:
-                break
-        return results
+        filters = JobFilters.build(remote_only, locations, departments)
+        if index.bm25 is None:
+            vector, lexical_ids = await self.embeddings.aembed_query(qry_str), None
+        else:
+            vector, lexical_ids = await asyncio.gather(
+                self.embeddings.aembed_query(qry_str),
+                asyncio.to_thread(self._lexical_doc_ids, index, qry_str, top_k, filters),
+            )
+        return await asyncio.to_thread(self._cards_for_vector, index, vector, top_k, token_budget, filters, lexical_ids)
+
+    async def aget_user_info(self, user_id: int):
+        return await run_db(self.get_user_info, user_id)
+
+    def exec_query_cards(
+        self,
+        qry_str: str,
+        top_k: int = 10,
+        token_budget: int = 1200,
+        remote_only: bool = False,
+        locations: Optional[List[str]] = None,
+        departments: Optional[List[str]] = None,
+    ):
+        """Like exec_query, but returns compact job cards that fit in token_budget."""
+        index = self.index
+        if index is None:
+            raise RuntimeError("Retriever not initialized. Did you call load_joblist()?")
+
+        filters = JobFilters.build(remote_only, locations, departments)
+        doc_ids = [did for did, _ in self._rank_docs(index, qry_str, top_k, filters)]
+        return fit_to_budget(self.job_cards_for(index, doc_ids), token_budget)
     
 
     def get_user_info(self,user_id:int):
@@ -222,34 +762,66 @@ class JobMatching:
         if not summary:
             raise ValueError(f"No summary found for user_id={user_id} in cv_profiles.")
 
-        # 2) Build query text
-        qry_str = f"Find roles that match this candidate:\n{summary}"
+        # 2) Same doc-level search as exec_query
+        return self.exec_query(f"Find roles that match this candidate:\n{summary}", top_k=top_k)
 
-        # 3) Use the same logic as exec_query(qry_str)
-        retriever = (
-            self.vector_store.as_retriever(search_kwargs={"k": top_k})
-            if self.vector_store is not None
-            else self.retriever
-        )
-        if retriever is None:
-            raise RuntimeError("Retriever not initialized. Did you call load_joblist()?")
 
-        chunks = retriever.invoke(qry_str)
+    def get_user_infos(self, user_ids: List[int]) -> Dict[int, str]:
+        """{user_id: CV summary} for the users that have one, in one query."""
+        if not user_ids:
+            return {}
+        placeholders = ",".join("?" * len(user_ids))
+        with sqlite3.connect(self.db_path) as conn:
+            cur = conn.execute(f"SELECT id, summary FROM cv_profiles WHERE id IN ({placeholders})", list(user_ids))
+            return {uid: summary for uid, summary in cur.fetchall() if summary}
 
-        seen = set()
-        results = []
-        for ch in chunks:
-            did = ch.metadata["doc_id"]
-            if did in seen:
-                continue
-            seen.add(did)
-            row = self.df_by_id.loc[did]
-            results.append(self.format_full_row(row))
-            if len(results) >= top_k:
-                break
+    def exec_query_by_users(
+        self, user_ids: List[int], top_k: int = 5, token_budget: Optional[int] = None
+    ) -> Dict[int, List[str]]:
+        """
+        Batch version of exec_query_by_user for precomputing recommendations:
+        one SQLite query for all summaries, one batched embedding request, and
+        one scoring call against the job index for all users.
 
-        return results
+        Returns {user_id: [formatted job, ...]}; users without a summary are skipped.
+        With token_budget, each user gets compact job cards (as exec_query_cards)
+        that fit the budget instead.
+        """
+        if not user_ids:
+            return {}
+
+        # 1) Fetch all summaries at once
+        summaries = self.get_user_infos(user_ids)
+
+        missing = [uid for uid in user_ids if uid not in summaries]
+        if missing:
+            print(f"No summary found in cv_profiles for user_ids={missing}, skipping.")
+        if not summaries:
+            return {}
 
+        index = self.index
+        if index is None:
+            raise RuntimeError("Retriever not initialized. Did you call load_joblist()?")
+
+        # 2) Embed every query in one batched request (cached per text)
+        users = list(summaries)
+        queries = [f"Find roles that match this candidate:\n{summaries[uid]}" for uid in users]
+        vectors = self.embeddings.embed_documents(queries)
+
+        # 3) Score all users against the index in one doc-level call
+        lexical = [self._lexical_doc_ids(index, q, top_k) for q in queries] if index.bm25 is not None else None
+        ranked = self._rank_docs_by_vectors(index, vectors, top_k, lexical=lexical)
+
+        if token_budget is not None:
+            return {
+                uid: fit_to_budget(self.job_cards_for(index, [did for did, _ in docs]), token_budget)
+                for uid, docs in zip(users, ranked)
+            }
+        jobs = index.get_jobs({did for docs in ranked for did, _ in docs})
+        return {
+            uid: [self.format_full_row(jobs[did]) for did, _ in docs if did in jobs]
+            for uid, docs in zip(users, ranked)
+        }
 
 # if __name__ == "__main__":
 #     jm = JobMatching(
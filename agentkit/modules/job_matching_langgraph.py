@@ -8,16 +8,21 @@ managed by utils.py for both CVs and job listings.
 
 Features:
 1️⃣ Loads jobs directly from SQLite (via utils).
-2️⃣ Performs keyword + Gemini-based semantic filtering.
+2️⃣ Performs BM25 keyword ranking (inverted index, built once at load
+   and updated incrementally) + Gemini-based semantic filtering.
 3️⃣ Summarizes results via Gemini into structured JSON.
 """
 
 import os
 import json
 import sqlite3
-from typing import List, Dict, Any
+from itertools import islice
+from typing import List, Dict, Any, Optional
 import google.generativeai as genai
 
+from modules.bm25 import BM25Index
+from modules.llm_client import get_llm_client
+
 # -----------------------------------------------------------------------------
 # CONFIG
 # -----------------------------------------------------------------------------
@@ -35,24 +40,26 @@ DB_PATH = os.path.join(os.path.dirname(__file__), "assistant.db")
 # HELPERS
 # -----------------------------------------------------------------------------
 def gemini_invoke(prompt: str) -> str:
-    """Call Gemini and return plain text."""
+    """Call Gemini and return plain text (shared model + response cache)."""
     try:
-        model = genai.GenerativeModel(GEMINI_MODEL)
-        resp = model.generate_content(prompt)
-        return resp.text.strip()
+        return get_llm_client().generate(prompt, model=GEMINI_MODEL)
     except Exception as e:
         print(f"[Gemini error] {e}")
         return ""
 
 
-def _fetch_jobs_from_db(limit: int = 100) -> List[Dict[str, Any]]:
-    """Return all jobs from SQLite."""
+def _fetch_jobs_from_db(limit: Optional[int] = None) -> List[Dict[str, Any]]:
+    """Return all jobs from SQLite (the first `limit` ones if given)."""
     if not os.path.exists(DB_PATH):
         return []
 
     conn = sqlite3.connect(DB_PATH)
     cur = conn.cursor()
-    cur.execute("SELECT id, title, company, description, recruiter_email FROM jobs LIMIT ?", (limit,))
+    query = "SELECT id, title, company, description, recruiter_email FROM jobs"
+    if limit is not None:
+        cur.execute(query + " LIMIT ?", (limit,))
+    else:
+        cur.execute(query)
     rows = cur.fetchall()
     conn.close()
 
@@ -72,12 +79,16 @@ def _fetch_jobs_from_db(limit: int = 100) -> List[Dict[str, Any]]:
 # JOB MATCHING
 # -----------------------------------------------------------------------------
 class JobMatchingGraph:
+    """
+    Every job in the jobs table is a BM25 candidate. Jobs are kept in a dict
+    keyed by id (insertion ordered), so upserts and removals are O(1).
+    """
     def __init__(self):
-        self.jobs = _fetch_jobs_from_db()
+        jobs = _fetch_jobs_from_db()
 
-        if not self.jobs:
+        if not jobs:
             # fallback mock data
-            self.jobs = [
+            jobs = [
                 {
                     "id": 1,
                     "title": "AI Engineer",
@@ -100,16 +111,44 @@ class JobMatchingGraph:
                     "recruiter_email": "hr@visionx.ai",
                 },
             ]
+        self.jobs: Dict[Any, Dict[str, Any]] = {j["id"]: j for j in jobs}
+        self._build_index()
         print(f"[JobMatchingGraph] Loaded {len(self.jobs)} jobs from DB.")
 
     # -------------------------------------------------------------------------
-    # Simple similarity check
+    # Lexical index (BM25)
     # -------------------------------------------------------------------------
-    def _basic_score(self, query: str, text: str) -> float:
-        """Basic keyword overlap score."""
-        q_words = set(query.lower().split())
-        t_words = set(text.lower().split())
-        return len(q_words & t_words) / max(len(q_words), 1)
+    @staticmethod
+    def _job_text(job: Dict[str, Any]) -> str:
+        return f"{job['title']} {job['description']}"
+
+    def _build_index(self):
+        """Tokenize every job once; queries then only touch matching postings."""
+        self.index = BM25Index()
+        self.index.add_many((job_id, self._job_text(j)) for job_id, j in self.jobs.items())
+
+    def upsert_job(self, job: Dict[str, Any]):
+        """Add or replace a job without rebuilding the index."""
+        self.jobs[job["id"]] = job
+        self.index.add(job["id"], self._job_text(job))
+
+    def remove_job(self, job_id: Any):
+        if self.jobs.pop(job_id, None) is not None:
+            self.index.remove(job_id)
+
+    def refresh_jobs(self) -> Dict[str, int]:
+        """Re-read the jobs table and apply only the differences to the index."""
+        fresh = {j["id"]: j for j in _fetch_jobs_from_db()}
+        if not fresh:
+            return {"updated": 0, "deleted": 0}
+        changed = [j for job_id, j in fresh.items() if self.jobs.get(job_id) != j]
+        deleted = [job_id for job_id in self.jobs if job_id not in fresh]
+        for job_id in deleted:
+            self.remove_job(job_id)
+        for job in changed:
+            self.upsert_job(job)
+        print(f"[JobMatchingGraph] Index refreshed: {len(changed)} updated, {len(deleted)} deleted.")
+        return {"updated": len(changed), "deleted": len(deleted)}
 
     # -------------------------------------------------------------------------
     # Semantic search using Gemini
@@ -117,17 +156,15 @@ class JobMatchingGraph:
     def exec_query(self, query: str, top_k: int = 5) -> List[Dict[str, Any]]:
         """Return top-k relevant jobs using text overlap + Gemini reasoning."""
         if not query.strip():
-            return self.jobs[:top_k]
-
-        # Step 1: Simple ranking
-        scored = []
-        for j in self.jobs:
-            score = self._basic_score(query, j["title"] + " " + j["description"])
-            scored.append((score, j))
-
-        # Step 2: Sort and keep top candidates
-        scored.sort(key=lambda x: x[0], reverse=True)
-        top_jobs = [j for _, j in scored[: min(top_k * 2, len(scored))]]
+            return list(islice(self.jobs.values(), top_k))
+
+        # Step 1 + 2: BM25 ranking over the inverted index, keep top candidates
+        n_candidates = min(top_k * 2, len(self.jobs))
+        top_jobs = [self.jobs[job_id] for job_id, _ in self.index.search(query, n_candidates)]
+        if len(top_jobs) < n_candidates:
+            # Too few keyword matches: fill up with the remaining jobs, as the overlap sort did
+            seen = {j["id"] for j in top_jobs}
+            top_jobs += list(islice((j for j in self.jobs.values() if j["id"] not in seen), n_candidates - len(top_jobs)))
 
         # Step 3: Let Gemini refine top-k
         jobs_text = "\n\n".join(
@@ -0,0 +1,117 @@
+"""
+job_rows.py
+--------------------------------------------------
+On-disk job rows behind a JobMatching index snapshot.
+
+A search returns doc_ids; the job fields shown to the user (title,
+company, description, ...) are looked up here instead of in a DataFrame
+of the whole feed, so a serving process does not hold the feed in RAM
+and an index refresh can stream it batch by batch.
+
+One row per (collection, doc_id), written in the same sync that embeds
+the job into that collection: the blue and green collections each keep
+their own rows, and a snapshot only ever reads the rows of its own
+collection. Structured filters (JobFilters) are answered with SQL for
+the BM25 side of hybrid search.
+"""
+
+import os
+import sqlite3
+from typing import Dict, Iterable, Iterator, List, Mapping
+
+JOB_COLUMNS = ("doc_id", "title", "company", "location", "remote", "department", "description", "recruiter_email")
+
+
+class JobRowStore:
+    def __init__(self, path: str, collection: str) -> None:
+        self.path = path
+        self.collection = collection
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS job_rows (
+                    collection TEXT NOT NULL,
+                    doc_id TEXT NOT NULL,
+                    title TEXT NOT NULL,
+                    company TEXT NOT NULL,
+                    location TEXT NOT NULL,
+                    remote TEXT NOT NULL,
+                    department TEXT NOT NULL,
+                    description TEXT NOT NULL,
+                    recruiter_email TEXT NOT NULL,
+                    PRIMARY KEY (collection, doc_id)
+                )
+                """
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path)
+
+    def count(self) -> int:
+        with self._connect() as conn:
+            return conn.execute("SELECT COUNT(*) FROM job_rows WHERE collection = ?", (self.collection,)).fetchone()[0]
+
+    def get(self, doc_ids: List[str]) -> Dict[str, dict]:
+        """Return {doc_id: job} for the given ids that have a row."""
+        found = {}
+        BATCH_SIZE = 500
+        columns = ", ".join(JOB_COLUMNS)
+        with self._connect() as conn:
+            for i in range(0, len(doc_ids), BATCH_SIZE):
+                batch = doc_ids[i : i + BATCH_SIZE]
+                placeholders = ",".join("?" * len(batch))
+                cur = conn.execute(
+                    f"SELECT {columns} FROM job_rows WHERE collection = ? AND doc_id IN ({placeholders})",
+                    [self.collection, *batch],
+                )
+                found.update((row[0], dict(zip(JOB_COLUMNS, row))) for row in cur.fetchall())
+        return found
+
+    def iter_batches(self, batch_size: int = 500) -> Iterator[List[dict]]:
+        """Every row of the collection, batch_size at a time (keyset pagination on doc_id)."""
+        columns = ", ".join(JOB_COLUMNS)
+        last = ""
+        with self._connect() as conn:
+            while True:
+                rows = conn.execute(
+                    f"SELECT {columns} FROM job_rows WHERE collection = ? AND doc_id > ? ORDER BY doc_id LIMIT ?",
+                    (self.collection, last, batch_size),
+                ).fetchall()
+                if not rows:
+                    return
+                last = rows[-1][0]
+                yield [dict(zip(JOB_COLUMNS, row)) for row in rows]
+
+    def matching_ids(self, filters) -> List[str]:
+        """doc_ids whose stored (normalized) fields satisfy every JobFilters clause."""
+        conditions, params = [], [self.collection]
+        for field, values in filters.clauses():
+            if field not in JOB_COLUMNS:
+                raise ValueError(f"Unknown filter field: {field}")
+            conditions.append(f"{field} IN ({','.join('?' * len(values))})")
+            params.extend(values)
+        where = "".join(f" AND {c}" for c in conditions)
+        with self._connect() as conn:
+            cur = conn.execute(f"SELECT doc_id FROM job_rows WHERE collection = ?{where}", params)
+            return [row[0] for row in cur.fetchall()]
+
+    def upsert(self, jobs: Iterable[Mapping]) -> None:
+        """Store normalized job records (row_to_doc fields plus description)."""
+        with self._connect() as conn:
+            conn.executemany(
+                f"""
+                INSERT INTO job_rows (collection, {', '.join(JOB_COLUMNS)})
+                VALUES (?, {', '.join('?' * len(JOB_COLUMNS))})
+                ON CONFLICT(collection, doc_id) DO UPDATE SET
+                    {', '.join(f'{c} = excluded.{c}' for c in JOB_COLUMNS[1:])}
+                """,
+                [(self.collection, *(str(job.get(c, "") or "") for c in JOB_COLUMNS)) for job in jobs],
+            )
+
+    def delete(self, doc_ids: List[str]) -> None:
+        with self._connect() as conn:
+            conn.executemany(
+                "DELETE FROM job_rows WHERE collection = ? AND doc_id = ?",
+                [(self.collection, d) for d in doc_ids],
+            )
@@ -0,0 +1,60 @@
+"""
+job_summaries.py
+--------------------------------------------------
+Persistent cache of LLM job summaries produced by
+JobMatching.refine_result().
+
+Rows are keyed by (model, content_hash) of the exact job text that
+was summarized, so a summary is reused across requests, users and
+restarts until the job text itself changes. The doc_id is kept for
+inspection and pruning.
+"""
+
+import os
+import sqlite3
+from typing import Dict, Iterable, List, Optional, Tuple
+
+
+class JobSummaryCache:
+    def __init__(self, path: str) -> None:
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS job_summaries (
+                    model TEXT NOT NULL,
+                    content_hash TEXT NOT NULL,
+                    doc_id TEXT,
+                    summary TEXT NOT NULL,
+                    PRIMARY KEY (model, content_hash)
+                )
+                """
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path)
+
+    def get_many(self, model: str, hashes: List[str]) -> Dict[str, str]:
+        """Return {content_hash: summary} for the cached hashes."""
+        found = {}
+        BATCH_SIZE = 500
+        with self._connect() as conn:
+            for i in range(0, len(hashes), BATCH_SIZE):
+                batch = hashes[i : i + BATCH_SIZE]
+                placeholders = ",".join("?" * len(batch))
+                cur = conn.execute(
+                    f"SELECT content_hash, summary FROM job_summaries "
+                    f"WHERE model = ? AND content_hash IN ({placeholders})",
+                    [model, *batch],
+                )
+                found.update(cur.fetchall())
+        return found
+
+    def put_many(self, model: str, entries: Iterable[Tuple[str, Optional[str], str]]) -> None:
+        """Store (content_hash, doc_id, summary) triples."""
+        with self._connect() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO job_summaries (model, content_hash, doc_id, summary) VALUES (?, ?, ?, ?)",
+                [(model, h, doc_id, summary) for h, doc_id, summary in entries],
+            )
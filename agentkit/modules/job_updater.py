@@ -11,23 +11,24 @@ import os
 import sqlite3
 import pandas as pd
 from datetime import datetime
+from modules.index_manifest import job_key
 from modules.job_matching import JobMatching
 
 DB_PATH = os.path.join(os.path.dirname(__file__), "assistant.db")
-CSV_SOURCE = "joblist_clean_for_rag.csv"   # could be remote API in future
+CSV_SOURCE = "datastore/joblist_clean_for_rag.csv"   # could be remote API in future
 UPDATE_INTERVAL = 60 * 60 * 3              # every 3 hours
 
 
-async def fetch_latest_jobs() -> pd.DataFrame:
-    """Simulate fetching latest job listings from CSV or API."""
-    print(f"[{datetime.now()}] 🔄 Fetching latest job listings...")
-    df = pd.read_csv(CSV_SOURCE)
-    df = df.fillna("")
-    return df
+def sync_db_with_jobs(df: pd.DataFrame, bulk: bool = False):
+    """
+    Replace or upsert jobs in assistant.db.
 
+    With bulk=True the whole feed is applied in one transaction via
+    bulk_sync_db_with_jobs() and the resulting diff is returned.
+    """
+    if bulk:
+        return bulk_sync_db_with_jobs(df)
 
-def sync_db_with_jobs(df: pd.DataFrame):
-    """Replace or upsert jobs in assistant.db."""
     conn = sqlite3.connect(DB_PATH)
     cur = conn.cursor()
 
@@ -66,16 +67,165 @@ def sync_db_with_jobs(df: pd.DataFrame):
     print("[DB] ✅ Job listings updated.")
 
 
-async def periodic_job_refresh():
-    """Main loop: runs indefinitely to keep RAG and DB fresh."""
-    jm = JobMatching()
+# -----------------------------------------------------------------------------
+# BULK INGEST
+# -----------------------------------------------------------------------------
+def ensure_jobs_schema(conn: sqlite3.Connection):
+    """Create the jobs table plus the unique (title, company) dedup index."""
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS jobs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            title TEXT,
+            company TEXT,
+            description TEXT,
+            recruiter_email TEXT
+        )
+    """)
+    has_index = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type='index' AND name='idx_jobs_title_company'"
+    ).fetchone()
+    if not has_index:
+        # The per-row path never enforced uniqueness; keep the oldest row per key.
+        removed = conn.execute(
+            "DELETE FROM jobs WHERE id NOT IN (SELECT MIN(id) FROM jobs GROUP BY title, company)"
+        ).rowcount
+        if removed:
+            print(f"[DB] ⚠️ Removed {removed} duplicate (title, company) job rows before adding the unique index.")
+        conn.execute("CREATE UNIQUE INDEX idx_jobs_title_company ON jobs(title, company)")
+
+
+def begin_job_sync(conn: sqlite3.Connection):
+    """
+    Prepare a bulk sync on a connection created with isolation_level=None.
+
+    Temp triggers record every inserted/updated/deleted job (title, company)
+    while upsert_jobs() and finish_job_sync() run, so the diff costs no extra
+    reads. The caller decides the transaction boundaries around upsert_jobs().
+    """
+    ensure_jobs_schema(conn)
+    conn.executescript("""
+        DROP TABLE IF EXISTS temp.job_changes;
+        CREATE TEMP TABLE job_changes (title TEXT, company TEXT, kind TEXT);
+        CREATE TEMP TABLE IF NOT EXISTS seen_jobs (title TEXT, company TEXT, PRIMARY KEY (title, company));
+        DELETE FROM temp.job_changes;
+        DELETE FROM temp.seen_jobs;
+
+        CREATE TEMP TRIGGER IF NOT EXISTS jobs_sync_insert AFTER INSERT ON main.jobs
+        BEGIN INSERT INTO job_changes VALUES (NEW.title, NEW.company, 'inserted'); END;
+        CREATE TEMP TRIGGER IF NOT EXISTS jobs_sync_update AFTER UPDATE ON main.jobs
+        BEGIN INSERT INTO job_changes VALUES (NEW.title, NEW.company, 'updated'); END;
+        CREATE TEMP TRIGGER IF NOT EXISTS jobs_sync_delete AFTER DELETE ON main.jobs
+        BEGIN INSERT INTO job_changes VALUES (OLD.title, OLD.company, 'deleted'); END;
+    """)
+
+
+def upsert_jobs(conn: sqlite3.Connection, rows):
+    """Upsert (title, company, description, recruiter_email) tuples; unchanged rows are left alone."""
+    rows = list(rows)
+    conn.executemany(
+        """
+        INSERT INTO jobs (title, company, description, recruiter_email) VALUES (?, ?, ?, ?)
+        ON CONFLICT(title, company) DO UPDATE SET
+            description = excluded.description,
+            recruiter_email = excluded.recruiter_email
+        WHERE jobs.description IS NOT excluded.description
+           OR jobs.recruiter_email IS NOT excluded.recruiter_email
+        """,
+        rows,
+    )
+    conn.executemany(
+        "INSERT OR IGNORE INTO temp.seen_jobs (title, company) VALUES (?, ?)",
+        [(r[0], r[1]) for r in rows],
+    )
+
+
+def finish_job_sync(conn: sqlite3.Connection, delete_missing: bool = True) -> dict:
+    """
+    Delete jobs absent from the feed, commit, and return the diff as job keys
+    (index_manifest.job_key), the doc_ids JobMatching indexes jobs under.
+    """
+    if not conn.in_transaction:
+        conn.execute("BEGIN")
+    if delete_missing:
+        conn.execute("""
+            DELETE FROM jobs WHERE NOT EXISTS (
+                SELECT 1 FROM temp.seen_jobs s WHERE s.title = jobs.title AND s.company = jobs.company
+            )
+        """)
+    conn.execute("COMMIT")
+
+    found = {"inserted": set(), "updated": set(), "deleted": set()}
+    for title, company, kind in conn.execute("SELECT DISTINCT title, company, kind FROM temp.job_changes"):
+        found[kind].add(job_key(title, company))
+    found["updated"] -= found["inserted"]
+    changes = {kind: sorted(keys) for kind, keys in found.items()}
+
+    conn.executescript("""
+        DROP TRIGGER IF EXISTS temp.jobs_sync_insert;
+        DROP TRIGGER IF EXISTS temp.jobs_sync_update;
+        DROP TRIGGER IF EXISTS temp.jobs_sync_delete;
+    """)
+    return changes
+
+
+def job_rows(df: pd.DataFrame):
+    """Yield DB rows (title, company, description, recruiter_email) from a job DataFrame."""
+    emails = df["recruiter_email"] if "recruiter_email" in df.columns else [""] * len(df)
+    for title, company, description, email in zip(df["title"], df["company"], df["description"], emails):
+        yield str(title), str(company), str(description), str(email)
+
+
+def bulk_sync_db_with_jobs(df: pd.DataFrame) -> dict:
+    """
+    Upsert the whole feed in a single transaction and drop jobs that left it.
+
+    Returns {"inserted": [...], "updated": [...], "deleted": [...]} job keys
+    for downstream re-indexing / cache invalidation.
+    """
+    conn = sqlite3.connect(DB_PATH, isolation_level=None)
+    try:
+        begin_job_sync(conn)
+        try:
+            conn.execute("BEGIN")
+            upsert_jobs(conn, job_rows(df))
+            changes = finish_job_sync(conn)
+        except Exception:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+    finally:
+        conn.close()
+
+    print(
+        f"[DB] ✅ Job listings synced: {len(changes['inserted'])} inserted, "
+        f"{len(changes['updated'])} updated, {len(changes['deleted'])} deleted."
+    )
+    return changes
+
+
+async def periodic_job_refresh(jm: JobMatching, initial_delay: float = 0):
+    """
+    Main loop: runs indefinitely to keep RAG and DB fresh.
+
+    `jm` must be the instance that serves queries (agent.jm). The feed is
+    streamed once, batch by batch, into both the DB and jm's inactive
+    collection, which is then hot-swapped in (jm.refresh_index), so memory
+    stays bounded by the batch size.
+    """
+    from modules.job_ingest import ingest_job_feed  # job_ingest builds on this module
+    from modules.recommendations import invalidate_jobs
+
+    if initial_delay:
+        await asyncio.sleep(initial_delay)
     while True:
         try:
-            df = await fetch_latest_jobs()
-            sync_db_with_jobs(df)
+            # Stream the feed into the DB and the inactive index slot, then swap it in
+            result = await asyncio.to_thread(ingest_job_feed, CSV_SOURCE, jm=jm, db_path=DB_PATH)
 
-            # Optionally reload job matcher cache
-            jm.load_jobs()
+            # Drop materialized recommendations that point at changed/removed jobs
+            changed = result["db"]["updated"] + result["db"]["deleted"]
+            await asyncio.to_thread(invalidate_jobs, changed)
             print(f"[{datetime.now()}] ✅ RAG + DB refreshed successfully.")
         except Exception as e:
             print(f"[Updater] ⚠️ Error during job refresh: {e}")
@@ -0,0 +1,321 @@
+"""
+llm_client.py
+--------------------------------------------------
+Shared LLM client layer with a persistent exact-match response cache.
+
+Every plain prompt → text call in the project (gemini_invoke in graph.py
+and job_matching_langgraph.py, CV enrichment/summary, CV tailoring and
+cover letters) goes through one LLMClient, as do schema-constrained
+prompt → Pydantic model calls (structured / astructured):
+- model objects (genai.GenerativeModel / ChatGoogleGenerativeAI) are
+  built once per model + params and reused;
+- responses are stored in SQLite keyed by sha256(kind + model + prompt
+  + params), so re-processing the same CV or job never pays twice;
+- entries expire after `ttl_seconds`, and the table is kept under
+  `max_bytes` of response text with LRU eviction;
+- text calls take an optional `validate(text)` (e.g. a JSON parser):
+  its result is returned, and a reply it rejects is never cached (an
+  old cached one is evicted). Checks that run later, like compiling
+  generated LaTeX, call evict() on failure;
+- hits / misses are counted for monitoring;
+- cache misses are sent through the shared LLMScheduler (rate limits,
+  priorities, retry on 429).
+
+ScheduledChatGoogleGenerativeAI is the chat model for callers that hand
+the model to LangChain (the job agent, pipeline ranking, job summaries):
+its provider calls take a scheduler slot themselves.
+
+Configuration (env): LLM_CACHE_PATH, LLM_CACHE_TTL, LLM_CACHE_MAX_BYTES.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Callable, Dict, Optional, Type
+
+from langchain_google_genai import ChatGoogleGenerativeAI
+from pydantic import BaseModel
+
+from modules.async_runtime import run_db
+from modules.llm_scheduler import ScheduledChatModel, estimate_tokens, get_scheduler
+
+LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH", "llm_cache.db")
+LLM_CACHE_TTL = int(os.getenv("LLM_CACHE_TTL", str(60 * 60 * 24 * 7)))   # one week
+LLM_CACHE_MAX_BYTES = int(os.getenv("LLM_CACHE_MAX_BYTES", str(200 * 1024 * 1024)))
+
+
+class LLMClient:
+    def __init__(
+        self,
+        cache_path: str = LLM_CACHE_PATH,
+        ttl_seconds: int = LLM_CACHE_TTL,
+        max_bytes: int = LLM_CACHE_MAX_BYTES,
+    ) -> None:
+        self.cache_path = cache_path
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._models: Dict[tuple, Any] = {}
+        self._lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(os.path.abspath(cache_path)), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS llm_cache (
+                    key TEXT PRIMARY KEY,
+                    model TEXT NOT NULL,
+                    response TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    created_at REAL NOT NULL,
+                    last_used REAL NOT NULL
+                )
+                """
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_llm_cache_last_used ON llm_cache(last_used)")
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.cache_path, timeout=30)
+
+    @staticmethod
+    def _key(kind: str, model: str, prompt: str, params: dict) -> str:
+        payload = json.dumps([kind, model, prompt, params], sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    # -------------------------------------------------------------------------
+    # Model objects (built once, reused)
+    # -------------------------------------------------------------------------
+    def _generative_model(self, model: str):
+        key = ("genai", model)
+        with self._lock:
+            if key not in self._models:
+                import google.generativeai as genai
+
+                if os.getenv("GEMINI_API_KEY"):
+                    genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
+                self._models[key] = genai.GenerativeModel(model)
+            return self._models[key]
+
+    def _chat_model(self, model: str, params: dict):
+        key = ("chat", model, tuple(sorted(params.items())))
+        with self._lock:
+            if key not in self._models:
+                kwargs = dict(params)
+                if os.getenv("GEMINI_API_KEY"):
+                    kwargs.setdefault("google_api_key", os.getenv("GEMINI_API_KEY"))
+                self._models[key] = ChatGoogleGenerativeAI(model=model, **kwargs)
+            return self._models[key]
+
+    def _structured_model(self, model: str, schema: Type[BaseModel], params: dict):
+        key = ("structured", model, schema, tuple(sorted(params.items())))
+        chat = self._chat_model(model, params)
+        with self._lock:
+            if key not in self._models:
+                self._models[key] = chat.with_structured_output(schema)
+            return self._models[key]
+
+    def _structured_key(self, prompt: str, model: str, schema: Type[BaseModel], params: dict) -> str:
+        # The JSON schema is part of the key, so a changed model never reads stale entries
+        return self._key("structured", model, prompt, {**params, "schema": schema.model_json_schema()})
+
+    # -------------------------------------------------------------------------
+    # Calls
+    # -------------------------------------------------------------------------
+    def _checked(self, key: str, text: str, validate: Optional[Callable[[str], Any]]) -> Any:
+        """validate(text) (the text itself without a validator); a rejected reply is evicted."""
+        if validate is None:
+            return text
+        try:
+            return validate(text)
+        except Exception:
+            self._delete(key)
+            raise
+
+    async def _achecked(self, key: str, text: str, validate: Optional[Callable[[str], Any]]) -> Any:
+        if validate is None:
+            return text
+        try:
+            return validate(text)
+        except Exception:
+            await run_db(self._delete, key)
+            raise
+
+    def generate(self, prompt: str, model: str, validate: Optional[Callable[[str], Any]] = None, **params) -> Any:
+        """google.generativeai generate_content(prompt).text, cached once `validate` accepts it."""
+        key = self._key("generate", model, prompt, params)
+        cached = self._lookup(key)
+        if cached is not None:
+            return self._checked(key, cached, validate)
+
+        resp = get_scheduler().call(
+            self._generative_model(model).generate_content, model, estimate_tokens(prompt), prompt, **params
+        )
+        text = resp.text.strip()
+        result = self._checked(key, text, validate)
+        self._store(key, model, text)
+        return result
+
+    def chat(self, prompt: str, model: str, validate: Optional[Callable[[str], Any]] = None, **params) -> Any:
+        """One user message to a LangChain Gemini chat model. Returns the content (or validate(content)), cached."""
+        key = self._key("chat", model, prompt, params)
+        cached = self._lookup(key)
+        if cached is not None:
+            return self._checked(key, cached, validate)
+
+        from langchain_core.messages import HumanMessage
+
+        resp = get_scheduler().call(
+            self._chat_model(model, params).invoke, model, estimate_tokens(prompt), [HumanMessage(content=prompt)]
+        )
+        text = resp.content if hasattr(resp, "content") else str(resp)
+        text = text.strip()
+        result = self._checked(key, text, validate)
+        self._store(key, model, text)
+        return result
+
+    async def agenerate(self, prompt: str, model: str, validate: Optional[Callable[[str], Any]] = None, **params) -> Any:
+        """Async generate(): generate_content_async, cache I/O off the event loop."""
+        key = self._key("generate", model, prompt, params)
+        cached = await run_db(self._lookup, key)
+        if cached is not None:
+            return await self._achecked(key, cached, validate)
+
+        resp = await get_scheduler().acall(
+            self._generative_model(model).generate_content_async, model, estimate_tokens(prompt), prompt, **params
+        )
+        text = resp.text.strip()
+        result = await self._achecked(key, text, validate)
+        await run_db(self._store, key, model, text)
+        return result
+
+    async def achat(self, prompt: str, model: str, validate: Optional[Callable[[str], Any]] = None, **params) -> Any:
+        """Async chat(): ainvoke on the shared chat model, cache I/O off the event loop."""
+        key = self._key("chat", model, prompt, params)
+        cached = await run_db(self._lookup, key)
+        if cached is not None:
+            return await self._achecked(key, cached, validate)
+
+        from langchain_core.messages import HumanMessage
+
+        resp = await get_scheduler().acall(
+            self._chat_model(model, params).ainvoke, model, estimate_tokens(prompt), [HumanMessage(content=prompt)]
+        )
+        text = resp.content if hasattr(resp, "content") else str(resp)
+        text = text.strip()
+        result = await self._achecked(key, text, validate)
+        await run_db(self._store, key, model, text)
+        return result
+
+    def structured(self, prompt: str, model: str, schema: Type[BaseModel], **params) -> BaseModel:
+        """Schema-constrained chat call validated into `schema`, cached as JSON."""
+        key = self._structured_key(prompt, model, schema, params)
+        cached = self._lookup(key)
+        if cached is not None:
+            return schema.model_validate_json(cached)
+
+        result = get_scheduler().call(
+            self._structured_model(model, schema, params).invoke, model, estimate_tokens(prompt), prompt
+        )
+        if result is None:
+            raise ValueError(f"{model} returned no {schema.__name__}")
+        result = schema.model_validate(result)
+        self._store(key, model, result.model_dump_json())
+        return result
+
+    async def astructured(self, prompt: str, model: str, schema: Type[BaseModel], **params) -> BaseModel:
+        key = self._structured_key(prompt, model, schema, params)
+        cached = await run_db(self._lookup, key)
+        if cached is not None:
+            return schema.model_validate_json(cached)
+
+        result = await get_scheduler().acall(
+            self._structured_model(model, schema, params).ainvoke, model, estimate_tokens(prompt), prompt
+        )
+        if result is None:
+            raise ValueError(f"{model} returned no {schema.__name__}")
+        result = schema.model_validate(result)
+        await run_db(self._store, key, model, result.model_dump_json())
+        return result
+
+    def evict(self, kind: str, prompt: str, model: str, **params) -> None:
+        """Drop the cached reply of a generate/chat call (same arguments) that turned out unusable."""
+        self._delete(self._key(kind, model, prompt, params))
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {"hits": self.hits, "misses": self.misses, "hit_rate": self.hits / total if total else 0.0}
+
+    # -------------------------------------------------------------------------
+    # Storage
+    # -------------------------------------------------------------------------
+    def _lookup(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self._connect() as conn:
+            row = conn.execute("SELECT response, created_at FROM llm_cache WHERE key = ?", (key,)).fetchone()
+            if row is not None and now - row[1] > self.ttl_seconds:
+                conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                row = None
+            if row is not None:
+                conn.execute("UPDATE llm_cache SET last_used = ? WHERE key = ?", (now, key))
+
+        with self._lock:
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            return row[0]
+
+    def _delete(self, key: str) -> None:
+        with self._connect() as conn:
+            conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+
+    def _store(self, key: str, model: str, response: str) -> None:
+        if not response:
+            return  # don't pin empty/failed generations
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, model, response, size, created_at, last_used) VALUES (?, ?, ?, ?, ?, ?)",
+                (key, model, response, len(response.encode("utf-8")), now, now),
+            )
+            conn.execute("DELETE FROM llm_cache WHERE created_at < ?", (now - self.ttl_seconds,))
+            (total,) = conn.execute("SELECT COALESCE(SUM(size), 0) FROM llm_cache").fetchone()
+            if total > self.max_bytes:
+                # Keep the most recently used entries that fit in max_bytes
+                conn.execute(
+                    """
+                    DELETE FROM llm_cache WHERE key IN (
+                        SELECT key FROM (
+                            SELECT key, SUM(size) OVER (ORDER BY last_used DESC) AS running FROM llm_cache
+                        ) WHERE running > ?
+                    )
+                    """,
+                    (self.max_bytes,),
+                )
+
+
+class ScheduledChatGoogleGenerativeAI(ScheduledChatModel, ChatGoogleGenerativeAI):
+    """ChatGoogleGenerativeAI whose calls hold a slot of the shared LLMScheduler (see ScheduledChatModel)."""
+
+
+def scheduled_chat_model(model: str, **kwargs) -> ScheduledChatGoogleGenerativeAI:
+    # The scheduler retries throttling with backoff; the client's own retries would multiply it
+    kwargs.setdefault("max_retries", 1)
+    return ScheduledChatGoogleGenerativeAI(model=model, **kwargs)
+
+
+_client: Optional[LLMClient] = None
+_client_lock = threading.Lock()
+
+
+def get_llm_client() -> LLMClient:
+    """Process-wide LLMClient shared by all modules."""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = LLMClient()
+        return _client
@@ -0,0 +1,357 @@
+"""
+llm_scheduler.py
+--------------------------------------------------
+Central, rate-limit-aware scheduler for all LLM calls.
+
+Per model it enforces:
+- a token bucket for requests per minute (rpm) and one for tokens per
+  minute (tpm), filled continuously;
+- a cap on concurrent in-flight calls.
+
+Waiting calls are served by priority class first, FIFO within a class.
+The class comes from a context variable, so a request handler marks its
+work INTERACTIVE (the default) and background loops wrap theirs in
+`with llm_priority(BACKGROUND):`. Provider throttling errors (429 /
+RESOURCE_EXHAUSTED / 503) are retried with exponential backoff and full
+jitter. metrics() reports queue depth per class, in-flight calls,
+grants, retries, failures and time spent waiting.
+
+Clock and sleep functions are injectable so the scheduler can be driven
+by a fake clock or a local fake provider
+(python -m benchmarks.sim_llm_scheduler).
+
+Usage:
+    scheduler = get_scheduler()
+    text = scheduler.call(model.generate_content, "gemini-2.5-flash-lite", est_tokens, prompt)
+
+LangChain chat models used inside agents, batches or structured-output
+chains mix in ScheduledChatModel (see llm_client.ScheduledChatGoogleGenerativeAI),
+so each provider call holds a slot for its whole duration and is retried
+like scheduler.call().
+
+Configuration (env): LLM_RPM, LLM_TPM, LLM_MAX_CONCURRENCY, LLM_MAX_RETRIES.
+"""
+
+import asyncio
+import contextlib
+import contextvars
+import heapq
+import itertools
+import os
+import random
+import threading
+import time
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Callable, Dict, Optional
+
+INTERACTIVE = 0
+BACKGROUND = 1
+PRIORITY_NAMES = {INTERACTIVE: "interactive", BACKGROUND: "background"}
+
+_priority: contextvars.ContextVar = contextvars.ContextVar("llm_priority", default=INTERACTIVE)
+
+POLL_INTERVAL = 0.005
+
+
+@contextlib.contextmanager
+def llm_priority(priority: int):
+    """Run the enclosed LLM calls (also in asyncio.to_thread children) at `priority`."""
+    token = _priority.set(priority)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+def estimate_tokens(text: str, expected_output: int = 500) -> int:
+    """Rough prompt + completion token estimate for the tpm bucket (~4 chars/token)."""
+    return len(text) // 4 + expected_output
+
+
+def is_rate_limit_error(exc: Exception) -> bool:
+    status = getattr(exc, "status_code", None) or getattr(exc, "code", None)
+    if status in (429, 503):
+        return True
+    text = f"{type(exc).__name__} {exc}".lower()
+    return any(s in text for s in ("429", "resource_exhausted", "resourceexhausted", "rate limit", "quota", "503"))
+
+
+@dataclass
+class ModelLimits:
+    rpm: float = float(os.getenv("LLM_RPM", "60"))
+    tpm: float = float(os.getenv("LLM_TPM", "1000000"))
+    max_concurrency: int = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))
+
+
+class TokenBucket:
+    """Continuous-refill bucket: `capacity` units, refilled at `capacity` per minute."""
+
+    def __init__(self, per_minute: float, clock: Callable[[], float]) -> None:
+        self.capacity = per_minute
+        self.rate = per_minute / 60.0
+        self.level = per_minute
+        self.clock = clock
+        self.updated = clock()
+
+    def _refill(self) -> None:
+        now = self.clock()
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float) -> float:
+        """Seconds until `amount` is available (0 if it is now)."""
+        self._refill()
+        amount = min(amount, self.capacity)  # oversized requests wait for a full bucket
+        if self.level >= amount:
+            return 0.0
+        return (amount - self.level) / self.rate
+
+    def take(self, amount: float) -> None:
+        self._refill()
+        self.level -= min(amount, self.capacity)
+
+
+class _ModelState:
+    def __init__(self, limits: ModelLimits, clock) -> None:
+        self.limits = limits
+        self.requests = TokenBucket(limits.rpm, clock)
+        self.tokens = TokenBucket(limits.tpm, clock)
+        self.in_flight = 0
+        self.waiters = []          # heap of (priority, seq)
+
+
+class LLMScheduler:
+    def __init__(
+        self,
+        limits: Optional[Dict[str, ModelLimits]] = None,
+        default_limits: Optional[ModelLimits] = None,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+        max_retries: int = int(os.getenv("LLM_MAX_RETRIES", "5")),
+        base_delay: float = 1.0,
+        max_delay: float = 30.0,
+    ) -> None:
+        self.limits = dict(limits or {})
+        self.default_limits = default_limits or ModelLimits()
+        self.clock = clock
+        self.sleep = sleep
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+        self._lock = threading.Lock()
+        self._models: Dict[str, _ModelState] = {}
+        self._seq = itertools.count()
+        self._counters = defaultdict(float)
+
+    def _state(self, model: str) -> _ModelState:
+        if model not in self._models:
+            self._models[model] = _ModelState(self.limits.get(model, self.default_limits), self.clock)
+        return self._models[model]
+
+    # -------------------------------------------------------------------------
+    # Admission
+    # -------------------------------------------------------------------------
+    def _enqueue(self, model: str, priority: int):
+        ticket = (priority, next(self._seq))
+        with self._lock:
+            heapq.heappush(self._state(model).waiters, ticket)
+        return ticket
+
+    def _try_grant(self, model: str, ticket, tokens: int, hold_slot: bool) -> float:
+        """Grant if `ticket` is first in line and capacity allows; else return seconds to wait."""
+        with self._lock:
+            state = self._state(model)
+            if state.waiters[0] != ticket:
+                return POLL_INTERVAL
+            if hold_slot and state.in_flight >= state.limits.max_concurrency:
+                return POLL_INTERVAL
+            wait = max(state.requests.wait_time(1), state.tokens.wait_time(tokens))
+            if wait > 0:
+                return wait
+            state.requests.take(1)
+            state.tokens.take(tokens)
+            heapq.heappop(state.waiters)
+            if hold_slot:
+                state.in_flight += 1
+            self._counters[f"granted.{PRIORITY_NAMES.get(ticket[0], ticket[0])}"] += 1
+            return 0.0
+
+    def _cancel(self, model: str, ticket) -> None:
+        with self._lock:
+            waiters = self._state(model).waiters
+            if ticket in waiters:
+                waiters.remove(ticket)
+                heapq.heapify(waiters)
+
+    def acquire(self, model: str, tokens: int = 0, hold_slot: bool = False) -> None:
+        """Block until `model` may be called; with hold_slot, also take a concurrency slot."""
+        ticket = self._enqueue(model, _priority.get())
+        start = self.clock()
+        try:
+            while True:
+                wait = self._try_grant(model, ticket, tokens, hold_slot)
+                if wait == 0:
+                    break
+                self.sleep(wait)
+        except BaseException:
+            self._cancel(model, ticket)
+            raise
+        with self._lock:
+            self._counters["wait_seconds"] += self.clock() - start
+
+    async def aacquire(self, model: str, tokens: int = 0, hold_slot: bool = False) -> None:
+        ticket = self._enqueue(model, _priority.get())
+        start = self.clock()
+        try:
+            while True:
+                wait = self._try_grant(model, ticket, tokens, hold_slot)
+                if wait == 0:
+                    break
+                await asyncio.sleep(wait)
+        except BaseException:
+            self._cancel(model, ticket)
+            raise
+        with self._lock:
+            self._counters["wait_seconds"] += self.clock() - start
+
+    def release(self, model: str) -> None:
+        """Give back the concurrency slot taken by acquire(hold_slot=True)."""
+        with self._lock:
+            self._state(model).in_flight -= 1
+
+    @contextlib.contextmanager
+    def slot(self, model: str, tokens: int = 0):
+        """Hold a concurrency slot (after taking from the buckets) for the enclosed call."""
+        self.acquire(model, tokens, hold_slot=True)
+        try:
+            yield
+        finally:
+            self.release(model)
+
+    @contextlib.asynccontextmanager
+    async def aslot(self, model: str, tokens: int = 0):
+        await self.aacquire(model, tokens, hold_slot=True)
+        try:
+            yield
+        finally:
+            self.release(model)
+
+    # -------------------------------------------------------------------------
+    # Calls with retry
+    # -------------------------------------------------------------------------
+    def _backoff(self, attempt: int) -> float:
+        # Full jitter: uniform in [0, min(max_delay, base * 2^attempt)]
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+    def _note_failure(self, exc: Exception, attempt: int) -> bool:
+        """Count the failure; True if the call should be retried."""
+        retry = is_rate_limit_error(exc) and attempt < self.max_retries
+        with self._lock:
+            self._counters["rate_limited" if is_rate_limit_error(exc) else "errors"] += 1
+            if retry:
+                self._counters["retries"] += 1
+            else:
+                self._counters["failed"] += 1
+        return retry
+
+    def call(self, fn: Callable, model: str, est_tokens: int = 0, *args, **kwargs):
+        """Run fn(*args, **kwargs) under model's limits, retrying throttling errors."""
+        for attempt in itertools.count():
+            self.acquire(model, est_tokens, hold_slot=True)
+            try:
+                return fn(*args, **kwargs)
+            except Exception as exc:
+                if not self._note_failure(exc, attempt):
+                    raise
+            finally:
+                self.release(model)
+            self.sleep(self._backoff(attempt))
+
+    async def acall(self, fn: Callable, model: str, est_tokens: int = 0, *args, **kwargs):
+        """Async call(): fn must return an awaitable."""
+        for attempt in itertools.count():
+            await self.aacquire(model, est_tokens, hold_slot=True)
+            try:
+                return await fn(*args, **kwargs)
+            except Exception as exc:
+                if not self._note_failure(exc, attempt):
+                    raise
+            finally:
+                self.release(model)
+            await asyncio.sleep(self._backoff(attempt))
+
+    # -------------------------------------------------------------------------
+    # Metrics
+    # -------------------------------------------------------------------------
+    def metrics(self) -> dict:
+        with self._lock:
+            models = {}
+            for name, state in self._models.items():
+                depth = defaultdict(int)
+                for priority, _ in state.waiters:
+                    depth[PRIORITY_NAMES.get(priority, str(priority))] += 1
+                models[name] = {
+                    "queue_depth": dict(depth),
+                    "in_flight": state.in_flight,
+                    "requests_available": round(state.requests.level, 2),
+                    "tokens_available": round(state.tokens.level),
+                }
+            return {"models": models, **{k: round(v, 3) for k, v in self._counters.items()}}
+
+
+_scheduler: Optional[LLMScheduler] = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler() -> LLMScheduler:
+    """Process-wide scheduler shared by every module that calls an LLM."""
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = LLMScheduler()
+        return _scheduler
+
+
+class ScheduledChatModel:
+    """
+    Mixin for a LangChain chat model class (list it first): every provider
+    call goes through get_scheduler(), whatever wraps the model (invoke,
+    batch, with_structured_output, bind_tools inside an agent).
+
+    _generate / _agenerate run through call() / acall(): a concurrency slot
+    is held for the whole request, throttling errors are retried with
+    backoff, and the call shows up in metrics(). Streams hold a slot while
+    they are consumed but are not retried (chunks may already be out).
+    The bucket estimate is the prompt size plus `expected_output` tokens.
+    """
+
+    expected_output = 500
+
+    def _scheduler_key(self) -> str:
+        return str(getattr(self, "model", "")).split("/")[-1]   # "models/gemini-..." → "gemini-..."
+
+    def _prompt_tokens(self, messages) -> int:
+        return estimate_tokens("".join(str(getattr(m, "content", m)) for m in messages), self.expected_output)
+
+    def _generate(self, messages, *args, **kwargs):
+        parent = super()._generate
+        return get_scheduler().call(
+            lambda: parent(messages, *args, **kwargs), self._scheduler_key(), self._prompt_tokens(messages)
+        )
+
+    async def _agenerate(self, messages, *args, **kwargs):
+        parent = super()._agenerate
+        return await get_scheduler().acall(
+            lambda: parent(messages, *args, **kwargs), self._scheduler_key(), self._prompt_tokens(messages)
+        )
+
+    def _stream(self, messages, *args, **kwargs):
+        with get_scheduler().slot(self._scheduler_key(), self._prompt_tokens(messages)):
+            yield from super()._stream(messages, *args, **kwargs)
+
+    async def _astream(self, messages, *args, **kwargs):
+        async with get_scheduler().aslot(self._scheduler_key(), self._prompt_tokens(messages)):
+            async for chunk in super()._astream(messages, *args, **kwargs):
+                yield chunk
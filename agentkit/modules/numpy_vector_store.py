@@ -0,0 +1,448 @@
+"""
+numpy_vector_store.py
+--------------------------------------------------
+In-process brute-force vector store, an alternative to Chroma.
+
+For a catalogue of tens of thousands of chunks a single float32
+matrix-vector product beats a Chroma client round-trip and HNSW
+traversal. Layout of one collection on disk:
+
+    <persist_directory>/<collection_name>/
+        embeddings.npy   float32 (n_chunks, dim), L2-normalized, memory-mapped
+        doc_ids.npy      parallel array of the chunk's job doc_id
+        chunks.json      chunk ids, texts and metadata
+        pca.npz          PCA mean and axes (only with pca_dim), fitted at flush()
+
+Top-k uses np.argpartition; search_docs() max-pools chunk scores per
+doc_id so a long posting split into many chunks counts once, and takes
+a Chroma-style `where` metadata filter applied before scoring.
+Writes are buffered in memory until flush().
+
+Compact mode (precision="float16"/"int8", optional pca_dim) keeps only a
+reduced, quantized copy of the matrix in RAM and scores against it; the
+top `rescore_factor * k` candidates are then rescored exactly from the
+memory-mapped float32 file, which the OS pages in on demand. The PCA is
+fitted once per flush() and saved, so every worker loading the collection
+projects with the same axes instead of refitting them on its first search.
+"""
+
+import json
+import os
+import sys
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.vectorstores import VectorStore
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+SCORE_BLOCK = 16384  # rows scored per block in compact mode, bounds the float32 temporaries
+
+
+def _fit_pca(matrix: np.ndarray, n_components: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Mean and top principal axes (n_components, dim) of the rows, computed blockwise."""
+    mean = np.zeros(matrix.shape[1], dtype=np.float64)
+    for start in range(0, matrix.shape[0], SCORE_BLOCK):
+        mean += np.asarray(matrix[start : start + SCORE_BLOCK], dtype=np.float64).sum(axis=0)
+    mean /= matrix.shape[0]
+
+    cov = np.zeros((matrix.shape[1], matrix.shape[1]), dtype=np.float64)
+    for start in range(0, matrix.shape[0], SCORE_BLOCK):
+        block = np.asarray(matrix[start : start + SCORE_BLOCK], dtype=np.float64) - mean
+        cov += block.T @ block
+    _, eigvecs = np.linalg.eigh(cov)
+    components = eigvecs[:, ::-1][:, :n_components].T
+    return mean.astype(np.float32), components.astype(np.float32)
+
+
+def _quantize(vectors: np.ndarray, precision: str) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+    """Return (codes, per-dimension scale); scale is None unless precision is int8."""
+    if precision == "float32":
+        return vectors, None
+    if precision == "float16":
+        return np.asarray(vectors, dtype=np.float16), None
+    if precision == "int8":
+        scale = np.abs(vectors).max(axis=0) / 127.0
+        scale[scale == 0] = 1.0
+        return np.round(vectors / scale).astype(np.int8), scale.astype(np.float32)
+    raise ValueError(f"Unknown precision: {precision}")
+
+
+def _payload_bytes(value) -> int:
+    """Approximate RAM of a JSON-like value (str / number / list / dict), containers included."""
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        size += sum(_payload_bytes(k) + _payload_bytes(v) for k, v in value.items())
+    elif isinstance(value, (list, tuple)):
+        size += sum(_payload_bytes(v) for v in value)
+    return size
+
+
+def _top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the k highest scores, best first."""
+    k = min(k, scores.shape[0])
+    if k <= 0:
+        return np.empty(0, dtype=np.int64)
+    idx = np.argpartition(-scores, k - 1)[:k]
+    return idx[np.argsort(-scores[idx], kind="stable")]
+
+
+class NumpyVectorStore(VectorStore):
+    def __init__(
+        self,
+        collection_name: str,
+        embedding_function: Embeddings,
+        persist_directory: str,
+        precision: str = "float32",
+        pca_dim: Optional[int] = None,
+        rescore_factor: int = 4,
+    ) -> None:
+        if precision not in ("float32", "float16", "int8"):
+            raise ValueError(f"Unknown precision: {precision}")
+        self.collection_name = collection_name
+        self._embedding = embedding_function
+        self.path = os.path.join(persist_directory, collection_name)
+        self.precision = precision
+        self.pca_dim = pca_dim
+        self.rescore_factor = rescore_factor
+        self._load()
+
+    @property
+    def embeddings(self) -> Embeddings:
+        return self._embedding
+
+    # -------------------------------------------------------------------------
+    # Persistence
+    # -------------------------------------------------------------------------
+    def _load(self) -> None:
+        emb_path = os.path.join(self.path, "embeddings.npy")
+        if os.path.exists(emb_path):
+            self._matrix = np.load(emb_path, mmap_mode="r")
+            self._doc_ids = np.load(os.path.join(self.path, "doc_ids.npy"))
+            with open(os.path.join(self.path, "chunks.json"), encoding="utf-8") as f:
+                chunks = json.load(f)
+            self._ids, self._texts, self._metadatas = chunks["ids"], chunks["texts"], chunks["metadatas"]
+        else:
+            self._matrix = np.zeros((0, 0), dtype=np.float32)
+            self._doc_ids = np.array([], dtype=str)
+            self._ids, self._texts, self._metadatas = [], [], []
+        pca_path = os.path.join(self.path, "pca.npz")
+        self._pca = None
+        if os.path.exists(pca_path):
+            with np.load(pca_path) as saved:
+                self._pca = (saved["mean"], saved["components"])
+        self._pending = []
+        self._dirty = False
+        self._reindex()
+
+    def _reindex(self) -> None:
+        self._compact = None  # rebuilt lazily on the next search
+        self._columns = {}  # metadata field → array, built lazily for `where` filters
+        self._row_by_id = {cid: i for i, cid in enumerate(self._ids)}
+        # Integer code per row so chunk scores can be pooled per doc_id.
+        self._doc_keys, self._doc_codes = np.unique(self._doc_ids, return_inverse=True)
+
+    def _consolidate(self) -> None:
+        """Fold buffered additions into the matrix."""
+        if not self._pending:
+            return
+        new = np.vstack([p[0] for p in self._pending])
+        matrix = np.asarray(self._matrix)
+        self._matrix = new if matrix.size == 0 else np.vstack([matrix, new])
+        self._doc_ids = np.concatenate([self._doc_ids, np.concatenate([p[1] for p in self._pending])])
+        self._pending = []
+        self._reindex()
+
+    def flush(self) -> None:
+        """Write the collection to disk and re-open the matrix memory-mapped."""
+        self._consolidate()
+        if not self._dirty:
+            return
+        os.makedirs(self.path, exist_ok=True)
+        for name, array in (("embeddings.npy", self._matrix), ("doc_ids.npy", self._doc_ids)):
+            tmp_path = os.path.join(self.path, name + ".tmp.npy")
+            np.save(tmp_path, array)
+            os.replace(tmp_path, os.path.join(self.path, name))
+        tmp_path = os.path.join(self.path, "chunks.json.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"ids": self._ids, "texts": self._texts, "metadatas": self._metadatas}, f, ensure_ascii=False)
+        os.replace(tmp_path, os.path.join(self.path, "chunks.json"))
+        self._save_pca()
+        self._load()
+
+    def _save_pca(self) -> None:
+        """Fit the PCA on the flushed matrix and store it next to it (or drop a stale one)."""
+        pca_path = os.path.join(self.path, "pca.npz")
+        if not self._uses_pca(self._matrix):
+            if os.path.exists(pca_path):
+                os.remove(pca_path)
+            return
+        mean, components = _fit_pca(self._matrix, self.pca_dim)
+        tmp_path = os.path.join(self.path, "pca.tmp.npz")
+        np.savez(tmp_path, mean=mean, components=components)
+        os.replace(tmp_path, pca_path)
+
+    # -------------------------------------------------------------------------
+    # Writes (Chroma-compatible subset used by JobMatching)
+    # -------------------------------------------------------------------------
+    def add_texts(
+        self,
+        texts: Iterable[str],
+        metadatas: Optional[List[dict]] = None,
+        ids: Optional[List[str]] = None,
+        **kwargs: Any,
+    ) -> List[str]:
+        texts = list(texts)
+        metadatas = metadatas or [{} for _ in texts]
+        ids = ids or [f"{m.get('doc_id', '')}:{m.get('chunk', i)}" for i, m in enumerate(metadatas)]
+
+        existing = [cid for cid in ids if cid in self._row_by_id]
+        if existing:
+            self.delete(existing)
+
+        vectors = _normalize(self._embedding.embed_documents(texts))
+        self._pending.append((vectors, np.array([str(m.get("doc_id", "")) for m in metadatas])))
+        for cid in ids:
+            self._row_by_id[cid] = len(self._ids)
+            self._ids.append(cid)
+        self._texts.extend(texts)
+        self._metadatas.extend(metadatas)
+        self._dirty = True
+        return ids
+
+    def delete(self, ids: Optional[List[str]] = None, **kwargs: Any) -> None:
+        if not ids:
+            return
+        self._consolidate()
+        drop = {self._row_by_id[cid] for cid in ids if cid in self._row_by_id}
+        if not drop:
+            return
+        keep = np.array([i for i in range(len(self._ids)) if i not in drop], dtype=np.int64)
+        self._matrix = np.asarray(self._matrix)[keep] if keep.size else np.zeros((0, 0), dtype=np.float32)
+        self._doc_ids = self._doc_ids[keep]
+        self._ids = [self._ids[i] for i in keep]
+        self._texts = [self._texts[i] for i in keep]
+        self._metadatas = [self._metadatas[i] for i in keep]
+        self._dirty = True
+        self._reindex()
+
+    def _column(self, field: str) -> np.ndarray:
+        if field == "doc_id":
+            return self._doc_ids
+        if field not in self._columns:
+            self._columns[field] = np.array([str(md.get(field, "")) for md in self._metadatas], dtype=str)
+        return self._columns[field]
+
+    def _where_mask(self, where: Dict[str, Any]) -> np.ndarray:
+        """
+        Row mask for a Chroma-style metadata filter: {field: value},
+        {field: {"$in": [...]}}, and {"$and": [clause, ...]} of those.
+        """
+        mask = np.ones(len(self._ids), dtype=bool)
+        for field, condition in where.items():
+            if field == "$and":
+                for clause in condition:
+                    mask &= self._where_mask(clause)
+                continue
+            wanted = condition["$in"] if isinstance(condition, dict) else [condition]
+            mask &= np.isin(self._column(field), [str(w) for w in wanted])
+        return mask
+
+    def get(self, ids=None, where: Optional[Dict[str, Any]] = None, include=None, **kwargs: Any) -> Dict[str, Any]:
+        """Chroma-style get(); `where` as in _where_mask()."""
+        self._consolidate()
+        if ids is not None:
+            rows = [self._row_by_id[cid] for cid in ids if cid in self._row_by_id]
+        else:
+            rows = range(len(self._ids))
+        if where:
+            mask = self._where_mask(where)
+            rows = [i for i in rows if mask[i]]
+
+        include = ["metadatas", "documents"] if include is None else include
+        result = {"ids": [self._ids[i] for i in rows]}
+        if "metadatas" in include:
+            result["metadatas"] = [self._metadatas[i] for i in rows]
+        if "documents" in include:
+            result["documents"] = [self._texts[i] for i in rows]
+        return result
+
+    # -------------------------------------------------------------------------
+    # Search
+    # -------------------------------------------------------------------------
+    @property
+    def compact(self) -> bool:
+        return self.precision != "float32" or bool(self.pca_dim)
+
+    def _uses_pca(self, matrix) -> bool:
+        return bool(self.pca_dim) and self.pca_dim < matrix.shape[1] and matrix.shape[0] > self.pca_dim
+
+    def _compact_index(self):
+        """(pca, codes, scale): the in-RAM reduced/quantized copy of the matrix."""
+        if self._compact is None:
+            matrix, pca = self._matrix, None
+            if self._uses_pca(matrix):
+                saved = self._pca
+                if saved is not None and saved[1].shape == (self.pca_dim, matrix.shape[1]):
+                    pca = saved
+                else:
+                    # Not flushed with this pca_dim yet
+                    pca = _fit_pca(matrix, self.pca_dim)
+                matrix = np.vstack([
+                    _normalize((matrix[i : i + SCORE_BLOCK] - pca[0]) @ pca[1].T)
+                    for i in range(0, matrix.shape[0], SCORE_BLOCK)
+                ])
+            codes, scale = _quantize(matrix, self.precision)
+            self._compact = (pca, codes, scale)
+        return self._compact
+
+    def memory_usage(self) -> Dict[str, int]:
+        """
+        Approximate bytes held in RAM, per part:
+        - "vectors": the matrix searched in RAM (the compact copy, PCA and
+          scales in compact mode; the float32 file used for rescoring is
+          memory-mapped and not counted);
+        - "doc_ids": per-row doc_id arrays, id lookup and `where` columns;
+        - "chunks": chunk ids, texts and metadata kept to build results.
+        """
+        self._consolidate()
+        if not self.compact:
+            vectors = np.asarray(self._matrix).nbytes
+        else:
+            pca, codes, scale = self._compact_index()
+            vectors = codes.nbytes + (scale.nbytes if scale is not None else 0) + (sum(a.nbytes for a in pca) if pca else 0)
+        doc_ids = (
+            self._doc_ids.nbytes + self._doc_keys.nbytes + self._doc_codes.nbytes
+            + sum(c.nbytes for c in self._columns.values()) + _payload_bytes(self._row_by_id)
+        )
+        chunks = _payload_bytes(self._ids) + _payload_bytes(self._texts) + _payload_bytes(self._metadatas)
+        return {"vectors": int(vectors), "doc_ids": int(doc_ids), "chunks": int(chunks)}
+
+    def memory_bytes(self) -> int:
+        """Total of memory_usage(): vectors plus the chunk texts and metadata."""
+        return sum(self.memory_usage().values())
+
+    def _scores(self, queries: np.ndarray, rows: Optional[np.ndarray] = None) -> np.ndarray:
+        """(n_queries, n_chunks) scores, over `rows` only if given: exact, or approximate in compact mode."""
+        if not self.compact:
+            matrix = np.asarray(self._matrix) if rows is None else self._matrix[rows]
+            return queries @ matrix.T
+
+        pca, codes, scale = self._compact_index()
+        if rows is not None:
+            codes = codes[rows]
+        if pca is not None:
+            queries = _normalize((queries - pca[0]) @ pca[1].T)
+        if scale is not None:
+            queries = queries * scale
+        scores = np.empty((queries.shape[0], codes.shape[0]), dtype=np.float32)
+        for start in range(0, codes.shape[0], SCORE_BLOCK):
+            block = np.asarray(codes[start : start + SCORE_BLOCK], dtype=np.float32)
+            scores[:, start : start + block.shape[0]] = queries @ block.T
+        return scores
+
+    def _exact(self, rows: np.ndarray, query: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """(sorted rows, full-precision scores) read from the float32 matrix."""
+        rows = np.sort(rows)
+        return rows, np.asarray(self._matrix[rows], dtype=np.float32) @ query
+
+    def similarity_search_by_vector_with_score(self, embedding: List[float], k: int = 4) -> List[Tuple[Document, float]]:
+        self._consolidate()
+        if not self._ids:
+            return []
+        query = _normalize(np.asarray(embedding, dtype=np.float32))
+        scores = self._scores(query[None, :])[0]
+        if self.compact:
+            # Rescore a wider candidate set at full precision.
+            rows, exact = self._exact(_top_k(scores, k * self.rescore_factor), query)
+            best = _top_k(exact, k)
+            rows, scores = rows[best], exact[best]
+        else:
+            rows = _top_k(scores, k)
+            scores = scores[rows]
+        return [
+            (Document(page_content=self._texts[i], metadata=self._metadatas[i], id=self._ids[i]), float(score))
+            for i, score in zip(rows, scores)
+        ]
+
+    def similarity_search_with_score(self, query: str, k: int = 4, **kwargs: Any) -> List[Tuple[Document, float]]:
+        return self.similarity_search_by_vector_with_score(self._embedding.embed_query(query), k)
+
+    def similarity_search(self, query: str, k: int = 4, **kwargs: Any) -> List[Document]:
+        return [doc for doc, _ in self.similarity_search_with_score(query, k)]
+
+    def _select_relevance_score_fn(self):
+        # Scores are cosine similarities already.
+        return lambda score: score
+
+    def _pool(self, codes: np.ndarray, scores: np.ndarray, aggregate: str = "max") -> np.ndarray:
+        """Max (or sum of) chunk scores per doc, indexed by doc code; -inf for docs without rows."""
+        if aggregate == "max":
+            pooled = np.full(len(self._doc_keys), -np.inf, dtype=np.float32)
+            np.maximum.at(pooled, codes, scores)
+            return pooled
+        if aggregate != "sum":
+            raise ValueError(f"Unknown aggregate: {aggregate}")
+        pooled = np.bincount(codes, weights=scores, minlength=len(self._doc_keys)).astype(np.float32)
+        pooled[np.bincount(codes, minlength=len(self._doc_keys)) == 0] = -np.inf
+        return pooled
+
+    def search_docs_by_vectors(
+        self, vectors, top_k: int, where: Optional[Dict[str, Any]] = None, aggregate: str = "max"
+    ) -> List[List[Tuple[str, float]]]:
+        """
+        Doc-level search for a batch of query vectors: one matrix multiply,
+        chunk scores pooled per doc_id (max, or sum with aggregate="sum"),
+        then top-k docs per query.
+        In compact mode the best `rescore_factor * top_k` docs are rescored
+        exactly over all of their chunks.
+
+        With a `where` metadata filter only the matching chunks are scored.
+        """
+        self._consolidate()
+        queries = _normalize(np.atleast_2d(np.asarray(vectors, dtype=np.float32)))
+        rows = np.nonzero(self._where_mask(where))[0] if where and self._ids else None
+        if not self._ids or (rows is not None and not rows.size):
+            return [[] for _ in range(len(queries))]
+
+        codes = self._doc_codes if rows is None else self._doc_codes[rows]
+        results = []
+        for query, row in zip(queries, self._scores(queries, rows)):
+            pooled = self._pool(codes, row, aggregate)
+            if self.compact:
+                candidates = np.isin(codes, _top_k(pooled, top_k * self.rescore_factor))
+                exact_rows, exact = self._exact(np.nonzero(candidates)[0] if rows is None else rows[candidates], query)
+                pooled = self._pool(self._doc_codes[exact_rows], exact, aggregate)
+            results.append([
+                (str(self._doc_keys[i]), float(pooled[i])) for i in _top_k(pooled, top_k) if pooled[i] > -np.inf
+            ])
+        return results
+
+    def search_docs(
+        self, query: str, top_k: int, where: Optional[Dict[str, Any]] = None, aggregate: str = "max"
+    ) -> List[Tuple[str, float]]:
+        """Top-k distinct doc_ids for a query, scored by their best chunk (or chunk sum)."""
+        return self.search_docs_by_vectors([self._embedding.embed_query(query)], top_k, where, aggregate)[0]
+
+    @classmethod
+    def from_texts(
+        cls,
+        texts: List[str],
+        embedding: Embeddings,
+        metadatas: Optional[List[dict]] = None,
+        collection_name: str = "jobs_rag",
+        persist_directory: str = "numpy_job_index",
+        **kwargs: Any,
+    ) -> "NumpyVectorStore":
+        store = cls(collection_name, embedding, persist_directory)
+        store.add_texts(texts, metadatas, ids=kwargs.get("ids"))
+        store.flush()
+        return store
@@ -0,0 +1,34 @@
+"""
+rank_fusion.py
+--------------------------------------------------
+Reciprocal rank fusion (Cormack et al., 2009) for hybrid retrieval.
+
+Each ranking contributes 1 / (k + rank) for every id it contains
+(rank starting at 1). Only ranks are used, so BM25 scores and cosine
+similarities never need to be put on a common scale. k=60 is the
+usual constant: it damps the weight of the very first positions.
+"""
+
+from typing import Dict, Hashable, Iterable, List, Optional, Sequence, Tuple
+
+RRF_K = 60
+
+
+def reciprocal_rank_fusion(
+    rankings: Iterable[Sequence[Hashable]],
+    k: int = RRF_K,
+    weights: Optional[Sequence[float]] = None,
+) -> List[Tuple[Hashable, float]]:
+    """Fuse ranked id lists (best first) into one (id, score) list, best first."""
+    scores: Dict[Hashable, float] = {}
+    for i, ranking in enumerate(rankings):
+        weight = weights[i] if weights else 1.0
+        seen = set()
+        rank = 0
+        for doc_id in ranking:
+            if doc_id in seen:
+                continue  # chunk-level rankings may repeat a doc: keep its best rank
+            seen.add(doc_id)
+            rank += 1
+            scores[doc_id] = scores.get(doc_id, 0.0) + weight / (k + rank)
+    return sorted(scores.items(), key=lambda item: item[1], reverse=True)
@@ -0,0 +1,279 @@
+"""
+recommendations.py
+--------------------------------------------------
+Materialized job recommendations in assistant.db.
+
+/show_jobs reads a user's recommendations from the `recommendations`
+table (a primary-key lookup on user and mode) and only runs the live
+agent on a miss. "agent" and "pipeline" results are stored separately,
+so a request never gets the other mode's answer.
+
+Pipeline rows, the ones /show_jobs serves by default, are also filled
+by a nightly batch (NIGHTLY_HOUR, local time): one worker claims the night's run in the DB, users with a fresh
+row are skipped, and the rest go through a batched compute function
+(one retrieval call per batch of users). Rows are invalidated:
+- per user, when their cv_profiles row changes (save_to_db calls
+  invalidate_user, and the stored summary hash is checked on read);
+- per job, when the job sync reports a job the row was computed from
+  as updated or deleted (invalidate_jobs). These are the doc_ids (job
+  keys, as in the sync diff) of every job retrieved for the answer,
+  taken from the cards, not re-derived from the titles the LLM wrote.
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import uuid
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from modules.llm_scheduler import BACKGROUND, llm_priority
+
+DB_PATH = os.getenv("DB_PATH", "./assistant.db")
+REFRESH_INTERVAL = 60 * 60 * 24            # nightly
+NIGHTLY_HOUR = int(os.getenv("RECOMMENDATIONS_NIGHTLY_HOUR", "3"))   # local hour the batch starts
+BATCH_MODE = "pipeline"                    # the mode the nightly batch materializes
+BATCH_SIZE = 32                            # users per batched retrieval call
+
+
+def _summary_hash(summary: Optional[str]) -> str:
+    return hashlib.sha256((summary or "").encode("utf-8")).hexdigest()
+
+
+def _profile_summary(conn: sqlite3.Connection, user_id: str) -> Optional[str]:
+    try:
+        row = conn.execute("SELECT summary FROM cv_profiles WHERE id = ?", (user_id,)).fetchone()
+    except sqlite3.OperationalError:
+        return None  # no CV uploaded yet
+    return row[0] if row else None
+
+
+def init_recommendations_db(conn: sqlite3.Connection):
+    for table in ("recommendations", "recommendation_jobs"):
+        columns = [r[1] for r in conn.execute(f"PRAGMA table_info({table})")]
+        if columns and "mode" not in columns:
+            # Older layout (one row per user, or jobs-table ids): can't tell modes apart, start over
+            conn.execute("DROP TABLE IF EXISTS recommendations")
+            conn.execute("DROP TABLE IF EXISTS recommendation_jobs")
+            break
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS recommendations (
+            user_id TEXT NOT NULL,
+            mode TEXT NOT NULL,
+            summary_hash TEXT NOT NULL,
+            payload TEXT NOT NULL,
+            created_at TEXT NOT NULL,
+            PRIMARY KEY (user_id, mode)
+        )
+        """
+    )
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS recommendation_jobs (
+            user_id TEXT NOT NULL,
+            mode TEXT NOT NULL,
+            job_key TEXT NOT NULL,
+            PRIMARY KEY (user_id, mode, job_key)
+        )
+        """
+    )
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_recommendation_jobs_job ON recommendation_jobs(job_key)")
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS recommendation_runs (
+            run_date TEXT PRIMARY KEY,
+            owner TEXT NOT NULL,
+            started_at TEXT NOT NULL
+        )
+        """
+    )
+
+
+# ======================================================
+# PARSING
+# ======================================================
+def parse_recommendations(raw_result: Any) -> Any:
+    """Turn the agent's final message (often fenced ```json) into Python objects."""
+    if not isinstance(raw_result, str):
+        return raw_result
+    if "```json" in raw_result:
+        raw_result = raw_result.split("```json")[-1].split("```")[0]
+    cleaned = re.sub(r"^```json|```$", "", raw_result.strip(), flags=re.MULTILINE).strip()
+    return json.loads(cleaned.replace("```", "").strip())
+
+
+# ======================================================
+# READ / WRITE
+# ======================================================
+def get_cached_recommendations(user_id: str, mode: str = "agent", db_path: str = DB_PATH) -> Optional[Any]:
+    """Return the user's materialized recommendations for `mode`, or None on a miss or stale profile."""
+    with sqlite3.connect(db_path) as conn:
+        init_recommendations_db(conn)
+        row = conn.execute(
+            "SELECT payload, summary_hash FROM recommendations WHERE user_id = ? AND mode = ?", (str(user_id), mode)
+        ).fetchone()
+        summary = _profile_summary(conn, str(user_id)) if row else None
+    if row is None:
+        return None
+    payload, summary_hash = row
+    if summary_hash != _summary_hash(summary):
+        return None
+    return json.loads(payload)
+
+
+def save_recommendations(
+    user_id: str,
+    recommendations: Any,
+    mode: str = "agent",
+    job_keys: Iterable[str] = (),
+    db_path: str = DB_PATH,
+):
+    """Materialize one user's recommendations for `mode` together with the jobs (doc_ids) they were computed from."""
+    user_id = str(user_id)
+    job_keys = list(job_keys)
+    with sqlite3.connect(db_path) as conn:
+        init_recommendations_db(conn)
+        summary = _profile_summary(conn, user_id)
+        conn.execute(
+            "INSERT OR REPLACE INTO recommendations (user_id, mode, summary_hash, payload, created_at) "
+            "VALUES (?, ?, ?, ?, ?)",
+            (
+                user_id,
+                mode,
+                _summary_hash(summary),
+                json.dumps(recommendations, ensure_ascii=False),
+                datetime.utcnow().isoformat(),
+            ),
+        )
+        conn.execute("DELETE FROM recommendation_jobs WHERE user_id = ? AND mode = ?", (user_id, mode))
+        conn.executemany(
+            "INSERT OR IGNORE INTO recommendation_jobs (user_id, mode, job_key) VALUES (?, ?, ?)",
+            [(user_id, mode, key) for key in job_keys],
+        )
+
+
+# ======================================================
+# INVALIDATION
+# ======================================================
+def invalidate_user(user_id: str, db_path: str = DB_PATH):
+    with sqlite3.connect(db_path) as conn:
+        init_recommendations_db(conn)
+        conn.execute("DELETE FROM recommendations WHERE user_id = ?", (str(user_id),))
+        conn.execute("DELETE FROM recommendation_jobs WHERE user_id = ?", (str(user_id),))
+
+
+def invalidate_jobs(job_keys: Iterable[str], db_path: str = DB_PATH) -> int:
+    """Drop the recommendations of every user that was recommended one of these jobs."""
+    job_keys = list(job_keys)
+    if not job_keys:
+        return 0
+    with sqlite3.connect(db_path) as conn:
+        init_recommendations_db(conn)
+        conn.execute("CREATE TEMP TABLE IF NOT EXISTS changed_jobs (job_key TEXT PRIMARY KEY)")
+        conn.execute("DELETE FROM temp.changed_jobs")
+        conn.executemany("INSERT OR IGNORE INTO temp.changed_jobs VALUES (?)", [(k,) for k in job_keys])
+        users = [
+            r[0]
+            for r in conn.execute(
+                "SELECT DISTINCT user_id FROM recommendation_jobs WHERE job_key IN (SELECT job_key FROM temp.changed_jobs)"
+            )
+        ]
+        conn.executemany("DELETE FROM recommendations WHERE user_id = ?", [(u,) for u in users])
+        conn.executemany("DELETE FROM recommendation_jobs WHERE user_id = ?", [(u,) for u in users])
+    if users:
+        print(f"[Recommendations] Invalidated {len(users)} users after job changes.")
+    return len(users)
+
+
+# ======================================================
+# BACKGROUND BATCH
+# ======================================================
+def stale_users(mode: str = BATCH_MODE, max_age: float = REFRESH_INTERVAL, db_path: str = DB_PATH) -> List[Any]:
+    """cv_profiles ids with a summary but no row for `mode` newer than max_age seconds (or a stale profile)."""
+    cutoff = (datetime.utcnow() - timedelta(seconds=max_age)).isoformat()
+    with sqlite3.connect(db_path) as conn:
+        init_recommendations_db(conn)
+        try:
+            profiles = conn.execute("SELECT id, summary FROM cv_profiles WHERE summary IS NOT NULL AND summary != ''").fetchall()
+        except sqlite3.OperationalError:
+            return []
+        fresh = {
+            user_id: summary_hash
+            for user_id, summary_hash in conn.execute(
+                "SELECT user_id, summary_hash FROM recommendations WHERE mode = ? AND created_at >= ?", (mode, cutoff)
+            )
+        }
+    return [uid for uid, summary in profiles if fresh.get(str(uid)) != _summary_hash(summary)]
+
+
+def claim_nightly_run(owner: str, run_date: Optional[str] = None, db_path: str = DB_PATH) -> bool:
+    """True for exactly one caller per run_date (default: today), across workers sharing the DB."""
+    run_date = run_date or datetime.now().date().isoformat()
+    with sqlite3.connect(db_path) as conn:
+        init_recommendations_db(conn)
+        cur = conn.execute(
+            "INSERT OR IGNORE INTO recommendation_runs (run_date, owner, started_at) VALUES (?, ?, ?)",
+            (run_date, owner, datetime.utcnow().isoformat()),
+        )
+        return cur.rowcount == 1
+
+
+def refresh_all_recommendations(
+    compute_batch: Callable[[List[Any]], Dict[Any, Any]],
+    mode: str = BATCH_MODE,
+    db_path: str = DB_PATH,
+    batch_size: int = BATCH_SIZE,
+) -> int:
+    """
+    Recompute and store `mode` recommendations for every user without a fresh row.
+
+    compute_batch(user_ids) returns {user_id: (recommendations, job_keys)};
+    users it leaves out (e.g. no summary) are counted as failed and retried
+    next night.
+    """
+    user_ids = stale_users(mode, db_path=db_path)
+    done = 0
+    for i in range(0, len(user_ids), batch_size):
+        batch = user_ids[i : i + batch_size]
+        try:
+            results = compute_batch(batch)
+        except Exception as e:
+            print(f"[Recommendations] ⚠️ Failed for users {batch}: {e}")
+            continue
+        for user_id, (recommendations, job_keys) in results.items():
+            save_recommendations(user_id, recommendations, mode=mode, job_keys=job_keys, db_path=db_path)
+            done += 1
+    print(f"[{datetime.now()}] ✅ Materialized {mode} recommendations for {done}/{len(user_ids)} stale users.")
+    return done
+
+
+def seconds_until_nightly(hour: int = NIGHTLY_HOUR, now: Optional[datetime] = None) -> float:
+    """Seconds until the next `hour`:00 local time."""
+    now = now or datetime.now()
+    start = now.replace(hour=hour, minute=0, second=0, microsecond=0)
+    if start <= now:
+        start += timedelta(days=1)
+    return (start - now).total_seconds()
+
+
+async def periodic_recommendation_refresh(compute_batch: Callable[[List[Any]], Dict[Any, Any]]):
+    """
+    Nightly loop: sleep until NIGHTLY_HOUR, then re-materialize stale users
+    off the event loop. Every worker runs the loop; only the one that claims
+    the night's run does the work.
+    """
+    owner = f"{os.getpid()}:{uuid.uuid4().hex[:8]}"
+    while True:
+        await asyncio.sleep(seconds_until_nightly())
+        try:
+            if not await asyncio.to_thread(claim_nightly_run, owner):
+                continue
+            # Yield LLM capacity to interactive /show_jobs requests
+            with llm_priority(BACKGROUND):
+                await asyncio.to_thread(refresh_all_recommendations, compute_batch)
+        except Exception as e:
+            print(f"[Recommendations] ⚠️ Error during refresh: {e}")
@@ -0,0 +1,331 @@
+"""
+task_queue.py
+--------------------------------------------------
+Persistent background task queue (SQLite) with an asyncio worker pool.
+
+/upload_cv and /action enqueue their pipelines here and return a task id
+right away; clients poll /tasks/{id} and /tasks/{id}/result.
+
+- tasks live in the `tasks` table, so queued work survives a restart;
+- a claimed task carries its worker process's owner id and a lease that
+  the owner renews every `lease_timeout / 3` seconds. Only tasks whose
+  lease expired (their process died) are recovered, by any process
+  sharing the DB, so several uvicorn workers never steal live tasks.
+  Recovered tasks are re-queued up to the kind's `max_attempts`, then
+  marked failed; kinds with side effects (apply_job sends an email) are
+  registered with max_attempts=1 and are never run twice. A clean
+  shutdown hands its own tasks back right away;
+- identical submissions (same kind + dedup key, by default a hash of the
+  payload) return the existing task id while it is queued or running,
+  and reuse a finished result for `dedup_window` seconds;
+- handlers are registered per task kind and called as handler(**payload);
+  coroutine handlers are awaited, plain functions run in a thread.
+  Results must be JSON-serializable.
+
+Configuration (env): TASK_DB_PATH, TASK_WORKERS, TASK_DEDUP_WINDOW, TASK_LEASE_TIMEOUT.
+"""
+
+import asyncio
+import hashlib
+import inspect
+import json
+import os
+import socket
+import sqlite3
+import time
+import uuid
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from modules.async_runtime import run_blocking, run_db
+
+TASK_DB_PATH = os.getenv("TASK_DB_PATH", "tasks.db")
+TASK_WORKERS = int(os.getenv("TASK_WORKERS", "4"))
+TASK_DEDUP_WINDOW = int(os.getenv("TASK_DEDUP_WINDOW", "3600"))   # reuse finished results for 1 h
+TASK_LEASE_TIMEOUT = float(os.getenv("TASK_LEASE_TIMEOUT", "60"))   # a running task's owner is presumed dead after this
+
+QUEUED, RUNNING, DONE, FAILED = "queued", "running", "done", "failed"
+
+
+def payload_key(kind: str, payload: dict) -> str:
+    """Default dedup key: hash of the task kind and its canonical payload."""
+    raw = json.dumps([kind, payload], sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class TaskQueue:
+    def __init__(
+        self,
+        db_path: str = TASK_DB_PATH,
+        workers: int = TASK_WORKERS,
+        dedup_window: float = TASK_DEDUP_WINDOW,
+        max_attempts: int = 3,
+        poll_interval: float = 1.0,
+        lease_timeout: float = TASK_LEASE_TIMEOUT,
+    ) -> None:
+        self.db_path = db_path
+        self.workers = workers
+        self.dedup_window = dedup_window
+        self.max_attempts = max_attempts
+        self.poll_interval = poll_interval
+        self.lease_timeout = lease_timeout
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._handlers: Dict[str, Callable] = {}
+        self._max_attempts: Dict[str, int] = {}
+        self._worker_tasks = []
+        self._wakeup: Optional[asyncio.Event] = None
+
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS tasks (
+                    id TEXT PRIMARY KEY,
+                    kind TEXT NOT NULL,
+                    payload TEXT NOT NULL,
+                    dedup_key TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    result TEXT,
+                    error TEXT,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    created_at REAL NOT NULL,
+                    started_at REAL,
+                    finished_at REAL,
+                    owner TEXT,
+                    heartbeat_at REAL
+                )
+                """
+            )
+            columns = [r[1] for r in conn.execute("PRAGMA table_info(tasks)")]
+            for column, sql_type in (("owner", "TEXT"), ("heartbeat_at", "REAL")):
+                if column not in columns:
+                    conn.execute(f"ALTER TABLE tasks ADD COLUMN {column} {sql_type}")
+            # At most one in-flight task per (kind, dedup_key)
+            conn.execute(
+                """
+                CREATE UNIQUE INDEX IF NOT EXISTS idx_tasks_inflight
+                ON tasks(kind, dedup_key) WHERE status IN ('queued', 'running')
+                """
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_tasks_status ON tasks(status, created_at)")
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.db_path, timeout=30)
+
+    def register(self, kind: str, handler: Callable, max_attempts: Optional[int] = None) -> None:
+        """
+        Handle tasks of `kind`. max_attempts (default: the queue's) bounds how
+        often an interrupted task is run again; use 1 for non-idempotent work.
+        """
+        self._handlers[kind] = handler
+        self._max_attempts[kind] = max_attempts or self.max_attempts
+
+    # -------------------------------------------------------------------------
+    # Submit / inspect
+    # -------------------------------------------------------------------------
+    def submit(
+        self, kind: str, payload: dict, dedup_key: Optional[str] = None, dedup_window: Optional[float] = None
+    ) -> Tuple[str, bool]:
+        """
+        Enqueue a task. Returns (task_id, created); created is False for a duplicate.
+        dedup_window overrides how long a finished task is reused (0 = in-flight only).
+        """
+        if kind not in self._handlers:
+            raise ValueError(f"No handler registered for task kind: {kind}")
+        dedup_key = dedup_key or payload_key(kind, payload)
+        now = time.time()
+
+        with self._connect() as conn:
+            window = self.dedup_window if dedup_window is None else dedup_window
+            existing = self._find_duplicate(conn, kind, dedup_key, now - window)
+            if existing:
+                return existing, False
+            task_id = uuid.uuid4().hex
+            try:
+                conn.execute(
+                    "INSERT INTO tasks (id, kind, payload, dedup_key, status, created_at) VALUES (?, ?, ?, ?, ?, ?)",
+                    (task_id, kind, json.dumps(payload, ensure_ascii=False, default=str), dedup_key, QUEUED, now),
+                )
+            except sqlite3.IntegrityError:
+                # Lost the race to an identical submission
+                return self._find_duplicate(conn, kind, dedup_key, now - window), False
+        return task_id, True
+
+    def _find_duplicate(self, conn: sqlite3.Connection, kind: str, dedup_key: str, done_since: float) -> Optional[str]:
+        row = conn.execute(
+            """
+            SELECT id FROM tasks
+            WHERE kind = ? AND dedup_key = ?
+              AND (status IN ('queued', 'running') OR (status = 'done' AND finished_at >= ?))
+            ORDER BY created_at DESC LIMIT 1
+            """,
+            (kind, dedup_key, done_since),
+        ).fetchone()
+        return row[0] if row else None
+
+    def get(self, task_id: str, with_result: bool = False) -> Optional[dict]:
+        with self._connect() as conn:
+            row = conn.execute(
+                """
+                SELECT id, kind, status, attempts, error, created_at, started_at, finished_at, result
+                FROM tasks WHERE id = ?
+                """,
+                (task_id,),
+            ).fetchone()
+        if row is None:
+            return None
+        task = dict(zip(("id", "kind", "status", "attempts", "error", "created_at", "started_at", "finished_at"), row[:8]))
+        if with_result:
+            task["result"] = json.loads(row[8]) if row[8] is not None else None
+        return task
+
+    def counts(self) -> Dict[str, int]:
+        with self._connect() as conn:
+            return dict(conn.execute("SELECT status, COUNT(*) FROM tasks GROUP BY status").fetchall())
+
+    # -------------------------------------------------------------------------
+    # Worker side
+    # -------------------------------------------------------------------------
+    def _requeue(self, conn: sqlite3.Connection, rows, guard: str, params: tuple) -> int:
+        """Re-queue (or fail, once out of attempts) running tasks; `guard` re-checks each row's lease."""
+        now = time.time()
+        requeued = 0
+        for task_id, kind, attempts in rows:
+            if attempts >= self._max_attempts.get(kind, self.max_attempts):
+                conn.execute(
+                    f"UPDATE tasks SET status = ?, error = ?, finished_at = ?, owner = NULL "
+                    f"WHERE id = ? AND status = ? AND {guard}",
+                    (FAILED, "Interrupted; not retried", now, task_id, RUNNING, *params),
+                )
+            else:
+                requeued += conn.execute(
+                    f"UPDATE tasks SET status = ?, started_at = NULL, owner = NULL, heartbeat_at = NULL "
+                    f"WHERE id = ? AND status = ? AND {guard}",
+                    (QUEUED, task_id, RUNNING, *params),
+                ).rowcount
+        return requeued
+
+    def recover(self) -> int:
+        """Re-queue tasks whose owner stopped renewing its lease; fail those out of attempts."""
+        guard = "COALESCE(heartbeat_at, started_at, 0) < ?"
+        cutoff = time.time() - self.lease_timeout
+        with self._connect() as conn:
+            expired = conn.execute(
+                f"SELECT id, kind, attempts FROM tasks WHERE status = ? AND {guard}", (RUNNING, cutoff)
+            ).fetchall()
+            requeued = self._requeue(conn, expired, guard, (cutoff,))
+        if expired:
+            print(f"[TaskQueue] ♻️ Recovered {len(expired)} task(s) with an expired lease ({requeued} re-queued).")
+        return requeued
+
+    def heartbeat(self) -> int:
+        """Renew the lease of every task this process is running."""
+        with self._connect() as conn:
+            return conn.execute(
+                "UPDATE tasks SET heartbeat_at = ? WHERE status = ? AND owner = ?", (time.time(), RUNNING, self.owner)
+            ).rowcount
+
+    def release_own(self) -> int:
+        """Hand this process's running tasks back (clean shutdown) instead of waiting for their lease to expire."""
+        with self._connect() as conn:
+            own = conn.execute(
+                "SELECT id, kind, attempts FROM tasks WHERE status = ? AND owner = ?", (RUNNING, self.owner)
+            ).fetchall()
+            return self._requeue(conn, own, "owner = ?", (self.owner,))
+
+    def _claim(self) -> Optional[Tuple[str, str, dict]]:
+        """Atomically move the oldest queued task to running, leased to this process."""
+        now = time.time()
+        with self._connect() as conn:
+            row = conn.execute(
+                """
+                UPDATE tasks SET status = ?, started_at = ?, attempts = attempts + 1, owner = ?, heartbeat_at = ?
+                WHERE id = (SELECT id FROM tasks WHERE status = ? ORDER BY created_at LIMIT 1)
+                RETURNING id, kind, payload
+                """,
+                (RUNNING, now, self.owner, now, QUEUED),
+            ).fetchone()
+        if row is None:
+            return None
+        return row[0], row[1], json.loads(row[2])
+
+    def _finish(self, task_id: str, result: Any = None, error: Optional[str] = None) -> None:
+        # Only while we still hold the lease: a recovered task belongs to whoever runs it now
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE tasks SET status = ?, result = ?, error = ?, finished_at = ? WHERE id = ? AND owner = ?",
+                (
+                    FAILED if error else DONE,
+                    None if error else json.dumps(result, ensure_ascii=False, default=str),
+                    error,
+                    time.time(),
+                    task_id,
+                    self.owner,
+                ),
+            )
+
+    async def _run(self, kind: str, payload: dict) -> Any:
+        handler = self._handlers[kind]
+        if inspect.iscoroutinefunction(handler):
+            return await handler(**payload)
+        return await run_blocking(handler, **payload)
+
+    async def _worker(self, n: int) -> None:
+        while True:
+            claimed = await run_db(self._claim)
+            if claimed is None:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                self._wakeup.clear()
+                continue
+
+            task_id, kind, payload = claimed
+            print(f"[TaskQueue] ▶️ worker {n}: {kind} {task_id}")
+            try:
+                result = await self._run(kind, payload)
+            except asyncio.CancelledError:
+                raise  # shutdown: handed back by stop() (or recovered once its lease expires)
+            except Exception as e:
+                print(f"[TaskQueue] ❌ {kind} {task_id} failed: {e}")
+                await run_db(self._finish, task_id, error=str(e) or type(e).__name__)
+            else:
+                await run_db(self._finish, task_id, result=result)
+                print(f"[TaskQueue] ✅ {kind} {task_id} done")
+
+    async def asubmit(
+        self, kind: str, payload: dict, dedup_key: Optional[str] = None, dedup_window: Optional[float] = None
+    ) -> Tuple[str, bool]:
+        task_id, created = await run_db(self.submit, kind, payload, dedup_key, dedup_window)
+        if created and self._wakeup is not None:
+            self._wakeup.set()
+        return task_id, created
+
+    async def _lease_keeper(self) -> None:
+        """Renew our leases and recover expired ones (from any dead process) every lease_timeout / 3."""
+        while True:
+            try:
+                await run_db(self.heartbeat)
+                recovered = await run_db(self.recover)
+                if recovered:
+                    self._wakeup.set()
+            except Exception as e:
+                print(f"[TaskQueue] ⚠️ Lease upkeep failed: {e}")
+            await asyncio.sleep(self.lease_timeout / 3)
+
+    async def start(self) -> None:
+        """Recover tasks with expired leases and start the worker pool (FastAPI startup hook)."""
+        await run_db(self.recover)
+        self._wakeup = asyncio.Event()
+        self._worker_tasks = [asyncio.create_task(self._worker(n)) for n in range(self.workers)]
+        self._worker_tasks.append(asyncio.create_task(self._lease_keeper()))
+        print(f"[TaskQueue] 🚀 {self.workers} workers started ({self.db_path}, owner {self.owner})")
+
+    async def stop(self) -> None:
+        for task in self._worker_tasks:
+            task.cancel()
+        await asyncio.gather(*self._worker_tasks, return_exceptions=True)
+        self._worker_tasks = []
+        released = await run_db(self.release_own)
+        if released:
+            print(f"[TaskQueue] ↩️ Re-queued {released} task(s) interrupted by shutdown.")
@@ -193,7 +193,7 @@ const Matches = () => {
   };
 const fetchExternalJobs = async (uid: string) => {
   try {
-    const response = await fetch(`http://78.141.223.232:8000/show_jobs?user_id=${uid}`);
+    const response = await fetch(`http://78.141.223.232:8000/show_jobs?user_id=${uid}&mode=pipeline`);
     if (!response.ok) throw new Error(`HTTP ${response.status}`);
     
     const result = await response.json();
@@ -7,6 +7,27 @@ import { uploadCV } from "@/services/api";
 import { AppHeader } from "@/components/AppHeader";
 import { AppFooter } from "@/components/AppFooter";
 
+const BACKEND_URL = "http://78.141.223.232:8000";
+
+// /upload_cv answers 202 with a task id while the CV is extracted in the
+// background; wait for the task so the profile exists before /show_jobs.
+const waitForTask = async (taskId: string, intervalMs = 1500, timeoutMs = 180000) => {
+  const deadline = Date.now() + timeoutMs;
+  while (Date.now() < deadline) {
+    const response = await fetch(`${BACKEND_URL}/tasks/${taskId}`, { mode: "cors" });
+    if (!response.ok) {
+      throw new Error(`Task status failed: ${response.statusText}`);
+    }
+    const task = await response.json();
+    if (task.status === "done") return task;
+    if (task.status === "failed") {
+      throw new Error(task.error || "CV processing failed");
+    }
+    await new Promise((resolve) => setTimeout(resolve, intervalMs));
+  }
+  throw new Error("CV processing timed out");
+};
+
 const UploadCV = () => {
   const navigate = useNavigate();
   const { toast } = useToast();
@@ -38,7 +59,7 @@ const UploadCV = () => {
       formData.append("file", file);
 
       // POST request to backend
-      const response = await fetch("http://78.141.223.232:8000/upload_cv", {
+      const response = await fetch(`${BACKEND_URL}/upload_cv`, {
         method: "POST",
         body: formData,
         mode: "cors",
@@ -51,9 +72,12 @@ const UploadCV = () => {
       const result = await response.json();
       console.log("✅ Backend response:", result);
 
+      // Extraction runs in the background: poll until the profile is saved
+      await waitForTask(result.task_id);
+
       toast({
         title: "CV Scanned Successfully! 🌱",
-        description: result.message || "Let's build your profile...",
+        description: "Let's build your profile...",
       });
 
       // Save user info if needed